@@ -0,0 +1,176 @@
+"""Time of no_overlapping_courses on large schedules
+
+Loads the instances in benchmarks/instances (overlap_<sections>.xml, one
+filled week each, as interface.create_scheduler_from_file_test reads them)
+and times three versions of the room overlap check on them: the original
+one comparing every pair of filled slot objects, the one comparing every
+pair through the topology tables, and no_overlapping_courses as it is now.
+The weeks have no overlaps, so every version checks the whole week, and
+all three must agree.
+
+The instances are made from a fixed seed; --generate writes them again.
+
+Usage, from anywhere:
+    python benchmarks/overlap_bench.py [--generate]"""
+
+from __future__ import print_function
+import os
+import random
+import sys
+from time import time as now
+from xml.sax.saxutils import quoteattr
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# the course list reads genetic/seeds/override.yaml relative to the
+# working directory
+os.chdir(ROOT)
+
+from genetic import constraint, interface, scheduler
+from genetic.structures import *
+
+INSTANCES = os.path.join(ROOT, "benchmarks", "instances")
+SIZES = [200, 400]
+SEED = 1
+# times each version runs on a week
+REPEAT = 10
+
+TIME_SLOTS_MWF = ['%02d:00-%02d:50' % (h, h) for h in range(8, 18)]
+TIME_SLOTS_TR = ['%02d:00-%02d:15' % (h, h + 1) for h in range(8, 17, 2)]
+
+
+## The original no_overlapping_courses
+#  @param this_week The this_week parameter
+#  @param args The args parameter
+#  @return dictionary of score and failed
+def all_slot_pairs(this_week, args):
+    """Every filled slot object against every later one"""
+    reval = {"score": 1, "failed": []}
+    times = []
+    for each_timeslot in this_week.list_time_slots():
+        if each_timeslot.course != None:
+            times.append(each_timeslot)
+    while len(times) > 0:
+        each_time = times.pop(0)
+        for each_other_time in times:
+            if each_time.day != each_other_time.day or \
+               each_time.room != each_other_time.room :
+                continue
+            if constraint.is_overlap(each_time, each_other_time):
+                this_week.valid = False
+                reval["score"] = 0
+    return reval
+
+
+## no_overlapping_courses before the sweep
+#  @param this_week The this_week parameter
+#  @param args The args parameter
+#  @return dictionary of score and failed
+def all_table_pairs(this_week, args):
+    """Every filled slot against every later one, through the slot infos
+    and the overlap table of the topology"""
+    reval = {"score": 1, "failed": []}
+    topology = this_week.topology
+    overlap = topology.overlap
+    times = [topology.slots[i] for i in range(topology.num_slots)
+             if this_week.assignment[i] != EMPTY]
+    while len(times) > 0:
+        each_time = times.pop(0)
+        for each_other_time in times:
+            if each_time.day_index != each_other_time.day_index or \
+               each_time.room_index != each_other_time.room_index :
+                continue
+            if overlap[each_time.time_id][each_other_time.time_id]:
+                this_week.valid = False
+                reval["score"] = 0
+    return reval
+
+
+VERSIONS = [("original", all_slot_pairs),
+            ("pairs through tables", all_table_pairs),
+            ("sweep", constraint.no_overlapping_courses)]
+
+
+def instance_path(num_sections):
+    return os.path.join(INSTANCES, "overlap_%d.xml" % num_sections)
+
+
+## Writes an instance
+#  @param num_sections Number of course sections
+#  @param rng A random.Random object
+#  @return None
+def generate(num_sections, rng):
+    """Writes num_sections sections, one per credit hour placed in a
+    random slot that overlaps no other slot of its room and day, to
+    instance_path(num_sections)"""
+    rooms = [("BLD", str(100 + r), "40", "0") for r in range(num_sections // 6 + 2)]
+    courses = [Course("CSC %d" % (100 + i), rng.choice([1, 3]), "I%d" % (i % 20), 30, False)
+               for i in range(num_sections)]
+    topology = scheduler.Scheduler(courses, rooms, TIME_SLOTS_MWF, TIME_SLOTS_TR, 2).topology
+    free = range(topology.num_slots)
+    rng.shuffle(free)
+    # (day index, room index) -> time ids taken
+    taken = {}
+    placed = []
+    for each_course in courses:
+        for k in range(each_course.credit):
+            for each_index in free:
+                slot_info = topology.slots[each_index]
+                times = taken.setdefault((slot_info.day_index, slot_info.room_index), [])
+                if not any([topology.overlap[slot_info.time_id][t] for t in times]):
+                    break
+            free.remove(each_index)
+            times.append(slot_info.time_id)
+            placed.append((each_course, slot_info))
+
+    lines = ['<?xml version="1.0"?>', '<data>', '    <schedule name="overlap_%d">' % num_sections,
+             '        <courseList>']
+    for each_course in courses:
+        lines.append('          <item code=%s credit="%d" instructor="%s" prereq="" capacity="30" '
+                     'period="B" needs_computers="0" is_lab="0"></item>' %
+                     (quoteattr(each_course.code), each_course.credit, each_course.instructor))
+    lines += ['        </courseList>', '        <roomList>']
+    for room in rooms:
+        lines.append('          <item building="%s" number="%s" capacity="%s" has_computers="%s"></item>' % room)
+    lines += ['        </roomList>', '        <timeListMWF>']
+    lines += ['          <item>%s</item>' % s for s in TIME_SLOTS_MWF]
+    lines += ['        </timeListMWF>', '        <timeListTR>']
+    lines += ['          <item>%s</item>' % s for s in TIME_SLOTS_TR]
+    lines += ['        </timeListTR>', '        <timeSlotDivide>2</timeSlotDivide>', '    </schedule>']
+    for each_course, slot_info in placed:
+        building, number = topology.rooms[slot_info.room_index][:2]
+        lines.append('    <course code=%s credit="%d" startTime="%s" endTime="%s" days="%s" '
+                     'room="%s %s" instructor="%s"></course>' %
+                     (quoteattr(each_course.code), each_course.credit,
+                      slot_info.start_time.strftime("%H:%M"), slot_info.end_time.strftime("%H:%M"),
+                      slot_info.day.upper(), building, number, each_course.instructor))
+    lines.append('</data>')
+    with open(instance_path(num_sections), "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def main(argv):
+    if "--generate" in argv:
+        rng = random.Random(SEED)
+        for num_sections in SIZES:
+            generate(num_sections, rng)
+    print("sections  filled slots  " + "  ".join(["%s (ms)" % name for name, f in VERSIONS]) +
+          "  same")
+    for num_sections in SIZES:
+        week = interface.create_scheduler_from_file_test(instance_path(num_sections)).weeks[0]
+        filled = len([a for a in week.assignment if a != EMPTY])
+        timings = []
+        results = []
+        for name, version in VERSIONS:
+            start = now()
+            for i in range(REPEAT):
+                week.valid = True
+                result = version(week, [])["score"], week.valid
+            timings.append("%*.2f" % (len(name) + 5, (now() - start) / REPEAT * 1000))
+            results.append(result)
+        print("%8d  %12d  %s  %s" % (num_sections, filled, "  ".join(timings),
+                                     results.count(results[0]) == len(results)))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
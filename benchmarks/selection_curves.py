@@ -0,0 +1,128 @@
+"""Fitness against time for the selection settings of evolution_loop
+
+Runs evolution_loop on the input in genetic/seeds (as globs.init loads it)
+once per setting and seed, and prints Scheduler.fitness_history: one line
+per generation with the seconds, best fitness, mean fitness of the weeks
+kept and number of valid weeks, then the best fitness reached at a few
+times and when the maximum fitness was first reached.
+
+Usage, from anywhere:
+    python benchmarks/selection_curves.py [seconds] [settings] [seeds]
+e.g. python benchmarks/selection_curves.py 20 ABCDE 1,2,3"""
+
+from __future__ import print_function
+import os
+import random
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# globs.init reads genetic/seeds relative to the working directory
+os.chdir(ROOT)
+
+# setting -> (selection, population_size, num_elites, num_offspring,
+#             num_random); A is the default of Scheduler
+SETTINGS = {
+    "A": ("all_pairs", 5, 1, 10, 5),
+    "B": ("tournament", 20, 2, 20, 5),
+    "C": ("rank", 20, 2, 20, 5),
+    "D": ("roulette", 20, 2, 20, 5),
+    "E": ("elitist", 10, 10, 20, 5),
+}
+
+# times, in seconds, the best fitness is reported at
+CHECKPOINTS = [2, 5, 10, 20]
+
+
+class LoadingBar:
+
+    """Stands in for the loading bar of the gui"""
+
+    load_bar = {"width": 0}
+
+    def update_loading_bar(self):
+        pass
+
+
+class Window:
+
+    """Stands in for the main window evolution_loop reports to"""
+
+    misc_page = LoadingBar()
+
+    def setup_loading_screen(self):
+        pass
+
+    def go_to_loading_screen(self):
+        pass
+
+    def ask_to_keep_running(self):
+        return False
+
+    def finished_running(self):
+        pass
+
+
+## Runs evolution_loop once
+#  @param setting Key of SETTINGS
+#  @param seed Seed of random
+#  @param seconds Time budget
+#  @return (fitness_history, max_fitness)
+def run(setting, seed, seconds):
+    """Loads the input afresh and evolves it with the setting
+    IN: setting, seed, seconds
+    OUT: (fitness_history of the scheduler, its max_fitness)"""
+    random.seed(seed)
+    import globs
+    # mainScheduler is only made the first time round
+    if hasattr(globs, "mainScheduler"):
+        del globs.mainScheduler
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, "w")
+    try:
+        globs.init()
+        this_scheduler = globs.mainScheduler
+        (this_scheduler.selection, this_scheduler.population_size,
+         this_scheduler.num_elites, this_scheduler.num_offspring,
+         this_scheduler.num_random) = SETTINGS[setting]
+        this_scheduler.evolution_loop(Window(), seconds / 60.0)
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+    return this_scheduler.fitness_history, this_scheduler.max_fitness
+
+
+## Best fitness reached by a time
+#  @param history fitness_history
+#  @param seconds The time
+#  @return best fitness, or None before the first generation
+def best_at(history, seconds):
+    reached = [best for (at, best, mean, valid) in history if at <= seconds]
+    if len(reached) == 0:
+        return None
+    return max(reached)
+
+
+def main(argv):
+    seconds = float(argv[1]) if len(argv) > 1 else 20
+    settings = argv[2] if len(argv) > 2 else "ABCDE"
+    seeds = [int(s) for s in argv[3].split(",")] if len(argv) > 3 else [1, 2, 3]
+    for setting in settings:
+        for seed in seeds:
+            history, max_fitness = run(setting, seed, seconds)
+            print("# setting %s %s seed %d" % (setting, SETTINGS[setting], seed))
+            print("# seconds best mean valid")
+            for at, best, mean, valid in history:
+                print("%.2f %d %.1f %d" % (at, best, mean, valid))
+            first_max = [at for (at, best, mean, valid) in history
+                         if best >= max_fitness]
+            print("# best at " + " ".join(["%ds: %s" % (t, best_at(history, t))
+                                           for t in CHECKPOINTS if t <= seconds]))
+            print("# first max fitness (%d) at %s, %d generations" %
+                  (max_fitness, "%.1fs" % first_max[0] if first_max else "-",
+                   len(history)))
+            print()
+
+
+if __name__ == "__main__":
+    main(sys.argv)
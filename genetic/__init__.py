@@ -1 +1 @@
-__all__ = ["scheduler", "main", "constraint", "interface"]
+__all__ = ["scheduler", "main", "constraint", "interface", "evaluator", "seeder", "matching", "pool", "islands", "selection", "annealing"]
@@ -0,0 +1,199 @@
+from __future__ import print_function
+from structures import *
+from evaluator import IncrementalFitness
+from math import exp
+from time import time as now
+import random
+
+
+## Exponential cooling schedule
+#  @param start Temperature at the start
+#  @param end Temperature at the end
+#  @param progress Share of the time budget used, from 0 to 1
+#  @return temperature
+def exponential_cooling(start, end, progress):
+    return start * (float(end) / start) ** progress
+
+
+## Linear cooling schedule
+#  @param start Temperature at the start
+#  @param end Temperature at the end
+#  @param progress Share of the time budget used, from 0 to 1
+#  @return temperature
+def linear_cooling(start, end, progress):
+    return start + (end - start) * progress
+
+
+# cooling schedules by name; see Scheduler.cooling
+COOLING_SCHEDULES = {
+    "exponential": exponential_cooling,
+    "linear": linear_cooling,
+}
+
+
+class SimulatedAnnealing:
+
+    """Improves a week by simulated annealing. Each step either moves a
+    course to a free placement drawn as the generator draws them (see
+    FreeRows), kept to the course's domain and the capacity and computer
+    requirements, or swaps the slots of two courses placed alike (same
+    credit hours, both labs or not). The fitness after a step comes from
+    IncrementalFitness, which only re-runs the constraints that can see
+    the courses moved. A step that makes the week invalid is taken back;
+    one that lowers the fitness by d is kept with probability exp(-d / T),
+    with the temperature T going from the start to the end temperature
+    over the time budget along the cooling schedule. The NUM_BEST best
+    different weeks met on the way are kept"""
+
+    # temperatures, in fitness points, at the start and end of a run
+    START_TEMPERATURE = 10.0
+    END_TEMPERATURE = 0.05
+    # share of the steps that are swaps rather than moves
+    SWAP_PROBABILITY = 0.3
+    # seconds between calls of the report function of run
+    REPORT_INTERVAL = 0.5
+    # weeks run gives back
+    NUM_BEST = 5
+
+    def __init__(self, this_scheduler, cooling = "exponential",
+                 start_temperature = None, end_temperature = None):
+        self.scheduler = this_scheduler
+        self.topology = this_scheduler.topology
+        self.cooling = COOLING_SCHEDULES[cooling]
+        self.start_temperature = start_temperature
+        if start_temperature is None:
+            self.start_temperature = self.START_TEMPERATURE
+        self.end_temperature = end_temperature
+        if end_temperature is None:
+            self.end_temperature = self.END_TEMPERATURE
+        # the courses a step may move, their placement kinds and tests
+        # (see Scheduler.placement_tests), and the courses by kinds
+        self.movable = []
+        self.kinds = {}
+        self.tests = {}
+        self.alike = {}
+        for each_course in this_scheduler.courses:
+            kinds = self.topology.placement_kinds(each_course)
+            if each_course.is_prescheduled or len(kinds) == 0:
+                continue
+            fits, allowed = this_scheduler.placement_tests(each_course)
+            self.movable.append(each_course)
+            self.kinds[each_course.code] = kinds
+            self.tests[each_course.code] = allowed if allowed is not None else fits
+            self.alike.setdefault(tuple(kinds), []).append(each_course)
+
+    ## Anneals a week
+    #  @param self
+    #  @param this_week A week object to start from, best valid
+    #  @param seconds Time budget
+    #  @param report Function called now and then with the progress, or None
+    #  @return list of week objects, best first
+    def run(self, this_week, seconds, report = None):
+        """Anneals a copy of the week until the time is up, or the NUM_BEST
+        best weeks kept all have the maximum fitness
+        IN: week object, seconds, optional function of (seconds,
+            temperature, current fitness, best fitness, steps, steps kept)
+        OUT: list of at most NUM_BEST week objects, best first"""
+        this_scheduler = self.scheduler
+        week = this_week.deep_copy()
+        week.valid = True
+        evaluator = IncrementalFitness(this_scheduler, week)
+        free_rows = FreeRows(self.topology, week)
+        current = week.fitness
+        # genome hash -> copy of the week, for the best ones met
+        self.best = {}
+        self.keep(week)
+
+        start_time = now()
+        last_report = start_time
+        steps = 0
+        kept = 0
+        temperature = self.start_temperature
+        while len(self.movable) > 0:
+            elapsed = now() - start_time
+            if elapsed >= seconds:
+                break
+            if report is not None and now() - last_report > self.REPORT_INTERVAL:
+                last_report = now()
+                report(elapsed, temperature, current, self.best_fitness(), steps, kept)
+            if len(self.best) >= self.NUM_BEST and \
+               min([w.fitness for w in self.best.values()]) >= this_scheduler.max_fitness:
+                break
+            temperature = self.cooling(self.start_temperature, self.end_temperature,
+                                       elapsed / seconds)
+
+            was_valid = week.valid
+            course = random.choice(self.movable)
+            if random.random() < self.SWAP_PROBABILITY:
+                other = random.choice(self.alike[tuple(self.kinds[course.code])])
+                if other is course:
+                    continue
+                course_slots = week.find_course_indices(course)
+                other_slots = week.find_course_indices(other)
+                if not self.tests[course.code](other_slots) or \
+                   not self.tests[other.code](course_slots):
+                    continue
+                steps += 1
+                evaluator.move_course(course, other_slots)
+                fitness = evaluator.move_course(other, course_slots)
+                if not self.accept(fitness - current, was_valid, week.valid, temperature):
+                    evaluator.move_course(course, course_slots)
+                    evaluator.move_course(other, other_slots)
+                    continue
+            else:
+                slots = free_rows.sample(self.kinds[course.code], self.tests[course.code])
+                if slots is None:
+                    continue
+                steps += 1
+                old_slots = week.find_course_indices(course)
+                fitness = evaluator.move_course(course, slots)
+                if not self.accept(fitness - current, was_valid, week.valid, temperature):
+                    evaluator.undo()
+                    continue
+                free_rows.release(old_slots)
+                free_rows.take(slots)
+            kept += 1
+            current = fitness
+            if week.valid:
+                self.keep(week)
+
+        if report is not None:
+            report(now() - start_time, temperature, current, self.best_fitness(), steps, kept)
+        weeks = self.best.values()
+        weeks.sort(key = lambda x: x.fitness, reverse = True)
+        return weeks
+
+    ## Decides whether to keep a step
+    #  @param self
+    #  @param delta Change in fitness
+    #  @param was_valid Whether the week was valid before the step
+    #  @param valid Whether the week is valid after it
+    #  @param temperature The temperature now
+    #  @return True to keep it
+    def accept(self, delta, was_valid, valid, temperature):
+        """Never from valid to invalid; always if the fitness does not go
+        down; otherwise with probability exp(delta / temperature)"""
+        if was_valid and not valid:
+            return False
+        if delta >= 0 or (valid and not was_valid):
+            return True
+        return random.random() < exp(delta / temperature)
+
+    def keep(self, week):
+        """Adds a copy of the week to the best ones if it is one of them"""
+        if week.genome_hash in self.best:
+            return
+        if len(self.best) >= self.NUM_BEST:
+            worst = min(self.best, key = lambda h: self.best[h].fitness)
+            if self.best[worst].fitness >= week.fitness:
+                return
+            del self.best[worst]
+        copy_of_week = week.deep_copy(with_sections = False)
+        copy_of_week.fitness = week.fitness
+        copy_of_week.valid = week.valid
+        copy_of_week.num_valid = week.num_valid
+        copy_of_week.constraints = dict(week.constraints)
+        self.best[week.genome_hash] = copy_of_week
+
+    def best_fitness(self):
+        return max([w.fitness for w in self.best.values()])
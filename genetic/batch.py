@@ -0,0 +1,245 @@
+from __future__ import print_function
+from structures import *
+from constraint import *
+from time import time as now
+
+# numpy is optional; without it calc_fitness_batch scores one week at a time
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class BatchFitness:
+
+    """Scores a whole population at once. The weeks are encoded as arrays
+    (weeks x slots -> course, weeks x courses -> slots) and the hard
+    constraints below are computed for every week together with numpy:
+
+        ensure_course_room_capacity, ensure_computer_requirement,
+        instructor_conflict, no_overlapping_courses, lab_on_tr,
+        course_sections_at_different_times
+
+    Every other constraint is still run per week, in order, and only for
+    weeks no earlier constraint made invalid. The fitness, valid, num_valid
+    and constraints of each week come out exactly as update_sections
+    followed by calc_fitness gives them; sections are only built for weeks
+    that reach a constraint run per week other than a unary one (see
+    UnaryTable)"""
+
+    def __init__(self, this_scheduler):
+        self.scheduler = this_scheduler
+        self.constraints = list(this_scheduler.constraints)
+        topology = this_scheduler.topology
+        courses = this_scheduler.courses
+        self.num_courses = len(courses)
+        self.num_rooms = len(topology.rooms)
+
+        # per slot
+        self.slot_time = numpy.array([s.time_id for s in topology.slots])
+        self.slot_room = numpy.array([s.room_index for s in topology.slots])
+        self.slot_start = numpy.array([s.start_minutes for s in topology.slots])
+        self.slot_is_tr = numpy.array([s.isTR for s in topology.slots], dtype = bool)
+        self.slot_day_mask = numpy.array([s.day_mask for s in topology.slots])
+        self.overlap = numpy.array(topology.overlap, dtype = bool)
+
+        # slot pairs in the same room on the same day at overlapping times
+        first = []
+        second = []
+        for each_slot in topology.slots:
+            for each_other in topology.day_room_slots[each_slot.day_index][each_slot.room_index]:
+                if each_other.index > each_slot.index and \
+                   topology.overlap[each_slot.time_id][each_other.time_id]:
+                    first.append(each_slot.index)
+                    second.append(each_other.index)
+        self.overlap_first = numpy.array(first, dtype = int)
+        self.overlap_second = numpy.array(second, dtype = int)
+
+        # per course and room: would the section fail the check there
+        self.capacity_fails = numpy.array(
+            [[c.capacity > room[2] for room in topology.rooms] for c in courses],
+            dtype = bool)
+        self.computers_fail = numpy.array(
+            [[c.needs_computers == True and room[3] == False for room in topology.rooms]
+             for c in courses], dtype = bool)
+
+        # courses are found by code, so kernels need codes to be unique
+        self.codes_unique = len(this_scheduler.course_ids) == len(courses)
+
+        self.kernels = []
+        for each_constraint in self.constraints:
+            self.kernels.append(self.make_kernel(each_constraint))
+
+    ## Picks the numpy kernel for a constraint, if it has one
+    #  @param self
+    #  @param this_constraint A constraint object
+    #  @return function of the encoded weeks giving a bool array, or None
+    def make_kernel(self, this_constraint):
+        """Returns a function of (slots, assignment) giving, per week, True
+        where the constraint fails, or None if it must be run per week"""
+        func = this_constraint.func
+        args = this_constraint.args
+        if not self.codes_unique:
+            return None
+        try:
+            if func is ensure_course_room_capacity:
+                return lambda slots, assignment: self.room_table_fails(slots, self.capacity_fails)
+            if func is ensure_computer_requirement:
+                return lambda slots, assignment: self.room_table_fails(slots, self.computers_fail)
+            if func is no_overlapping_courses:
+                return self.room_overlap_fails
+            if func is instructor_conflict:
+                pairs = []
+                for each_instructor in args[0]:
+                    indices = self.course_indices(each_instructor.courses)
+                    for i in range(len(indices)):
+                        for j in range(i + 1, len(indices)):
+                            pairs.append((indices[i], indices[j]))
+                return self.make_pair_kernel(pairs, self.time_overlap_fails)
+            if func is lab_on_tr:
+                labs = numpy.array(self.course_indices(args[0]), dtype = int)
+                return lambda slots, assignment: self.not_tr_fails(slots, labs)
+            if func is course_sections_at_different_times:
+                if args[0] is self.scheduler.courses:
+                    groups = self.scheduler.section_groups
+                else:
+                    groups = group_sections(args[0], self.scheduler.course_ids)
+                pairs = []
+                for each_group in groups:
+                    for i in range(len(each_group)):
+                        for j in range(i + 1, len(each_group)):
+                            pairs.append((each_group[i], each_group[j]))
+                return self.make_pair_kernel(pairs, self.section_clash_fails)
+        except (KeyError, IndexError, TypeError, AttributeError):
+            # args not in the usual form
+            return None
+        return None
+
+    def course_indices(self, courses):
+        """Indices of courses in the scheduler; KeyError if one is unknown"""
+        return [self.scheduler.course_ids[c.code] for c in courses]
+
+    def make_pair_kernel(self, pairs, pair_fails):
+        """Kernel failing a week if pair_fails holds for any course pair"""
+        first = numpy.array([p[0] for p in pairs], dtype = int)
+        second = numpy.array([p[1] for p in pairs], dtype = int)
+        if len(pairs) == 0:
+            return lambda slots, assignment: numpy.zeros(len(slots), dtype = bool)
+        return lambda slots, assignment: pair_fails(slots, first, second)
+
+    def room_table_fails(self, slots, table):
+        """A section fails if table[course, room of its first slot]"""
+        rooms = self.slot_room[slots[:, :, 0]]
+        return table[numpy.arange(self.num_courses), rooms].any(axis = 1)
+
+    def room_overlap_fails(self, slots, assignment):
+        """Two filled slots overlap in the same room on the same day"""
+        if len(self.overlap_first) == 0:
+            return numpy.zeros(len(assignment), dtype = bool)
+        filled = assignment != EMPTY
+        return (filled[:, self.overlap_first] & filled[:, self.overlap_second]).any(axis = 1)
+
+    def time_overlap_fails(self, slots, first, second):
+        """The first slots of the two courses overlap (on any day)"""
+        times = self.slot_time[slots[:, :, 0]]
+        return self.overlap[times[:, first], times[:, second]].any(axis = 1)
+
+    def not_tr_fails(self, slots, labs):
+        """The first slot of a lab is not a tr slot"""
+        if len(labs) == 0:
+            return numpy.zeros(len(slots), dtype = bool)
+        return (~self.slot_is_tr[slots[:, labs, 0]]).any(axis = 1)
+
+    def section_clash_fails(self, slots, first, second):
+        """Same start time and a day in common"""
+        starts = self.slot_start[slots[:, :, 0]]
+        same_start = starts[:, first] == starts[:, second]
+        days = numpy.bitwise_or.reduce(self.slot_day_mask[slots], axis = 2)
+        shared = (days[:, first] & days[:, second]) != 0
+        return (same_start & shared).any(axis = 1)
+
+    ## Scores a list of weeks
+    #  @param self
+    #  @param weeks A list of week objects
+    #  @return none
+    def calc_fitness(self, weeks):
+        """Sets fitness, valid, num_valid and constraints of every week"""
+        batch = []
+        for each_week in weeks:
+            if not each_week.valid:
+                # calc_fitness stops after the first constraint
+                each_week.fitness = 0
+                each_week.num_valid = 0
+            elif each_week.test or len(each_week.course_slots) != self.num_courses:
+                # unscheduled courses; let the constraints report it
+                each_week.update_sections(self.scheduler.courses)
+                self.scheduler.calc_fitness(each_week)
+            else:
+                batch.append(each_week)
+        if len(batch) == 0:
+            return
+
+        slots, assignment = self.encode(batch)
+        fails = []
+        for each_kernel in self.kernels:
+            if each_kernel is None:
+                fails.append(None)
+            else:
+                fails.append(each_kernel(slots, assignment))
+
+        for w in range(len(batch)):
+            self.combine(batch[w], w, fails)
+
+    def encode(self, weeks):
+        """Returns (weeks x courses x k slot indices, padded with each
+        course's first slot; weeks x slots course indices)"""
+        width = 1
+        for each_week in weeks:
+            for each_slots in each_week.course_slots.itervalues():
+                width = max(width, len(each_slots))
+        rows = []
+        for each_week in weeks:
+            course_slots = each_week.course_slots
+            row = []
+            for c in range(self.num_courses):
+                each_slots = course_slots[c]
+                row.append(each_slots + [each_slots[0]] * (width - len(each_slots)))
+            rows.append(row)
+        slots = numpy.array(rows, dtype = int)
+        assignment = numpy.array([numpy.frombuffer(each_week.assignment, dtype = numpy.int16)
+                                  for each_week in weeks])
+        return slots, assignment
+
+    def combine(self, this_week, w, fails):
+        """Adds up the constraints of one week in the order calc_fitness
+        uses, taking the kernel results where there are any"""
+        total_fitness = 0
+        number_valid = 0
+        sections_updated = False
+        for i in self.scheduler.constraint_order():
+            each_constraint = self.constraints[i]
+            if fails[i] is None:
+                # unary constraints read the assignment, not the sections
+                if not sections_updated and each_constraint.func not in UNARY_COMPILERS:
+                    this_week.update_sections(self.scheduler.courses)
+                    sections_updated = True
+                started = now()
+                score = each_constraint.get_fitness(this_week)["score"]
+                self.scheduler.record_constraint(each_constraint, now() - started,
+                                                 this_week.valid)
+            elif fails[i][w]:
+                this_week.valid = False
+                score = 0
+            else:
+                score = each_constraint.weight if each_constraint.weight != 0 else 1
+            if not this_week.valid:
+                break
+            this_week.constraints[each_constraint.name] = [score,
+                    each_constraint.weight if each_constraint.weight != 0 else 1]
+            if each_constraint.weight == 0:
+                number_valid += score
+            else:
+                total_fitness += score
+
+        this_week.fitness = total_fitness
+        this_week.num_valid = number_valid
@@ -12,24 +12,20 @@ def all_before_time(this_week, args):
      args should be [list of courses, timeslot, is_mandatory]
      Timeslot should be a time object:  time(12, 0) """
 
-    holds = []
     is_mandatory = args[2]
     reval = {"score": 0, "failed": []}
 
-    for c in args[0]:  # access list of courses
-        result = course_before_time(this_week, [c, args[1], is_mandatory])["score"]
-        holds.append(result)
-        if result == False:
-            reval["failed"].append(c) 
-
+    # one check per course, as course_before_time makes it
+    num_holding, num_checks, reval["failed"] = \
+        unary_table(all_before_time, args, this_week).count(this_week)
 
     if is_mandatory:
-        if False in holds:
+        if num_holding < num_checks:
             this_week.valid = False
         else:
             reval["score"] = 1
     else:  # not mandatory
-        reval["score"] = get_partial_credit(holds)
+        reval["score"] = partial_credit(num_holding, num_checks)
 
     return reval
 
@@ -45,23 +41,20 @@ def all_after_time(this_week, args):
      args should be [list of courses, timeslot]
      Timeslot should be a time object:  time(12, 0)
      """
-    holds = []
     is_mandatory = args[2]
     reval = {"score": 1, "failed": []}
 
-    for c in args[0]:  # access list of courses
-        result = course_after_time(this_week, [c, args[1], is_mandatory])["score"]
-        holds.append(result)
-        if result == False:
-            reval["failed"].append(c)
+    # one check per course, as course_after_time makes it
+    num_holding, num_checks, reval["failed"] = \
+        unary_table(all_after_time, args, this_week).count(this_week)
 
     if is_mandatory:
-        if False in holds:
+        if num_holding < num_checks:
             this_week.valid = False
             reval["score"] = 0
 
     else:  # not mandatory
-        reval["score"] = get_partial_credit(holds)
+        reval["score"] = partial_credit(num_holding, num_checks)
 
     return reval
 
@@ -81,13 +74,14 @@ def course_before_time(this_week, args):
     else:
         is_mandatory = False
 
-    hold = this_week.find_course(args[0])[0].end_time < args[1]
+    num_holding, num_checks, failed = \
+        unary_table(course_before_time, args, this_week).count(this_week)
 
-    if hold == 0:  # hold fails
+    if num_holding < num_checks:  # hold fails
         if is_mandatory:
             this_week.valid = False
 
-        reval["failed"].append(args[0])
+        reval["failed"] = failed
         reval["score"] = 0
 
     return reval
@@ -107,13 +101,14 @@ def course_after_time(this_week, args):
     else:
         is_mandatory = False
 
-    hold = this_week.find_course(args[0])[0].start_time >= args[1]
+    num_holding, num_checks, failed = \
+        unary_table(course_after_time, args, this_week).count(this_week)
 
-    if hold == 0:  # hold fails
+    if num_holding < num_checks:  # hold fails
         if is_mandatory:
             this_week.valid = False
 
-        reval["failed"].append(args[0])
+        reval["failed"] = failed
         reval["score"] = 0
 
     return reval
@@ -126,13 +121,12 @@ def course_after_time(this_week, args):
 #  @return 1 If hold else 0 
 def lab_on_tr(this_week, args):
     reval = {"score": 1, "failed": []}
-    lab_courses = args[0]
-    for each_lab in lab_courses:
-        each_course = this_week.find_course(each_lab)[0]
-        if not each_course.isTR:
-            this_week.valid = False
-            reval["score"] = 0
-            reval["failed"].append(each_lab)
+    num_holding, num_checks, failed = \
+        unary_table(lab_on_tr, args, this_week).count(this_week)
+    if num_holding < num_checks:
+        this_week.valid = False
+        reval["score"] = 0
+        reval["failed"] = failed
 
     return reval 
 
@@ -150,27 +144,20 @@ def instructor_time_pref_before(this_week, args):
     this_instructor = args[0]
     time_slot = args[1]
     is_mandatory = args[2]
-    holds = [] # will contain 0's for all courses that fail constraint
     reval = {"score": 1, "failed": []}
 
-    for each_course in this_instructor.courses:
-        #section object for course
-        each_section = this_week.find_section( each_course.code )
-        if each_section.time_slots[0].end_time > time_slot:
-            #case 1: a course fails
-            holds.append(0)
-            reval["failed"].append(each_course)
-        else:
-            holds.append(1) # case 2: a course passes
+    # a check per course, on its first slot
+    num_holding, num_checks, reval["failed"] = \
+        unary_table(instructor_time_pref_before, args, this_week).count(this_week)
 
-        if is_mandatory:
-            if False in holds: # at least one failure
-                this_week.valid = False
-                reval["score"] = 0
+    if is_mandatory:
+        if num_holding < num_checks: # at least one failure
+            this_week.valid = False
+            reval["score"] = 0
 
     if not is_mandatory:
         # not mandatory, treat it like normal
-        reval["score"] = get_partial_credit(holds)
+        reval["score"] = partial_credit(num_holding, num_checks)
 
     return reval
 
@@ -188,28 +175,20 @@ def instructor_time_pref_after(this_week, args):
     time_slot = args[1]
     is_mandatory = args[2]
     #print(this_week.schedule.instructors[0])
-    holds = [] # will contain 0's for all courses that fail constraint
     reval = {"score": 1, "failed": []}
 
-    for each_course in this_instructor.courses:
-        #section object for course
-        each_section = this_week.find_section( each_course.code )
-        #only want section objects for this_instructor
-        if each_section.time_slots[0].start_time < time_slot:
-            #case 1: a course fails
-            holds.append(0)
-            reval["failed"].append(each_course)
-        else:
-            holds.append(1)
+    # a check per course, on its first slot
+    num_holding, num_checks, reval["failed"] = \
+        unary_table(instructor_time_pref_after, args, this_week).count(this_week)
 
-        if is_mandatory:
-            if False in holds: # at least one failure
-                this_week.valid = False
-                reval["score"] = 0
+    if is_mandatory:
+        if num_holding < num_checks: # at least one failure
+            this_week.valid = False
+            reval["score"] = 0
 
     if not is_mandatory:
         # not mandatory, treat it like normal
-        reval["score"] = get_partial_credit(holds)
+        reval["score"] = partial_credit(num_holding, num_checks)
 
     return reval
 
@@ -223,27 +202,82 @@ def instructor_conflict(this_week, args):
     """
     Checks for instructors teaching multiple courses at once.  If none are found,
     passes; else, fails.
-    Note: Currently based purely off start time due to MWF-only timeslot system.
+    Note: Currently based purely off start time due to MWF-only timeslot system:
+    two courses conflict if their first slots overlap, whatever their days
+    (see instructor_timeline_flags).
     IN: list of all instructor objects
     OUT: 0/1 for "holds"
     """
     reval = {"score": 1, "failed": []}
     instructors = args[0]
     for each_instructor in instructors:
-        times = []
-        count = 0
-        for each_instructors_course in each_instructor.courses:
-            times.append(
-                this_week.find_course(each_instructors_course)[0])
-        while len(times) > 0:
-            each_time = times.pop(0)
-            for each_other_time in times:
-                if is_overlap(each_time, each_other_time):
-                    this_week.valid = False
-                    reval["score"] = 0
+        if instructor_timeline_flags(this_week, each_instructor)[0]:
+            this_week.valid = False
+            reval["score"] = 0
     return reval
 
 
+## Function that checks an instructor's meetings for the timeline rules
+#
+#  @param this_week The this_week parameter
+#  @param instructor An instructor object
+#  @return (conflict, building change, back-to-back) booleans
+def instructor_timeline_flags(this_week, instructor):
+    """
+    One pass over each day of the instructor's timeline (see
+    Week.instructor_timeline) finds:
+      conflict - two courses whose first slots overlap, on any day, as
+                 instructor_conflict has always compared them; this pass
+                 is over the meetings of all days together
+      building change - two back-to-back meetings in different buildings
+      back-to-back - a meeting back-to-back with two others, i.e. three
+                     meetings of which at least two pairs are back-to-back
+    Back-to-back means at most Topology.SEQUENTIAL_THRESHOLD minutes apart,
+    as in times_are_sequential. Meetings are sorted by start, so each one
+    is only compared with those starting before it ends plus the threshold;
+    in a schedule without conflicts that is just the next one.
+    The flags are kept in the week until its assignment changes
+    IN: week object, instructor object
+    OUT: tuple of 3 bools
+    """
+    flags = this_week.timeline_flags.get(instructor.name)
+    if flags is not None:
+        return flags
+    topology = this_week.topology
+    overlap = topology.overlap
+    sequential = topology.sequential
+    threshold = topology.SEQUENTIAL_THRESHOLD
+    conflict = False
+    building_change = False
+    back_to_back = False
+    days = this_week.instructor_timeline().get(instructor.name, [])
+    courses = sorted(set([m for meetings in days for m in meetings]))
+    for i in range(len(courses)):
+        j = i + 1
+        while not conflict and j < len(courses) and courses[j][0] <= courses[i][1]:
+            if overlap[courses[i][2]][courses[j][2]]:
+                conflict = True
+            j += 1
+    for meetings in days:
+        num_sequential = [0] * len(meetings)
+        for i in range(len(meetings)):
+            start, end, time_id, building, course_index = meetings[i]
+            j = i + 1
+            while j < len(meetings) and meetings[j][0] <= end + threshold:
+                other_time_id = meetings[j][2]
+                if sequential[time_id][other_time_id]:
+                    num_sequential[i] += 1
+                    num_sequential[j] += 1
+                    if building != meetings[j][3]:
+                        building_change = True
+                j += 1
+            if num_sequential[i] >= 2:
+                back_to_back = True
+    flags = (conflict, building_change, back_to_back)
+    this_week.timeline_flags[instructor.name] = flags
+    return flags
+
+
 ## Function that returns the minutes
 #  
 #  @param a_time The a_time parameter
@@ -255,6 +289,18 @@ def get_minutes(a_time):
     return a_time.hour * 60 + a_time.minute
 
 
+## Function that returns the minutes of a time string
+#
+#  @param time_string The time_string parameter, e.g. '08:00'
+#  @return raw amount of minutes for the sake of comparison
+def get_minutes_from_string(time_string):
+    """
+    return raw amount of minutes of an 'hh:mm' string
+    """
+    hour, minute = map(int, time_string.split(':'))
+    return hour * 60 + minute
+
+
 ## Function that returns true if timeslots are sequential, else false. 
 #  @param timslot1
 #  @param timeslot2 The this_week parameter
@@ -281,29 +327,16 @@ def sequential_time_different_building_conflict(this_week, args):
     """
     Checks if an instructor teaches a course in one bulding and in the following
     timeslot a different building. If this does not occur, passes; else, fails.
-    Note: Currently based purely off start time due to MWF-only timeslot system.
+    See instructor_timeline_flags.
     IN: list of all instructor objects
     OUT: 0/1 for "holds"
     """
     reval = {"score": 1, "failed": []}
     instructors = args[0]
     for instructor in instructors:
-        instructor_slots = []
-        count = 0
-        for section in this_week.sections:
-            if section.instructor == instructor:
-                instructor_slots.append(section)
-        for i in range(len(instructor_slots) - 1): #each section
-            section1 = instructor_slots[i]
-            days1 = [day.day_code for day in section1.days]
-            for j in range(i + 1, len(instructor_slots)): #each other section
-                section2 = instructor_slots[j]
-                days2 = [day.day_code for day in section2.days]
-                if len(set(days1).intersection(days2)) > 0: #if sections days overlap
-                    if times_are_sequential(section1.time_slots[0], section2.time_slots[0]):
-                        if section1.room.building != section2.room.building:
-                            this_week.valid = False
-                            reval["score"] = 0
+        if instructor_timeline_flags(this_week, instructor)[1]:
+            this_week.valid = False
+            reval["score"] = 0
     return reval
 
 
@@ -318,24 +351,20 @@ def instructor_preference_day(this_week, args):
     day_code = args[1]
     is_mandatory = args[2]
 
-    holds = []
     reval = {"score": 1, "failed": []}
 
-    for section_week in this_week.sections:
-        if instructor.name == section_week.instructor.name:
-            for day in section_week.days:
-                if not day.day_code in day_code:
-                    if is_mandatory:
-                        this_week.valid = False
+    # a check per day of each of the instructor's sections
+    num_holding, num_checks, failed = \
+        unary_table(instructor_preference_day, args, this_week).count(this_week)
+    if num_holding < num_checks:
+        if is_mandatory:
+            this_week.valid = False
+
+        reval["score"] = 0
+        reval["failed"] = failed
 
-                    reval["score"] = 0
-                    reval["failed"].append(section_week.course)
-                    holds.append(0)
-                else:
-                    holds.append(1)
-                    
     if not is_mandatory:
-        reval["score"] = get_partial_credit(holds)
+        reval["score"] = partial_credit(num_holding, num_checks)
 
     return reval
 
@@ -347,24 +376,21 @@ def partial_schedule_day(this_week, args):
     day_code = args[1]
     is_mandatory = args[2]
 
-    holds = []
     reval = {"score": 1, "failed": []}
 
-    slots = this_week.find_course(course)
-    for each_slot in slots:
-        if not each_slot.day in day_code:
-            if is_mandatory:
-                this_week.valid = False
-			
-	    reval["score"] = 0
-	    reval["failed"].append(course)
-            holds.append(0)
-        else:
-            holds.append(1)
-                    
+    # a check per slot of the course
+    num_holding, num_checks, failed = \
+        unary_table(partial_schedule_day, args, this_week).count(this_week)
+    if num_holding < num_checks:
+        if is_mandatory:
+            this_week.valid = False
+
+        reval["score"] = 0
+        reval["failed"] = failed
+
     # if mandatory and it's here, it passed
     if not is_mandatory:
-        reval["score"] = get_partial_credit(holds)
+        reval["score"] = partial_credit(num_holding, num_checks)
 
     return reval
 
@@ -376,25 +402,22 @@ def partial_schedule_room(this_week, args):
     rooms = args[1]
     is_mandatory = args[2]
 
-    holds = []
     reval = {"score": 1, "failed": []}
 
-    slots = this_week.find_course(course)
-    for each_slot in slots:
-        if not (each_slot.room.building + " " + each_slot.room.number) in rooms:
-            if is_mandatory:
-                this_week.valid = False
-		
-	    reval["score"] = 0
-	    reval["failed"].append(course)
-	    holds.append(0)
-        else:
-            holds.append(1)
-                    
+    # a check per slot of the course
+    num_holding, num_checks, failed = \
+        unary_table(partial_schedule_room, args, this_week).count(this_week)
+    if num_holding < num_checks:
+        if is_mandatory:
+            this_week.valid = False
+
+        reval["score"] = 0
+        reval["failed"] = failed
+
     # if mandatory and it's here, it passed
     if not is_mandatory:
-        reval["score"] = get_partial_credit(holds)
-    
+        reval["score"] = partial_credit(num_holding, num_checks)
+
     return reval
 
 
@@ -409,37 +432,20 @@ def instructor_preference_computer(this_week, args):
     instructor = args[0]
     computer_preference = args[1]
     is_mandatory = args[2]
-    holds = []
     reval = {"score": 1, "failed": []}
     
-    for section_week in this_week.sections:
-        # only applies to courses that do not need computers
-        if section_week.instructor.name == instructor.name and not section_week.course.needs_computers:
-            if computer_preference == True:
-                #instructor prefers computers
-                if section_week.room.has_computers == False:
-                    if is_mandatory:
-                        this_week.valid = False
-
-                    reval["score"] =  0 
-                    reval["failed"].append(section_week.course)
-                    holds.append(0)
-                else:
-                    holds.append(1)
-            else: 
-                #instructor doesn't prefer computers
-                if section_week.room.has_computers == True:
-                    if is_mandatory:
-                        this_week.valid = False
+    # a check per section, on its room, for courses not needing computers
+    num_holding, num_checks, failed = \
+        unary_table(instructor_preference_computer, args, this_week).count(this_week)
+    if num_holding < num_checks:
+        if is_mandatory:
+            this_week.valid = False
 
-                    reval["score"] = 0
-                    reval["failed"].append(section_week.course)
-                    holds.append(0)
-                else:
-                    holds.append(1)
+        reval["score"] = 0
+        reval["failed"] = failed
 
     if not is_mandatory:
-        reval["score"] = get_partial_credit(holds)
+        reval["score"] = partial_credit(num_holding, num_checks)
 
     return reval
 
@@ -461,23 +467,20 @@ def instructor_break_constraint(this_week, args):
     gap_end = args[2]
     is_mandatory = args[3]
 
-    holds = []
     reval = {"score": 1, "failed": []}
 
-    for i in range(len(instructor.courses)): 
-        course = this_week.find_course(instructor.courses[i])[0]
-        if course.end_time <= gap_start or course.start_time >= gap_end: # before or after gap
-            holds.append(1)
-        else:  # in gap, bad
-            if is_mandatory:
-                this_week.valid = False
+    # a check per course, on its first slot: before or after the gap
+    num_holding, num_checks, failed = \
+        unary_table(instructor_break_constraint, args, this_week).count(this_week)
+    if num_holding < num_checks:  # in gap, bad
+        if is_mandatory:
+            this_week.valid = False
 
-            reval["score"] = 0
-            reval["failed"].append(instructor.courses[i])
-            holds.append(0)
+        reval["score"] = 0
+        reval["failed"] = failed
 
     if is_mandatory: # if no fails by here, it passed
-        reval["score"] = get_partial_credit(holds)
+        reval["score"] = partial_credit(num_holding, num_checks)
     
     return reval
 
@@ -524,6 +527,8 @@ def avoid_overlap(this_week, args):
 def avoid_overlap_within_csc(this_week, args):
     """ Avoids overlap between CSC courses that do not
     have each other in their extended list of prereqs
+    Every slot of a course on a day its not-prereq also meets is checked
+    against the not-prereq's first slot; see compiled_prereq_pairs
     IN: the list of args: [list_of_extended_prereq_objects,
                            is_mandatory]
     OUT: if mandatory, sets the week validity and returns 0,
@@ -531,34 +536,104 @@ def avoid_overlap_within_csc(this_week, args):
     """
     prereqs = args[0]
     is_mandatory = args[1]
-    holds = []
     reval = {"score": 1, "failed": []}
+    topology = this_week.topology
+    course_slots = this_week.course_slots
+    num_checks = 0
+    num_holding = 0
+    # course index -> (day mask, start, end of first slot), for this week
+    meets = {}
+
+    for each_course, course_index, other_index, count in \
+            compiled_prereq_pairs(prereqs, this_week):
+        if course_index not in course_slots or other_index not in course_slots:
+            continue
+        if other_index not in meets:
+            other_slots = course_slots[other_index]
+            day_mask = 0
+            for each_index in other_slots:
+                day_mask |= topology.slots[each_index].day_mask
+            first_slot = topology.slots[other_slots[0]]
+            meets[other_index] = (day_mask, first_slot.start_minutes,
+                                  first_slot.end_minutes)
+        day_mask, gap_start, gap_end = meets[other_index]
+        for each_index in course_slots[course_index]:
+            each_slot = topology.slots[each_index]
+            if each_slot.day_mask & day_mask:
+                num_checks += count
+                if each_slot.end_minutes < gap_start or each_slot.start_minutes > gap_end:
+                    num_holding += count
+                else:  # in gap, bad
+                    if is_mandatory:
+                        this_week.valid = False
 
-    for each_prereq in prereqs:
-        for each_course in each_prereq.courses:
-            for each_not_prereq in each_prereq.not_prereqs:
-                slots = this_week.find_course(each_course)
-                other_slots = this_week.find_course(each_not_prereq)
-                for each_slot in slots:
-                    if each_slot.day in [s.day for s in other_slots]:
-                        gap_start = other_slots[0].start_time
-                        gap_end = other_slots[0].end_time
-                        if each_slot.end_time < gap_start or each_slot.start_time > gap_end:
-                            holds.append(1)
-                        else:  # in gap, bad
-			    if is_mandatory:
-				this_week.valid = False
-
-			    reval["score"] = 0
-			    reval["failed"].append(each_course)
-			    holds.append(0)
+                    reval["score"] = 0
+                    reval["failed"].extend([each_course] * count)
 
     if not is_mandatory: # if no fails by here, it passed
-        reval["score"] = get_partial_credit(holds)
-    
+        reval["score"] = partial_credit(num_holding, num_checks)
+
     return reval
 
 
+## Function that compiles prereq objects into pairs of course indices
+#  @param prereqs A list of prereq objects
+#  @param course_ids Dictionary of course code -> course index
+#  @return list of (course, course index, other course index, count)
+def prereq_pairs(prereqs, course_ids):
+    """Every (course, not prereq) pair avoid_overlap_within_csc checks, as
+    course indices, in the order of the prereq objects. A pair listed more
+    than once is kept once with its count. Pairs with a course that is not
+    in course_ids are left out, as find_course finds no slots for them
+    IN: list of prereq objects, dictionary of course code -> index
+    OUT: list of (course object, course index, other course index, count)"""
+    pairs = []
+    position = {}
+    for each_prereq in prereqs:
+        for each_course in each_prereq.courses:
+            course_index = course_ids.get(each_course.code)
+            for each_not_prereq in each_prereq.not_prereqs:
+                other_index = course_ids.get(each_not_prereq.code)
+                if course_index is None or other_index is None:
+                    continue
+                key = (course_index, other_index)
+                if key in position:
+                    each_pair = pairs[position[key]]
+                    pairs[position[key]] = each_pair[:3] + (each_pair[3] + 1,)
+                else:
+                    position[key] = len(pairs)
+                    pairs.append((each_course, course_index, other_index, 1))
+    return pairs
+
+
+## Key of a prereq list that changes when its prereqs' courses change
+#  @param prereqs A list of prereq objects
+#  @return list
+def prereq_signature(prereqs):
+    return [(id(p), map(id, p.courses), map(id, p.not_prereqs)) for p in prereqs]
+
+
+## Function that finds the compiled pairs of a prereq list
+#  @param prereqs A list of prereq objects
+#  @param this_week A week, or anything with topology and course_ids
+#  @return list of (course, course index, other course index, count)
+def compiled_prereq_pairs(prereqs, this_week):
+    """Looks the pairs up among those Scheduler.compile_constraints keeps
+    for the week's topology. A list it has not compiled yet is compiled
+    with prereq_pairs and kept there until the next compile_constraints,
+    which drops the pairs of lists no constraint has. As for unary_table,
+    only compile_constraints checks the list for edits made in place (see
+    prereq_signature)"""
+    topology = this_week.topology
+    compiled = topology.prereq_pairs.get(id(prereqs))
+    if compiled is not None and compiled[0] is prereqs:
+        return compiled[2]
+
+    pairs = prereq_pairs(prereqs, this_week.course_ids)
+    topology.prereq_pairs[id(prereqs)] = (prereqs, prereq_signature(prereqs), pairs)
+    return pairs
+
+
 ## Function that checks if time overlaps 
 #  @param timeslot1 The timeslot1 parameter
 #  @param timeslot2 The timeslot2 parameter
@@ -584,25 +659,32 @@ def is_overlap(timeslot1, timeslot2):
 #  @return 1 or 0
 def no_overlapping_courses(this_week, args):
     """Check that all timeslots do not overlap any other
-    timeslots"""
+    timeslots
+    Filled slots are grouped by day and room and sorted by start time;
+    a slot overlaps an earlier one in its group if it starts before the
+    latest end so far, or at the same time as the one before it"""
     reval = {"score": 1, "failed": []}
-    times = []
-    count = 0
-
-    all_time_slots = this_week.list_time_slots()
-    for each_timeslot in all_time_slots:
-        if each_timeslot.course != None:
-            times.append(each_timeslot)
-
-    while len(times) > 0:
-        each_time = times.pop(0)
-        for each_other_time in times:
-            if each_time.day != each_other_time.day or \
-               each_time.room != each_other_time.room :
-                continue
-            if is_overlap(each_time, each_other_time):
+    topology = this_week.topology
+    num_rooms = len(topology.rooms)
+
+    groups = {}
+    for each_slots in this_week.course_slots.itervalues():
+        for each_index in each_slots:
+            slot_info = topology.slots[each_index]
+            key = slot_info.day_index * num_rooms + slot_info.room_index
+            groups.setdefault(key, []).append((slot_info.start_minutes,
+                                               slot_info.end_minutes))
+
+    for each_group in groups.itervalues():
+        each_group.sort()
+        latest_end = each_group[0][1]
+        for i in range(1, len(each_group)):
+            start, end = each_group[i]
+            if start < latest_end or start == each_group[i - 1][0]:
                 this_week.valid = False
-                reval["score"] = 0 
+                reval["score"] = 0
+                return reval
+            latest_end = max(latest_end, end)
 
     return reval
 
@@ -613,36 +695,14 @@ def no_overlapping_courses(this_week, args):
 #  @return 0 or 1
 def num_subsequent_courses(this_week, args):
     """An instructor may not have more than 2 courses back-to-back
+    See instructor_timeline_flags.
     Args should be [list_of_instructors]"""
     reval = {"score": 1, "failed": []}
     instructors = args[0]
     for instructor in instructors:
-        instructor_slots = []
-        count = 0
-        for section in this_week.sections:
-            if section.instructor == instructor:
-                instructor_slots.append(section)
-        for i in range(len(instructor_slots) - 2): #first in combination
-            section1 = instructor_slots[i]
-            days1 = [day.day_code for day in section1.days]
-            for j in range(i + 1, len(instructor_slots) - 1): #second in combination
-                section2 = instructor_slots[j]
-                days2 = [day.day_code for day in section2.days]
-                for k in range(j + 1, len(instructor_slots)): #third in combination
-                    section3 = instructor_slots[k]
-                    days3 = [day.day_code for day in section3.days]
-                    all_days = [days1, days2, days3]
-                    if len(set(all_days[0]).intersection(*all_days[1:])) > 0: #sections day overlap
-                        compare_1_2 = times_are_sequential(section1.time_slots[0],
-                                                           section2.time_slots[0])
-                        compare_2_3 = times_are_sequential(section2.time_slots[0],
-                                                           section3.time_slots[0])
-                        compare_1_3 = times_are_sequential(section1.time_slots[0],
-                                                           section3.time_slots[0])
-                        if (compare_1_2 and compare_2_3) or (compare_1_3 and compare_2_3) or \
-                           (compare_1_3 and compare_1_2): #if have 3 subsequent courses
-                            this_week.valid = False
-                            reval["score"] = 0
+        if instructor_timeline_flags(this_week, instructor)[2]:
+            this_week.valid = False
+            reval["score"] = 0
     return reval
 
 
@@ -728,57 +788,85 @@ def contains(bound_start, bound_end, start, end):
 def rooms_avail_for_all_courses(this_week, args):
     """Args should have the is mandatory.
     rooms_avail should take {<room.full_name> [('-'|'+', <days>, <start>, <end>),...], ... }
+    The statements are compiled per slot by the scheduler (see
+    compile_rooms_avail), so this adds up the filled slots' results
     """
-    rooms_avail = this_week.info("Schedule").rooms_avail
+    holding, failing, forbidden = this_week.info("Schedule").room_avail_table()
     is_mandatory = args[0]
 
-    holds = []
     reval = {"failed": [], "score": 1}
+    num_holding = 0
+    num_failing = 0
+    for each_slots in this_week.course_slots.itervalues():
+        for each_index in each_slots:
+            num_holding += holding[each_index]
+            num_failing += failing[each_index]
+
+    for each_index in forbidden:
+        course = this_week.course_at(each_index)
+        if course is not None:
+            if is_mandatory:
+                this_week.valid = False
+
+            reval["score"] = 0
+            if course not in reval["failed"]:
+                reval["failed"].append(course)
+
+    if not is_mandatory: # if no fails by here, it passed
+        reval["score"] = partial_credit(num_holding, num_holding + num_failing)
+
+    return reval
+
 
-    for each_time_slot in this_week.list_time_slots():
-        if each_time_slot.course != None:
-            if not rooms_avail.has_key(each_time_slot.room.full_name):
-                holds.append(1)
+## Function that compiles room availability into per slot results
+#  @param rooms_avail Dictionary of room full name -> list of statements
+#  @param topology The topology of the weeks' slots
+#  @return (holding counts, failing counts, forbidden slot indices)
+def compile_rooms_avail(rooms_avail, topology):
+    """Works out for every slot what rooms_avail_for_all_courses counts
+    when a course is in it: a hold for a room without statements, and per
+    statement of the room a hold if it is for another day, a hold for the
+    first '+' statement containing the slot, and a fail for every '-'
+    statement containing it. A slot with a fail is forbidden
+    IN: dictionary of room full name -> [('-'|'+', days, 'hh:mm', 'hh:mm'), ...],
+        topology object
+    OUT: (list of holds per slot, list of fails per slot,
+          sorted list of forbidden slot indices)"""
+    # statement times as minutes
+    avail_minutes = {}
+    for room_name in rooms_avail:
+        avail_minutes[room_name] = [(each_statement[0], each_statement[1],
+                                     get_minutes_from_string(each_statement[2]),
+                                     get_minutes_from_string(each_statement[3]))
+                                    for each_statement in rooms_avail[room_name]]
+
+    holding = [0] * topology.num_slots
+    failing = [0] * topology.num_slots
+    for slot_info in topology.slots:
+        room_name = topology.room_names[slot_info.room_index]
+        if not avail_minutes.has_key(room_name):
+            holding[slot_info.index] = 1
+            continue
+
+        positive_containing_found = False
+        for each_statement in avail_minutes[room_name]:
+            if slot_info.day not in each_statement[1]:
+                holding[slot_info.index] += 1
                 continue
-			
-            this_room_avail = rooms_avail[each_time_slot.room.full_name]
-            positive_containing_found = False
-            negative_containing_found = False
-            total_positive = len([s for s in this_room_avail if s[0] == '+'])
-            for each_statement in this_room_avail:
-                if each_time_slot.day not in each_statement[1]:
-                    holds.append(1)
-                    continue
-                    
-                start = map(int, each_statement[2].split(':'))
-                end = map(int, each_statement[3].split(':'))
-			    # each_statement[0] is '-'|'+', [1] is days, [2] is start, [3] is end
+
+            # each_statement[0] is '-'|'+', [1] is days, [2] is start, [3] is end
+            if contains(each_statement[2], each_statement[3],
+                        slot_info.start_minutes, slot_info.end_minutes):
                 if each_statement[0] == '+' and not positive_containing_found:
-                    if contains(time(start[0], start[1]), time(end[0], end[1]),
-                                each_time_slot.start_time, each_time_slot.end_time):							
-                        positive_containing_found = True
-                        holds.append(1)
-				
+                    positive_containing_found = True
+                    holding[slot_info.index] += 1
                 if each_statement[0] == '-':
-                    if contains(time(start[0], start[1]), time(end[0], end[1]),
-                                each_time_slot.start_time, each_time_slot.end_time):
-                        if is_mandatory:
-                            this_week.valid = False
-
-                        reval["score"] = 0
-                        negative_containing_found = True
-                        holds.append(0)
-
-            if negative_containing_found:
-                if each_time_slot.course not in reval["failed"]:
-                    reval["failed"].append(each_time_slot.course)
-	
-    if not is_mandatory: # if no fails by here, it passed
-        reval["score"] = get_partial_credit(holds)
+                    failing[slot_info.index] += 1
+
+    forbidden = [i for i in range(topology.num_slots) if failing[i] > 0]
+    return holding, failing, forbidden
 
-    return reval
 
-	
 ## Function that counts the number of true values in a list and returns the partial credit 
 #  @param results_list The results_list parameter
 #  @return partial_weight.
@@ -793,11 +881,23 @@ def get_partial_credit(results_list):
         if value == True:
                 count += 1
 
+    return partial_credit(count, len(results_list))
+
+
+## Function that gives the partial credit for a number of holds out of a number of checks
+#  @param num_holding The number of checks that held
+#  @param num_checks The number of checks
+#  @return partial_weight.
+def partial_credit(num_holding, num_checks):
+    """ As get_partial_credit, for constraints that count instead of
+        building a list
+        IN: number of true values, number of values
+        OUT: a decimal (percentage) of the true values, to one place. """
     #avoid dividing by zero; shouldn't happen if constraint is set up right
-    if len(results_list) == 0:
+    if num_checks == 0:
         return 0
-     
-    count = float(count)/len(results_list)
+
+    count = float(num_holding)/num_checks
     partial_weight = round(count, 1)
 
     return partial_weight
@@ -828,39 +928,135 @@ def course_sections_at_different_times(this_week, arg):
     such as CSC 130 001 or 002, are not scheduled at the same time.
     NOTE: this should work for both section numbers and lab sections denoted by
     letters.
+    Two sections clash if their first slots start at the same time and they
+    meet on a common day (in any room). The sections are grouped once, see
+    group_sections; unscheduled sections cannot clash
     IN: the list of all courses
     OUT: Returns 0 and adjusts week.valid as necessary
     """
     reval = {"score": 1, "failed": []}
 
     course_list = arg[0]
-    for i in range(len(course_list)):
-        i_code = course_list[i].code.split(' ')  # ['csc', '130', '001']
-        course_i_base_code = i_code[0] + i_code[1] # 'csc130'
-        for j in range(i + 1, len(course_list)):
-            j_code = course_list[j].code.split(' ')
-            course_j_base_code = j_code[0] + j_code[1]
-            if course_i_base_code == course_j_base_code:
-                # same base course, different sections, so pull time slots
-                course_i_time = this_week.find_course(course_list[i])[0].start_time
-                course_j_time = this_week.find_course(course_list[j])[0].start_time
-                if course_i_time == course_j_time:
-                    # check the day codes to be sure it's not MWF at 9 and TR at 9
-                    course_i_days = this_week.find_section(course_list[i].code).days
-                    course_j_days = this_week.find_section(course_list[j].code).days
-                    days_in_common = list(set(course_i_days) & set(course_j_days)) # intersection of lists
-                    if len(days_in_common) > 0:  # at least one day in common
-                        this_week.valid = False
-                        reval["score"] = 0
+    if course_list is this_week.courses:
+        groups = this_week.section_groups
+    else:
+        groups = group_sections(course_list, this_week.course_ids)
+    topology = this_week.topology
+    course_slots = this_week.course_slots
+    for each_group in groups:
+        # start minutes -> days taken by the group's sections at that time
+        days_at_start = {}
+        for each_course_index in each_group:
+            if each_course_index not in course_slots:
+                continue
+            slot_indices = course_slots[each_course_index]
+            start = topology.slots[slot_indices[0]].start_minutes
+            day_mask = 0
+            for each_index in slot_indices:
+                day_mask |= topology.slots[each_index].day_mask
+            if days_at_start.get(start, 0) & day_mask:
+                this_week.valid = False
+                reval["score"] = 0
+                return reval
+            days_at_start[start] = days_at_start.get(start, 0) | day_mask
 
     # no same course/different section at the same time - week is valid
     return reval
 
+
+## Function that groups the sections of each course
+#  @param courses A list of course objects
+#  @param course_ids Dictionary of course code -> course index
+#  @return list of lists of course indices
+def group_sections(courses, course_ids):
+    """Groups courses by absolute course (CSC 130 001 and CSC 130 A are
+    both CSC130), keeping only groups of two or more sections
+    IN: list of course objects, dictionary of course code -> course index
+    OUT: list of lists of course indices, in the order of courses"""
+    groups = []
+    group_of = {}
+    for each_course in courses:
+        course_index = course_ids.get(each_course.code)
+        if course_index is None:
+            continue
+        if each_course.absolute_course not in group_of:
+            group_of[each_course.absolute_course] = len(groups)
+            groups.append([])
+        groups[group_of[each_course.absolute_course]].append(course_index)
+    return [each_group for each_group in groups if len(each_group) > 1]
+
+class ConstraintScope:
+
+    """The part of a week a constraint reads: the course codes, instructor
+    names and room full names it depends on, or everything if is_global.
+    Courses, instructors and rooms may be given as objects or names"""
+
+    def __init__(self, courses = [], instructors = [], rooms = [], is_global = False):
+        self.courses = set([getattr(c, "code", c) for c in courses])
+        self.instructors = set([getattr(i, "name", i) for i in instructors])
+        self.rooms = set([getattr(r, "full_name", r) for r in rooms])
+        self.is_global = is_global
+
+    def __str__(self):
+        if self.is_global:
+            return "global"
+        return "courses: " + ", ".join(sorted(self.courses)) + \
+               "; instructors: " + ", ".join(sorted(self.instructors)) + \
+               "; rooms: " + ", ".join(sorted(self.rooms))
+
+
+class ConstraintScopeIndex:
+
+    """Inverted index from course code, instructor name and room name to
+    the positions of the constraints (in the given list) that depend on them"""
+
+    def __init__(self, constraints):
+        self.constraints = list(constraints)
+        self.global_constraints = []
+        self.by_course = {}
+        self.by_instructor = {}
+        self.by_room = {}
+        for i in range(len(self.constraints)):
+            scope = self.constraints[i].scope
+            if scope.is_global:
+                self.global_constraints.append(i)
+                continue
+            for code in scope.courses:
+                self.by_course.setdefault(code, []).append(i)
+            for name in scope.instructors:
+                self.by_instructor.setdefault(name, []).append(i)
+            for room in scope.rooms:
+                self.by_room.setdefault(room, []).append(i)
+
+    def matches(self, constraints):
+        """True if this index was built from exactly these constraints"""
+        if len(constraints) != len(self.constraints):
+            return False
+        for i in range(len(constraints)):
+            if constraints[i] is not self.constraints[i]:
+                return False
+        return True
+
+    def affected(self, courses = [], instructors = [], rooms = []):
+        """Positions, in order, of the global constraints and of those that
+        depend on any of the given course codes, instructor names or rooms"""
+        found = set(self.global_constraints)
+        for code in courses:
+            found.update(self.by_course.get(code, []))
+        for name in instructors:
+            found.update(self.by_instructor.get(name, []))
+        for room in rooms:
+            found.update(self.by_room.get(room, []))
+        return sorted(found)
+
+
 class Constraint:
 
-    def __init__(self, name, weight, func, args = [], universal = False):
+    def __init__(self, name, weight, func, args = [], universal = False, scope = None):
         """universal constraints: added automatically, not by user
-        not universal: made by user in default_constraints.yaml or in GUI"""
+        not universal: made by user in default_constraints.yaml or in GUI
+        scope: ConstraintScope of what the constraint reads; if not given,
+        it is taken from the declaration for func, or worked out from args"""
         if type(name) is not str:
             raise ConstraintCreationError("Name is not a string")
 
@@ -875,6 +1071,9 @@ class Constraint:
         self.args = args
         self.func = func
         self.universal = universal
+        if scope is None:
+            scope = default_scope(func, args)
+        self.scope = scope
 
     def get_fitness(self, this_week):
         #fitness score
@@ -884,3 +1083,299 @@ class Constraint:
 
         return reval
 
+
+## Scope of a constraint that reads some instructors
+#  @param instructors A list of instructor objects
+#  @return ConstraintScope
+def instructor_scope(instructors):
+    """Instructor constraints read the instructors' courses, found either
+    through instructor.courses or through each section's instructor"""
+    courses = []
+    for each_instructor in instructors:
+        courses.extend(each_instructor.courses)
+    return ConstraintScope(courses = courses, instructors = instructors)
+
+
+## Scope of the prereq overlap constraint
+#  @param prereqs A list of prereq objects
+#  @return ConstraintScope
+def prereq_scope(prereqs):
+    """avoid_overlap_within_csc reads each prereq's courses and not_prereqs"""
+    courses = []
+    for each_prereq in prereqs:
+        courses.extend(each_prereq.courses)
+        courses.extend(each_prereq.not_prereqs)
+    return ConstraintScope(courses = courses)
+
+
+# what each constraint function reads, from its args; used when a
+# constraint is made without an explicit scope (built in, YAML or GUI)
+SCOPE_DECLARATIONS = {
+    all_before_time: lambda args: ConstraintScope(courses = args[0]),
+    all_after_time: lambda args: ConstraintScope(courses = args[0]),
+    course_before_time: lambda args: ConstraintScope(courses = [args[0]]),
+    course_after_time: lambda args: ConstraintScope(courses = [args[0]]),
+    lab_on_tr: lambda args: ConstraintScope(courses = args[0]),
+    instructor_time_pref_before: lambda args: instructor_scope([args[0]]),
+    instructor_time_pref_after: lambda args: instructor_scope([args[0]]),
+    instructor_conflict: lambda args: instructor_scope(args[0]),
+    sequential_time_different_building_conflict: lambda args: instructor_scope(args[0]),
+    instructor_preference_day: lambda args: instructor_scope([args[0]]),
+    partial_schedule_day: lambda args: ConstraintScope(courses = [args[0]]),
+    partial_schedule_room: lambda args: ConstraintScope(courses = [args[0]]),
+    instructor_preference_computer: lambda args: instructor_scope([args[0]]),
+    instructor_break_constraint: lambda args: instructor_scope([args[0]]),
+    avoid_overlap: lambda args: ConstraintScope(courses = args[0]),
+    avoid_overlap_within_csc: lambda args: prereq_scope(args[0]),
+    no_overlapping_courses: lambda args: ConstraintScope(is_global = True),
+    num_subsequent_courses: lambda args: instructor_scope(args[0]),
+    ensure_course_room_capacity: lambda args: ConstraintScope(is_global = True),
+    ensure_computer_requirement: lambda args: ConstraintScope(is_global = True),
+    instructor_max_courses: lambda args: instructor_scope([args[0]]),
+    rooms_avail_for_all_courses: lambda args: ConstraintScope(is_global = True),
+    course_sections_at_different_times: lambda args: ConstraintScope(courses = args[0]),
+}
+
+
+## Works out the scope of a constraint
+#  @param func The constraint function
+#  @param args The args parameter
+#  @return ConstraintScope
+def default_scope(func, args):
+    """Uses the declaration for func if there is one; otherwise collects the
+    courses, instructors and prereqs found in args, and treats a constraint
+    whose args name none of them as global"""
+    if func in SCOPE_DECLARATIONS:
+        try:
+            return SCOPE_DECLARATIONS[func](args)
+        except (IndexError, TypeError, AttributeError):
+            return ConstraintScope(is_global = True)
+
+    courses = []
+    instructors = []
+    pending = [args]
+    seen = set()
+    while len(pending) > 0:
+        each_arg = pending.pop()
+        if id(each_arg) in seen:
+            continue
+        seen.add(id(each_arg))
+        if isinstance(each_arg, (list, tuple)):
+            pending.extend(each_arg)
+        elif isinstance(each_arg, dict):
+            pending.extend(each_arg.values())
+        elif isinstance(each_arg, Course):
+            courses.append(each_arg)
+        elif isinstance(each_arg, Instructor):
+            instructors.append(each_arg)
+            pending.extend(each_arg.courses)
+        elif isinstance(each_arg, Prereq):
+            pending.extend([each_arg.courses, each_arg.prereqs, each_arg.not_prereqs])
+
+    if len(courses) == 0 and len(instructors) == 0:
+        return ConstraintScope(is_global = True)
+    return ConstraintScope(courses = courses, instructors = instructors)
+
+
+class UnaryTable:
+
+    """A unary constraint compiled for one topology and list of courses:
+    the checks it makes on each course, each as a list per slot index of
+    1 if the check holds with the course in that slot, else 0. A check is
+    made on the course's first slot only, as the constraints reading
+    find_course(course)[0] or section.room do, or on each of its slots.
+    Scoring a week is then one lookup per course and checked slot"""
+
+    def __init__(self, is_mandatory):
+        self.is_mandatory = is_mandatory
+        # (course, course index, first slot only, holds per slot index)
+        self.entries = []
+
+    def add(self, course, course_ids, first_only, holds):
+        """Adds a check on a course; courses not in course_ids have no
+        slots to check and are left out"""
+        course_index = course_ids.get(course.code)
+        if course_index is not None:
+            self.entries.append((course, course_index, first_only, holds))
+
+    ## Counts the checks of a week
+    #  @param self
+    #  @param this_week A week object
+    #  @return (number holding, number of checks, failed courses)
+    def count(self, this_week):
+        """Counts the checks, in the order they were added, against the
+        week's assignment. A course is listed in failed once per failing
+        check; an unscheduled course has no checks
+        IN: week object
+        OUT: (int, int, list of course objects)"""
+        num_holding = 0
+        num_checks = 0
+        failed = []
+        course_slots = this_week.course_slots
+        for course, course_index, first_only, holds in self.entries:
+            each_slots = course_slots.get(course_index)
+            if not each_slots:
+                continue
+            if first_only:
+                each_slots = each_slots[:1]
+            for each_index in each_slots:
+                num_checks += 1
+                if holds[each_index]:
+                    num_holding += 1
+                else:
+                    failed.append(course)
+        return num_holding, num_checks, failed
+
+
+## Key of a constraint's args that changes when what they name changes
+#  @param arg The args parameter, or one of its items
+#  @return hashable value
+def args_key(arg):
+    """Courses are keyed by code and instructors by name and course codes,
+    so args edited in place get a different key; see
+    Scheduler.compile_constraints"""
+    if isinstance(arg, (list, tuple)):
+        return tuple([args_key(each_arg) for each_arg in arg])
+    if isinstance(arg, Course):
+        return ("course", arg.code)
+    if isinstance(arg, Instructor):
+        return ("instructor", arg.name, tuple([c.code for c in arg.courses]))
+    return arg
+
+
+## Function that finds the compiled table of a unary constraint
+#  @param func The constraint function
+#  @param args The args parameter
+#  @param this_week A week, or anything with topology, courses and course_ids
+#  @return UnaryTable
+def unary_table(func, args, this_week):
+    """Looks the table up among those Scheduler.compile_constraints keeps
+    for the week's topology. Args it has not compiled yet are compiled
+    with UNARY_COMPILERS[func] and kept there until the next
+    compile_constraints, which drops the tables of args no constraint has.
+    Args are taken as they were when compiled: only compile_constraints
+    checks them for edits made in place (see args_key)
+    IN: constraint function, args, week object
+    OUT: UnaryTable object"""
+    topology = this_week.topology
+    compiled = topology.unary_tables.get(id(args))
+    if compiled is not None and compiled[0] is args and compiled[1] is func:
+        return compiled[3]
+
+    table = UNARY_COMPILERS[func](args, topology, this_week.courses, this_week.course_ids)
+    topology.unary_tables[id(args)] = (args, func, args_key(args), table)
+    return table
+
+
+## Function that works out a check for every slot
+#  @param topology The topology of the weeks' slots
+#  @param check Function of a slot info object giving True if the check holds
+#  @return list of 1/0 per slot index
+def slot_holds(topology, check):
+    return [1 if check(slot_info) else 0 for slot_info in topology.slots]
+
+
+def compile_time_bound(courses, is_mandatory, check, topology, course_ids):
+    """The checks of the time constraints: one per course on its first slot"""
+    table = UnaryTable(is_mandatory)
+    holds = slot_holds(topology, check)
+    for each_course in courses:
+        table.add(each_course, course_ids, True, holds)
+    return table
+
+
+def compile_course_before_time(args, topology, courses, course_ids):
+    return compile_time_bound([args[0]], len(args) > 2 and args[2],
+                              lambda s: s.end_time < args[1], topology, course_ids)
+
+
+def compile_course_after_time(args, topology, courses, course_ids):
+    return compile_time_bound([args[0]], len(args) > 2 and args[2],
+                              lambda s: s.start_time >= args[1], topology, course_ids)
+
+
+def compile_all_before_time(args, topology, courses, course_ids):
+    return compile_time_bound(args[0], args[2],
+                              lambda s: s.end_time < args[1], topology, course_ids)
+
+
+def compile_all_after_time(args, topology, courses, course_ids):
+    return compile_time_bound(args[0], args[2],
+                              lambda s: s.start_time >= args[1], topology, course_ids)
+
+
+def compile_lab_on_tr(args, topology, courses, course_ids):
+    return compile_time_bound(args[0], True, lambda s: s.isTR, topology, course_ids)
+
+
+def compile_instructor_time_pref_before(args, topology, courses, course_ids):
+    return compile_time_bound(args[0].courses, args[2],
+                              lambda s: not s.end_time > args[1], topology, course_ids)
+
+
+def compile_instructor_time_pref_after(args, topology, courses, course_ids):
+    return compile_time_bound(args[0].courses, args[2],
+                              lambda s: not s.start_time < args[1], topology, course_ids)
+
+
+def compile_instructor_break_constraint(args, topology, courses, course_ids):
+    return compile_time_bound(args[0].courses, args[3],
+                              lambda s: s.end_time <= args[1] or s.start_time >= args[2],
+                              topology, course_ids)
+
+
+def compile_partial_schedule_day(args, topology, courses, course_ids):
+    table = UnaryTable(args[2])
+    table.add(args[0], course_ids, False,
+              slot_holds(topology, lambda s: s.day in args[1]))
+    return table
+
+
+def compile_partial_schedule_room(args, topology, courses, course_ids):
+    table = UnaryTable(args[2])
+    room_holds = [(room[0] + " " + room[1]) in args[1] for room in topology.rooms]
+    table.add(args[0], course_ids, False,
+              slot_holds(topology, lambda s: room_holds[s.room_index]))
+    return table
+
+
+def compile_instructor_preference_day(args, topology, courses, course_ids):
+    """Sections are checked in the order of the scheduler's courses"""
+    table = UnaryTable(args[2])
+    holds = slot_holds(topology, lambda s: s.day in args[1])
+    for each_course in courses:
+        if each_course.instructor.name == args[0].name:
+            table.add(each_course, course_ids, False, holds)
+    return table
+
+
+def compile_instructor_preference_computer(args, topology, courses, course_ids):
+    """Only courses that do not need computers are checked"""
+    table = UnaryTable(args[2])
+    if args[1] == True:
+        room_holds = [not room[3] == False for room in topology.rooms]
+    else:
+        room_holds = [not room[3] == True for room in topology.rooms]
+    holds = slot_holds(topology, lambda s: room_holds[s.room_index])
+    for each_course in courses:
+        if each_course.instructor.name == args[0].name and not each_course.needs_computers:
+            table.add(each_course, course_ids, True, holds)
+    return table
+
+
+# the constraints that only read where each course is, and how to compile
+# their args into a UnaryTable (args, topology, courses, course ids)
+UNARY_COMPILERS = {
+    all_before_time: compile_all_before_time,
+    all_after_time: compile_all_after_time,
+    course_before_time: compile_course_before_time,
+    course_after_time: compile_course_after_time,
+    lab_on_tr: compile_lab_on_tr,
+    instructor_time_pref_before: compile_instructor_time_pref_before,
+    instructor_time_pref_after: compile_instructor_time_pref_after,
+    instructor_preference_day: compile_instructor_preference_day,
+    partial_schedule_day: compile_partial_schedule_day,
+    partial_schedule_room: compile_partial_schedule_room,
+    instructor_preference_computer: compile_instructor_preference_computer,
+    instructor_break_constraint: compile_instructor_break_constraint,
+}
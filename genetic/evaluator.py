@@ -0,0 +1,182 @@
+from __future__ import print_function
+from structures import *
+from constraint import ConstraintScopeIndex
+
+
+## Name of the instructor of a course
+#  @param course A course object
+#  @return name string
+def instructor_name(course):
+    """Courses hold either an instructor object or a plain name"""
+    return getattr(course.instructor, "name", course.instructor)
+
+
+class IncrementalFitness:
+
+    """Keeps the result of every constraint for one week, so that after a
+    single course moves only the constraints whose scope covers that
+    course, its instructor or the rooms it left and entered are run again.
+    Fitness, valid and num_valid always come out exactly as
+    Scheduler.calc_fitness gives them for the week with valid reset.
+    The constraints and room availability are read once; build a new
+    evaluator after changing either"""
+
+    def __init__(self, this_scheduler, this_week):
+        self.scheduler = this_scheduler
+        self.week = this_week
+        self.constraints = list(this_scheduler.constraints)
+        self.index = ConstraintScopeIndex(self.constraints)
+        # per constraint: (reval, week stayed valid, exception raised)
+        self.results = []
+        self.last_move = None
+        if len(this_week.sections) == 0:
+            this_week.update_sections(this_scheduler.courses)
+        for i in range(len(self.constraints)):
+            self.results.append(self.evaluate(i))
+        self.apply()
+
+    ## Runs one constraint on the week
+    #  @param self
+    #  @param i Index of the constraint
+    #  @return (reval, stays_valid, error)
+    def evaluate(self, i):
+        """Runs constraint i on its own, as if it were the first one"""
+        self.week.valid = True
+        try:
+            reval = self.constraints[i].get_fitness(self.week)
+        except Exception as error:
+            # only raised if calc_fitness would have reached this constraint
+            return (None, False, error)
+        return (reval, self.week.valid, None)
+
+    ## Gives the stored result of one constraint
+    #  @param self
+    #  @param i Index of the constraint
+    #  @return reval of the constraint
+    def result(self, i):
+        """Returns what get_fitness of constraint i gives for the week now"""
+        reval, stays_valid, error = self.results[i]
+        if error is not None:
+            raise error
+        return reval
+
+    ## Combines the stored constraint results into the week's fitness
+    #  @param self
+    #  @return fitness of the week
+    def apply(self):
+        """Adds up the results in the order calc_fitness uses, stopping at
+        the first constraint that made the week invalid"""
+        total_fitness = 0
+        number_valid = 0
+        self.week.valid = True
+        if self.index.matches(self.scheduler.constraints):
+            order = self.scheduler.constraint_order()
+        else:
+            order = range(len(self.constraints))
+        for i in order:
+            each_constraint = self.constraints[i]
+            reval, stays_valid, error = self.results[i]
+            if error is not None:
+                raise error
+            if not stays_valid:
+                self.week.valid = False
+                break
+            self.week.constraints[each_constraint.name] = [reval["score"],
+                    each_constraint.weight if each_constraint.weight != 0 else 1]
+            if each_constraint.weight == 0:
+                number_valid += reval["score"]
+            else:
+                total_fitness += reval["score"]
+
+        self.week.fitness = total_fitness
+        self.week.num_valid = number_valid
+        return total_fitness
+
+    ## Finds the constraints that can see a course
+    #  @param self
+    #  @param course A course object
+    #  @param rooms List of room full names the course was or is in
+    #  @return list of constraint indices
+    def affected_by(self, course, rooms = []):
+        """Global constraints, and those depending on the course, its
+        instructor or the rooms"""
+        return self.index.affected([course.code], [instructor_name(course)], rooms)
+
+    ## Full names of the rooms a course is in
+    #  @param self
+    #  @param course A course object
+    #  @return list of room names
+    def rooms_of(self, course):
+        """Room names of the course's current slots in the week"""
+        topology = self.week.topology
+        return list(set([topology.room_names[topology.slots[i].room_index]
+                         for i in self.week.find_course_indices(course)]))
+
+    ## Re-runs the constraints that can see a course
+    #  @param self
+    #  @param course A course object
+    #  @return dictionary of the replaced results by constraint index
+    def reevaluate(self, course):
+        """Rebuilds the section of course and re-runs the constraints that
+        can see it, keeping the old results so a move can be undone"""
+        rooms = self.rooms_of(course)
+        old_section = self.week.find_section(course.code)
+        if old_section is not None and old_section.room is not None:
+            rooms.append(old_section.room.full_name)
+        self.week.update_section(course)
+        old_results = {}
+        for i in self.affected_by(course, rooms):
+            old_results[i] = self.results[i]
+            self.results[i] = self.evaluate(i)
+        return old_results
+
+    ## Updates the fitness after one course was moved in the week
+    #  @param self
+    #  @param course A course object
+    #  @return fitness of the week
+    def course_moved(self, course):
+        """Call after changing the slots of course in the week by any means"""
+        self.reevaluate(course)
+        self.last_move = None
+        return self.apply()
+
+    ## Moves one course to new slots and updates the fitness
+    #  @param self
+    #  @param course A course object
+    #  @param slot_indices List of slot indices for the course
+    #  @return fitness of the week
+    def move_course(self, course, slot_indices):
+        """Unschedules course and puts it in slot_indices; the move can be
+        taken back once with undo"""
+        old_indices = self.week.find_course_indices(course)
+        self.place(course, slot_indices)
+        old_results = self.reevaluate(course)
+        self.last_move = (course, old_indices, old_results)
+        return self.apply()
+
+    ## Takes back the last move_course
+    #  @param self
+    #  @return fitness of the week
+    def undo(self):
+        """Puts the last moved course back and restores the stored results"""
+        if self.last_move is None:
+            return self.week.fitness
+        course, old_indices, old_results = self.last_move
+        self.last_move = None
+        self.place(course, old_indices)
+        self.week.update_section(course)
+        for i in old_results:
+            self.results[i] = old_results[i]
+        return self.apply()
+
+    ## Writes a course into the given slots
+    #  @param self
+    #  @param course A course object
+    #  @param slot_indices List of slot indices for the course
+    #  @return none
+    def place(self, course, slot_indices):
+        """Writes course into exactly slot_indices of the week"""
+        course_index = self.week.course_id(course)
+        self.week.unschedule_course(course)
+        for each_index in slot_indices:
+            self.week.set_slot(each_index, course_index)
@@ -0,0 +1,199 @@
+from __future__ import print_function
+from structures import *
+from pool import init_worker, encode_week, decode_week
+from Queue import Empty
+from time import time as now
+import multiprocessing
+import random
+import pool
+
+
+## Runs one island of the island model, in its own process
+#  @param state The parts of the scheduler the island needs; see pool.init_worker
+#  @param settings Dictionary of the scheduler's settings and the island's
+#  @param inbox Queue the island's migrants arrive on
+#  @param outbox Queue of the next island's migrants
+#  @param messages Queue of the progress and results sent to IslandModel.run
+#  @return none
+def run_island(state, settings, inbox, outbox, messages):
+    """Runs the loop of Scheduler.evolution_loop on a population of its
+    own until the time is up or its top weeks reach the maximum fitness.
+    Every MIGRATION_INTERVAL generations it sends copies of its best valid
+    weeks to the next island and takes in the ones sent to it. Sends
+    ("progress", island, generation, seconds, best fitness, valid weeks,
+    migrants taken) after each generation and ("done", island, genomes of
+    the weeks it ends with) at the end"""
+    init_worker(state)
+    this_scheduler = pool.worker_scheduler
+    island = settings["island"]
+    this_scheduler.seeding = settings["seeding"]
+    this_scheduler.room_matching = settings["room_matching"]
+    this_scheduler.constructive_seed = settings["constructive_seed"]
+    for name in ["selection", "population_size", "num_elites", "num_offspring", "num_random"]:
+        setattr(this_scheduler, name, settings[name])
+    this_scheduler.max_fitness = sum([c.weight for c in this_scheduler.constraints])
+    # migrants left in the queue must not keep this process from ending
+    outbox.cancel_join_thread()
+    random.seed(settings["seed"])
+
+    weeks_to_keep = IslandModel.WEEKS_TO_KEEP
+    start_time = now()
+    total_iterations = 0
+    generation = 0
+    migrants_taken = 0
+    this_scheduler.weeks = []
+    while True:
+        this_scheduler.weeks = filter(lambda x: x.complete, this_scheduler.weeks)
+        this_scheduler.weeks = this_scheduler.deduplicate_weeks(this_scheduler.weeks)
+        this_scheduler.calc_fitness_batch(this_scheduler.weeks)
+
+        if len(this_scheduler.weeks) == 0 or \
+           (len(filter(lambda x: x.valid, this_scheduler.weeks)) == 0 and total_iterations < 9):
+            this_scheduler.regenerate_population()
+            total_iterations += 1
+            if now() - start_time > settings["seconds"]:
+                this_scheduler.calc_fitness_batch(this_scheduler.weeks)
+                break
+            continue
+
+        valid_weeks = this_scheduler.select_survivors()
+        generation += 1
+        messages.put(("progress", island, generation, now() - start_time,
+                      max([w.fitness for w in this_scheduler.weeks]), len(valid_weeks),
+                      migrants_taken))
+        if now() - start_time > settings["seconds"]:
+            break
+
+        this_scheduler.mutate_if_converged()
+        if len(this_scheduler.weeks) >= weeks_to_keep and len(valid_weeks) >= weeks_to_keep and \
+           min(w.fitness for w in this_scheduler.weeks[0:weeks_to_keep]) == this_scheduler.max_fitness:
+            break
+
+        if generation % settings["migration_interval"] == 0:
+            outbox.put([encode_week(w) for w in valid_weeks[:settings["num_migrants"]]])
+            while True:
+                try:
+                    genomes = inbox.get_nowait()
+                except Empty:
+                    break
+                for each_genome in genomes:
+                    this_scheduler.weeks.append(decode_week(this_scheduler, each_genome))
+                migrants_taken += len(genomes)
+
+        this_scheduler.generate_starting_population(this_scheduler.num_random)
+        this_scheduler.calc_fitness_batch(this_scheduler.weeks)
+        this_scheduler.breed_population()
+        total_iterations += 1
+
+    messages.put(("done", island, [encode_week(w) for w in this_scheduler.weeks]))
+
+
+class IslandModel:
+
+    """Runs the genetic algorithm on several populations at once, each in
+    its own process (see run_island), joined in a ring: every
+    MIGRATION_INTERVAL generations an island sends copies of its
+    NUM_MIGRANTS best valid weeks to the next one. The islands keep
+    apart, so one population converging does not stop the others finding
+    better weeks, while migration still spreads the good ones"""
+
+    # top weeks that must all be valid and at the maximum fitness for an
+    # island to stop early, as in evolution_loop
+    WEEKS_TO_KEEP = 5
+    # generations between migrations
+    MIGRATION_INTERVAL = 5
+    # weeks sent to the next island at each migration
+    NUM_MIGRANTS = 2
+
+    def __init__(self, this_scheduler, num_islands):
+        self.scheduler = this_scheduler
+        self.num_islands = num_islands
+        # per island: list of (generation, seconds, best fitness, valid
+        # weeks, migrants taken), one per generation
+        self.progress = [[] for i in range(num_islands)]
+
+    ## Runs the islands
+    #  @param self
+    #  @param seconds How long the islands run for
+    #  @param report Function called with each progress tuple, or None
+    #  @return list of the week objects the islands end with
+    def run(self, seconds, report = None):
+        """Starts the islands, each seeded from this process's random
+        numbers, and waits for them to finish, passing on their progress
+        IN: seconds to run, optional function of (island, generation,
+            seconds, best fitness, valid weeks, migrants taken)
+        OUT: list of week objects"""
+        this_scheduler = self.scheduler
+        state = (this_scheduler.courses, this_scheduler.rooms,
+                 this_scheduler.time_slots_mwf, this_scheduler.time_slots_tr,
+                 this_scheduler.slot_divide, list(this_scheduler.constraints),
+                 this_scheduler.rooms_avail)
+        inboxes = [multiprocessing.Queue() for i in range(self.num_islands)]
+        messages = multiprocessing.Queue()
+        processes = []
+        for island in range(self.num_islands):
+            settings = {"island": island,
+                        "seed": random.getrandbits(32),
+                        "seconds": seconds,
+                        "seeding": this_scheduler.seeding,
+                        "room_matching": this_scheduler.room_matching,
+                        # each island has seeds of its own for the seeder
+                        "constructive_seed": this_scheduler.constructive_seed + island * 1000000,
+                        "migration_interval": self.MIGRATION_INTERVAL,
+                        "selection": this_scheduler.selection,
+                        "population_size": this_scheduler.population_size,
+                        "num_elites": this_scheduler.num_elites,
+                        "num_offspring": this_scheduler.num_offspring,
+                        "num_random": this_scheduler.num_random,
+                        "num_migrants": self.NUM_MIGRANTS}
+            process = multiprocessing.Process(
+                target = run_island,
+                args = (state, settings, inboxes[island],
+                        inboxes[(island + 1) % self.num_islands], messages))
+            process.daemon = True
+            process.start()
+            processes.append(process)
+
+        weeks = []
+        done = set()
+        while len(done) < self.num_islands:
+            try:
+                message = messages.get(timeout = 1)
+            except Empty:
+                # an island that stopped without sending its weeks crashed
+                if all([not processes[i].is_alive() for i in range(self.num_islands)
+                        if i not in done]):
+                    print("Islands", sorted(set(range(self.num_islands)) - done),
+                          "stopped without results")
+                    break
+                continue
+            if message[0] == "progress":
+                self.progress[message[1]].append(message[2:])
+                if report is not None:
+                    report(*message[1:])
+            else:
+                done.add(message[1])
+                for each_genome in message[2]:
+                    weeks.append(decode_week(this_scheduler, each_genome))
+        for each_process in processes:
+            each_process.join()
+        return weeks
+
+    ## Prints how each island did
+    #  @param self
+    #  @return none
+    def print_report(self):
+        """Prints per island its generations, best fitness and when it
+        was first reached, valid weeks at the end and migrants taken in"""
+        print("Island progress (generations, best fitness, seconds to best, valid, migrants):")
+        for island in range(self.num_islands):
+            progress = self.progress[island]
+            if len(progress) == 0:
+                print("  island %d: no generations" % island)
+                continue
+            best = max([p[2] for p in progress])
+            seconds_to_best = min([p[1] for p in progress if p[2] == best])
+            generation, seconds, fitness, num_valid, migrants_taken = progress[-1]
+            print("  island %d: %5d %10s %8.1f %5d %5d" % (island, generation, best,
+                                                         seconds_to_best, num_valid,
+                                                         migrants_taken))
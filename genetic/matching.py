@@ -0,0 +1,174 @@
+from __future__ import print_function
+from structures import *
+
+
+## Function that finds a maximum matching of a bipartite graph
+#  @param adjacency List per left vertex of the right vertices it may match
+#  @param num_right The number of right vertices
+#  @return list per left vertex of its right vertex, or None
+def hopcroft_karp(adjacency, num_right):
+    """Hopcroft-Karp: starts from the greedy matching taking each left
+    vertex's first free choice, then adds shortest augmenting paths a
+    layer at a time until there are none. Left vertices list their right
+    vertices in order of preference; the greedy start keeps to it where
+    it can
+    IN: list of lists of right vertex indices, number of right vertices
+    OUT: list of right vertex index or None, per left vertex"""
+    num_left = len(adjacency)
+    match_left = [None] * num_left
+    match_right = [None] * num_right
+    for u in range(num_left):
+        for v in adjacency[u]:
+            if match_right[v] is None:
+                match_left[u] = v
+                match_right[v] = u
+                break
+
+    while True:
+        # layer the left vertices by distance from the free ones
+        distance = [None] * num_left
+        queue = [u for u in range(num_left) if match_left[u] is None]
+        for u in queue:
+            distance[u] = 0
+        found = False
+        for u in queue:
+            for v in adjacency[u]:
+                w = match_right[v]
+                if w is None:
+                    found = True
+                elif distance[w] is None:
+                    distance[w] = distance[u] + 1
+                    queue.append(w)
+        if not found:
+            return match_left
+
+        def augment(u):
+            for v in adjacency[u]:
+                w = match_right[v]
+                if w is None or (distance[w] == distance[u] + 1 and augment(w)):
+                    match_left[u] = v
+                    match_right[v] = u
+                    return True
+            # a dead end for this phase
+            distance[u] = None
+            return False
+
+        for u in range(num_left):
+            if match_left[u] is None:
+                augment(u)
+
+
+class RoomAssigner:
+
+    """Gives the courses of a week their rooms, keeping their times. The
+    courses are grouped by time and days; the groups are matched to rooms
+    one after another, each by maximum bipartite matching (hopcroft_karp)
+    of its courses with the rooms they fit: big enough, with computers if
+    needed, in the course's domain (see Scheduler.course_domains), and
+    free at those times on those days. Groups with a course fitting few
+    rooms go first, and smaller rooms are preferred, so the rooms only
+    depend on the times. Matching group by group is exact within a group
+    but not across groups whose times overlap, so a course can be left
+    without a room that fits; it then takes its old room or any free one,
+    or is left unscheduled and the week incomplete"""
+
+    def __init__(self, this_scheduler):
+        self.scheduler = this_scheduler
+        self.topology = this_scheduler.topology
+        self.courses = this_scheduler.courses
+        self.domains = this_scheduler.course_domains()
+        # per course: the rooms passing the capacity and computer checks,
+        # smallest first
+        rooms = self.topology.rooms
+        by_size = sorted(range(len(rooms)), key = lambda r: (rooms[r][2], r))
+        self.course_rooms = []
+        for each_course in self.courses:
+            self.course_rooms.append([r for r in by_size
+                                      if not each_course.capacity > rooms[r][2] and
+                                      not (each_course.needs_computers == True and
+                                           rooms[r][3] == False)])
+        self.all_rooms = by_size
+
+    ## Assigns the rooms of a week
+    #  @param self
+    #  @param this_week A week object
+    #  @return list of course indices that changed room
+    def assign(self, this_week):
+        """Moves the courses of the week (prescheduled ones excepted) into
+        the rooms the matching gives them, at the same times and days
+        IN: week object
+        OUT: list of the indices of the courses moved"""
+        topology = self.topology
+        # course index -> (slot times as (day, start, end), old room index)
+        meetings = {}
+        for course_index, each_slots in this_week.course_slots.items():
+            if self.courses[course_index].is_prescheduled:
+                continue
+            slot_infos = [topology.slots[i] for i in each_slots]
+            meetings[course_index] = ([(s.day, s.start_time, s.end_time) for s in slot_infos],
+                                      slot_infos[0].room_index)
+        for course_index in meetings:
+            for each_index in list(this_week.course_slots[course_index]):
+                this_week.set_slot(each_index, EMPTY)
+
+        groups = {}
+        for course_index in sorted(meetings):
+            times, old_room = meetings[course_index]
+            groups.setdefault(tuple(sorted(times)), []).append(course_index)
+        # groups with a course that fits few rooms first, then bigger groups
+        order = sorted(groups, key = lambda key: (
+            min([len(self.course_rooms[c]) for c in groups[key]]), -len(groups[key]), key))
+
+        moved = []
+        for key in order:
+            group = groups[key]
+            adjacency = []
+            for course_index in group:
+                times, old_room = meetings[course_index]
+                adjacency.append([r for r in self.course_rooms[course_index]
+                                  if self.free_slots(this_week, course_index, times, r) is not None])
+            matched = hopcroft_karp(adjacency, len(topology.rooms))
+
+            for i in range(len(group)):
+                course_index = group[i]
+                times, old_room = meetings[course_index]
+                room_index = matched[i]
+                if room_index is None:
+                    # nothing that fits is free; any free room will do
+                    for r in [old_room] + self.all_rooms:
+                        if self.free_slots(this_week, None, times, r) is not None:
+                            room_index = r
+                            break
+                if room_index is None:
+                    print("failure: no room for", self.courses[course_index])
+                    this_week.valid = False
+                    this_week.complete = False
+                    moved.append(course_index)
+                    continue
+                for each_index in self.free_slots(this_week, None, times, room_index):
+                    this_week.set_slot(each_index, course_index)
+                if room_index != old_room:
+                    moved.append(course_index)
+        return moved
+
+    def free_slots(self, this_week, course_index, times, room_index):
+        """The slots of the room at the times, or None if one does not
+        exist, overlaps a filled slot of the room or (for a course index)
+        is outside the course's domain"""
+        topology = self.topology
+        assignment = this_week.assignment
+        domain = None
+        if course_index is not None:
+            domain = self.domains[course_index]
+        slots = []
+        for day, start_time, end_time in times:
+            slot_index = topology.find_slot(day, room_index, start_time, end_time)
+            if slot_index is None:
+                return None
+            if domain is not None and slot_index not in domain:
+                return None
+            for each_other in topology.room_overlaps[slot_index]:
+                if assignment[each_other] != EMPTY:
+                    return None
+            slots.append(slot_index)
+        return slots
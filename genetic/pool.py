@@ -0,0 +1,161 @@
+from __future__ import print_function
+from structures import *
+from array import array
+import multiprocessing
+import random
+
+# the worker process's copy of the scheduler; see init_worker
+worker_scheduler = None
+
+
+## Encodes a week for sending to or from a worker
+#  @param this_week A week object
+#  @return string of the assignment array
+def encode_week(this_week):
+    """A week goes between processes as its assignment array (two bytes a
+    slot) rather than as a pickled object graph, whose weakrefs to the
+    scheduler can not be pickled anyway"""
+    return this_week.assignment.tostring()
+
+
+## Decodes a week made by encode_week
+#  @param this_scheduler The scheduler the week belongs to
+#  @param genome String made by encode_week
+#  @return week object
+def decode_week(this_scheduler, genome):
+    return Week(this_scheduler.rooms, this_scheduler, assignment = array('h', genome))
+
+
+## Sets up a worker process
+#  @param state The parts of the scheduler the workers need
+#  @return none
+def init_worker(state):
+    """Builds the worker's copy of the scheduler: the courses, rooms, time
+    slots, constraints and room availability, none of which change while
+    the pool is open (see Scheduler.worker_pool)"""
+    global worker_scheduler
+    import scheduler
+    courses, rooms, time_slots_mwf, time_slots_tr, slot_divide, constraints, rooms_avail = state
+    worker_scheduler = scheduler.Scheduler(courses, rooms, time_slots_mwf, time_slots_tr,
+                                           slot_divide)
+    worker_scheduler.constraints = constraints
+    worker_scheduler.rooms_avail = rooms_avail
+    worker_scheduler.compile_constraints()
+    # the parent decides the order; see score_chunk
+    worker_scheduler.REORDER_INTERVAL = float("inf")
+
+
+## Scores weeks in a worker process
+#  @param task (constraint order, list of (genome, valid))
+#  @return (list of (fitness, valid, num_valid, breakdown), constraint stats)
+def score_chunk(task):
+    """Scores the weeks as Scheduler.score_weeks does, in the order of
+    the constraints the parent uses, and gives back the results and the
+    constraint costs measured doing it"""
+    order, encoded = task
+    this_scheduler = worker_scheduler
+    if this_scheduler.evaluation_order != order:
+        this_scheduler.evaluation_order = order
+        this_scheduler.evaluation_order_index = this_scheduler.scope_index()
+    this_scheduler.constraint_stats = {}
+    weeks = []
+    for genome, valid in encoded:
+        each_week = decode_week(this_scheduler, genome)
+        each_week.valid = valid
+        weeks.append(each_week)
+    this_scheduler.score_weeks(weeks)
+    results = [(w.fitness, w.valid, w.num_valid, w.constraints) for w in weeks]
+    return (results, this_scheduler.constraint_stats)
+
+
+## Generates weeks in a worker process
+#  @param task (seed, number of weeks, room matching)
+#  @return list of (genome, valid, complete)
+def generate_chunk(task):
+    """Fills new weeks as Scheduler.generate_starting_population does,
+    with the worker's random numbers seeded from the task, so a chunk
+    comes out the same whichever worker makes it"""
+    seed, num_to_generate, room_matching = task
+    this_scheduler = worker_scheduler
+    random.seed(seed)
+    results = []
+    for x in range(num_to_generate):
+        each_week = Week(this_scheduler.rooms, this_scheduler)
+        this_scheduler.randomly_fill_schedule(each_week, this_scheduler.courses)
+        if room_matching:
+            this_scheduler.assign_rooms(each_week)
+        results.append((encode_week(each_week), each_week.valid, each_week.complete))
+    return results
+
+
+class WorkerPool:
+
+    """A pool of processes, each holding a copy of the scheduler, that
+    scores weeks sent to it and generates new ones, all as encode_week
+    strings. A pool is only good for the constraints and room availability
+    it was started with"""
+
+    # chunks per worker the weeks are split into, so a slow chunk does not
+    # hold up the others
+    CHUNKS_PER_WORKER = 4
+
+    def __init__(self, this_scheduler, num_workers):
+        self.scheduler = this_scheduler
+        self.num_workers = num_workers
+        state = (this_scheduler.courses, this_scheduler.rooms,
+                 this_scheduler.time_slots_mwf, this_scheduler.time_slots_tr,
+                 this_scheduler.slot_divide, list(this_scheduler.constraints),
+                 this_scheduler.rooms_avail)
+        self.pool = multiprocessing.Pool(num_workers, init_worker, (state,))
+
+    ## Scores weeks in the workers
+    #  @param self
+    #  @param weeks A list of week objects
+    #  @return none
+    def score(self, weeks):
+        """Same as Scheduler.score_weeks, with the weeks shared out among
+        the workers; the constraint costs they measure are added to the
+        scheduler's (see Scheduler.record_constraint)"""
+        this_scheduler = self.scheduler
+        order = list(this_scheduler.constraint_order())
+        encoded = [(encode_week(w), w.valid) for w in weeks]
+        num_chunks = self.num_workers * self.CHUNKS_PER_WORKER
+        size = max(1, -(-len(encoded) // num_chunks))
+        tasks = [(order, encoded[i:i + size]) for i in range(0, len(encoded), size)]
+        position = 0
+        for results, stats in self.pool.map(score_chunk, tasks):
+            for fitness, valid, num_valid, breakdown in results:
+                each_week = weeks[position]
+                each_week.fitness = fitness
+                each_week.valid = valid
+                each_week.num_valid = num_valid
+                each_week.constraints.update(breakdown)
+                position += 1
+            this_scheduler.merge_constraint_stats(stats)
+
+    ## Generates weeks in the workers
+    #  @param self
+    #  @param tasks List of (seed, number of weeks) per chunk
+    #  @return iterator over the list of week objects of each chunk
+    def generate(self, tasks):
+        """Same as generate_starting_population filling new weeks, one
+        chunk of weeks per task, with the random numbers of each chunk
+        seeded from its task. The chunks come back in order, each as soon
+        as it and those before it are done"""
+        this_scheduler = self.scheduler
+        tasks = [(seed, number, this_scheduler.room_matching) for seed, number in tasks]
+        for results in self.pool.imap(generate_chunk, tasks):
+            weeks = []
+            for genome, valid, complete in results:
+                each_week = decode_week(this_scheduler, genome)
+                each_week.valid = valid
+                each_week.complete = complete
+                weeks.append(each_week)
+            yield weeks
+
+    ## Stops the workers
+    #  @param self
+    #  @return none
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
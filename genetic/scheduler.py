@@ -3,12 +3,22 @@ from copy import deepcopy
 from copy import copy
 from random import randint
 from random import choice
+import random
 from math import floor
 from datetime import time, timedelta
 from structures import *
 from constraint import *
+from evaluator import *
+import batch
+from seeder import ConstructiveSeeder
+from matching import RoomAssigner
+from pool import WorkerPool
+from islands import IslandModel
+from selection import SELECTIONS, select_distinct, rank_weeks
+from annealing import SimulatedAnnealing
 from time import time as now
-from collections import Counter
+from collections import Counter, OrderedDict
+from array import array
 import gc
 import sys
 sys.path.append("../")
@@ -58,6 +68,18 @@ class Scheduler:
 
     """Schedules all courses for a week"""
 
+    # rejections to see before re-ordering the mandatory constraints
+    REORDER_INTERVAL = 500
+    # most week results kept by the fitness cache
+    FITNESS_CACHE_SIZE = 5000
+    # weeks evolution_loop builds at a time with the constructive seeder
+    CONSTRUCTIVE_POPULATION = 50
+    # fewest weeks to score that are worth sending to the worker pool
+    POOL_MIN_WEEKS = 50
+    # weeks per chunk generate_starting_population gives a worker, each
+    # chunk with its own seed
+    GENERATION_CHUNK = 25
+
     def __init__(self, courses, rooms, time_slots_mwf, time_slots_tr, time_slot_divide, test = False):
         if type(courses) == list:
             if len(courses) != 0:
@@ -119,13 +141,91 @@ class Scheduler:
 
         self.slot_divide = time_slot_divide
         self.courses = courses
+        # index of each course in the weeks' assignment arrays
+        self.course_ids = dict([(courses[i].code, i) for i in range(len(courses))])
+        # course indices of the sections of each course with more than one
+        self.section_groups = group_sections(courses, self.course_ids)
         self.rooms = rooms
+        # slot layout shared by every week
+        self.topology = Topology(rooms, time_slots_mwf, time_slots_tr, len(courses))
         self.weeks = []
 
         self.constraints = []
+        # built on demand by scope_index and calc_fitness_batch
+        self.constraint_scope_index = None
+        self.batch_fitness = None
+        # order calc_fitness runs the constraints in, and per constraint name
+        # [calls, seconds, rejections] measured while scoring valid weeks
+        self.evaluation_order = None
+        self.evaluation_order_index = None
+        self.evaluations_since_reorder = 0
+        self.constraint_stats = {}
+        # genome hash -> (assignment, fitness, valid, num_valid, breakdown),
+        # least recently used first; see calc_fitness_batch
+        self.fitness_cache = OrderedDict()
+        self.fitness_cache_key = None
+        # counts the runs of compile_constraints; the fitness cache, batch
+        # encoding and worker pool are only good for the version they were
+        # made with
+        self.constraints_version = 0
+        self.batch_fitness_version = None
         self.num_hard_constraints = 0  # updated in globs, used for the mandatory, hardcoded constraints
         self.max_fitness = 0
+        # a RoomsAvail, whatever is assigned; see __setattr__
         self.rooms_avail = {}
+        # rooms_avail compiled per slot, the rooms_avail and its version it
+        # was compiled from, and the number of times it was compiled; see
+        # room_avail_table
+        self.rooms_avail_table = None
+        self.rooms_avail_key = None
+        self.rooms_avail_version = 0
+        # slots each course may use, and the tables and forbidden slots
+        # they were worked out from; see course_domains
+        self.course_domains_table = None
+        self.course_domains_key = None
+        # how evolution_loop makes weeks when none are valid: "random" with
+        # generate_starting_population, or "constructive" with
+        # generate_constructive_population, whose next seed is kept here
+        self.seeding = "random"
+        self.constructive_seed = 0
+        # two stage mode: if set, generated and crossed over weeks only keep
+        # their times, and get their rooms from assign_rooms
+        self.room_matching = False
+        self.room_assigner_cache = None
+        # processes calc_fitness_batch scores weeks in; 1 scores them in
+        # this process. The pool and what it was started with; see worker_pool
+        self.num_workers = 1
+        self.worker_pool_cache = None
+        self.worker_pool_key = None
+        # populations evolution_loop evolves at once, each in a process of
+        # its own, and the model of the last run; see island_loop
+        self.num_islands = 1
+        self.island_model = None
+        # how evolution_loop picks the weeks kept and bred each generation:
+        # "all_pairs" keeps the population_size best and crosses every pair
+        # of them (see breed); a name in selection.SELECTIONS keeps the
+        # num_elites best and picks the rest of the population_size with
+        # it, then breeds num_offspring children from parents it picks
+        # (see breed_selected). num_random new weeks are added either way
+        self.selection = "all_pairs"
+        self.population_size = 5
+        self.num_elites = 1
+        self.num_offspring = 10
+        self.num_random = 5
+        # per generation of the last evolution_loop: (seconds, best fitness,
+        # mean fitness of the weeks kept, valid weeks); see record_fitness.
+        # annealing_loop adds one per report, with the fitness of the week
+        # being annealed in place of the mean
+        self.fitness_history = []
+        # "genetic" runs the genetic algorithm in evolution_loop,
+        # "annealing" anneals the best valid week instead (see
+        # annealing_loop), with the temperatures falling along the cooling
+        # schedule, a name in annealing.COOLING_SCHEDULES; None temperatures
+        # take SimulatedAnnealing's defaults
+        self.engine = "genetic"
+        self.cooling = "exponential"
+        self.start_temperature = None
+        self.end_temperature = None
 
         # default message to be displayed on the loading screen
         self.gui_loading_info = ""
@@ -139,6 +239,14 @@ class Scheduler:
         #Courses separated by credit hours
         self.separated = self.separate_by_credit(self.courses)
 
+
+    def __setattr__(self, name, value):
+        """Keeps rooms_avail a RoomsAvail, so room_avail_table sees changes
+        to it however the dict is assigned"""
+        if name == "rooms_avail" and not isinstance(value, RoomsAvail):
+            value = RoomsAvail(value)
+        self.__dict__[name] = value
+
     ## Groups courses based on credits
     #  @param self
     #  @param credit A credit object
@@ -161,19 +269,96 @@ class Scheduler:
     #  @param self
     #  @param constraint A constraint object
     #  @return none
-    def add_constraint(self, name, weight, func, args = [], universal = False):
-        """Adds an constraint to the schedule"""
+    def add_constraint(self, name, weight, func, args = [], universal = False, scope = None):
+        """Adds an constraint to the schedule
+        scope is an optional ConstraintScope; see Constraint"""
         try:
             exists = False
             for constraint in self.constraints:
                 if constraint.name == name:
                     exists = True
             if not exists:
-                self.constraints.append(Constraint(name, weight, func, args, universal))
+                self.constraints.append(Constraint(name, weight, func, args, universal, scope))
                 self.max_fitness += weight
+                self.compile_constraints()
         except:
             print("Constraint {0} could not be added".format(name))
 
+    ## Gives the index from courses/instructors/rooms to constraints
+    #  @param self
+    #  @return ConstraintScopeIndex
+    def scope_index(self):
+        """Returns the inverted index of the constraints' scopes, rebuilt
+        whenever the constraints list has changed since it was last built"""
+        if self.constraint_scope_index is None or \
+           not self.constraint_scope_index.matches(self.constraints):
+            self.constraint_scope_index = ConstraintScopeIndex(self.constraints)
+        return self.constraint_scope_index
+
+    ## Compiles the constraints for the topology
+    #  @param self
+    #  @return none
+    def compile_constraints(self):
+        """Compiles the unary constraints into the topology's tables (see
+        unary_table) and the prereq lists of avoid_overlap_within_csc into
+        its pairs (see compiled_prereq_pairs), again only for those whose
+        args changed since they were compiled (see args_key and
+        prereq_signature), and drops what was compiled for args that no
+        constraint has any more. Bumps constraints_version, so the
+        results scored with the old constraints are dropped. Run by
+        add_constraint, delete_list_constraints and clear_constraints;
+        anything that changes a constraint's weight or args in place must
+        run it too"""
+        topology = self.topology
+        unary_tables = {}
+        prereq_lists = {}
+        self.constraints_version += 1
+        for each_constraint in self.constraints:
+            func = each_constraint.func
+            args = each_constraint.args
+            if func is avoid_overlap_within_csc:
+                try:
+                    prereqs = args[0]
+                    signature = prereq_signature(prereqs)
+                    compiled = topology.prereq_pairs.get(id(prereqs))
+                    if compiled is None or compiled[0] is not prereqs or \
+                       compiled[1] != signature:
+                        compiled = (prereqs, signature, prereq_pairs(prereqs, self.course_ids))
+                except (KeyError, IndexError, TypeError, AttributeError):
+                    continue
+                prereq_lists[id(prereqs)] = compiled
+                continue
+            if func not in UNARY_COMPILERS:
+                continue
+            compiled = topology.unary_tables.get(id(args))
+            if compiled is not None and compiled[0] is args and compiled[1] is func and \
+               compiled[2] == args_key(args):
+                unary_tables[id(args)] = compiled
+                continue
+            try:
+                table = UNARY_COMPILERS[func](args, topology, self.courses, self.course_ids)
+            except (KeyError, IndexError, TypeError, AttributeError):
+                # args not in the usual form; calc_fitness will say
+                continue
+            unary_tables[id(args)] = (args, func, args_key(args), table)
+        topology.unary_tables.clear()
+        topology.unary_tables.update(unary_tables)
+        topology.prereq_pairs.clear()
+        topology.prereq_pairs.update(prereq_lists)
+
+    ## Finds the constraints that depend on a course, instructor or room
+    #  @param self
+    #  @return list of constraint objects
+    def constraints_depending_on(self, courses = [], instructors = [], rooms = []):
+        """Returns the global constraints and those whose scope names any
+        of the given courses, instructors or rooms (objects or names),
+        in the order they are in self.constraints"""
+        index = self.scope_index()
+        positions = index.affected([getattr(c, "code", c) for c in courses],
+                                   [getattr(i, "name", i) for i in instructors],
+                                   [getattr(r, "full_name", r) for r in rooms])
+        return [self.constraints[i] for i in positions]
+
     ## Clears constraints from list
     #  @param self
     #  @param  A constraint object
@@ -182,6 +367,8 @@ class Scheduler:
         """Removes all constraints from list"""
         self.constraints = []
         self.max_fitness = 0
+        self.constraint_stats = {}
+        self.compile_constraints()
 
         
     ## Removes list constraint from schedule
@@ -199,6 +386,7 @@ class Scheduler:
                     self.max_fitness -= constraint_obj.weight
                     self.constraints.remove(constraint_obj)
                     break
+        self.compile_constraints()
 
     ## Calculate the fitness score of a schedule
     #  @param self
@@ -209,8 +397,13 @@ class Scheduler:
         total_fitness = 0
         number_valid = 0
         total_to_be_valid = 0
-        for each_constraint in self.constraints:
+        was_valid = this_week.valid
+        for i in self.constraint_order():
+            each_constraint = self.constraints[i]
+            started = now()
             each_fitness = each_constraint.get_fitness(this_week)
+            if was_valid:
+                self.record_constraint(each_constraint, now() - started, this_week.valid)
             if not this_week.valid:
                 break
             this_week.constraints[each_constraint.name] = [each_fitness["score"],
@@ -227,6 +420,272 @@ class Scheduler:
 
         #print(this_week.constraints)
 
+    ## Gives the order calc_fitness runs the constraints in
+    #  @param self
+    #  @return list of indices into self.constraints
+    def constraint_order(self):
+        """Returns the evaluation order, working it out again if the
+        constraints changed or enough weeks were scored since last time"""
+        if self.evaluation_order is None or \
+           self.evaluation_order_index is not self.scope_index() or \
+           self.evaluations_since_reorder >= self.REORDER_INTERVAL:
+            self.update_constraint_order()
+        return self.evaluation_order
+
+    ## Re-orders the mandatory constraints from their measured cost
+    #  @param self
+    #  @return none
+    def update_constraint_order(self):
+        """Within each run of consecutive mandatory (weight 0) constraints,
+        puts first the ones that take the least time per week they reject.
+        Weighted constraints keep their place, so the weights added up
+        before a week is rejected, and so its fitness, do not change.
+        self.constraints itself is never re-ordered (the GUI relies on it)"""
+        def rejection_cost(i):
+            stats = self.constraint_stats.get(self.constraints[i].name)
+            if stats is None or stats[0] == 0:
+                return 0.0  # not measured yet; run it early to find out
+            calls, seconds, rejections = stats
+            if rejections == 0:
+                return float("inf")
+            return seconds / rejections
+
+        order = []
+        run = []
+        for i in range(len(self.constraints)):
+            if self.constraints[i].weight == 0:
+                run.append(i)
+            else:
+                order.extend(sorted(run, key = rejection_cost))
+                run = []
+                order.append(i)
+        order.extend(sorted(run, key = rejection_cost))
+
+        self.evaluation_order = order
+        self.evaluation_order_index = self.scope_index()
+        self.evaluations_since_reorder = 0
+
+    ## Records how long a constraint took and whether it rejected the week
+    #  @param self
+    #  @param this_constraint A constraint object
+    #  @param seconds Time taken by the constraint
+    #  @param still_valid Whether the week was still valid afterwards
+    #  @return none
+    def record_constraint(self, this_constraint, seconds, still_valid):
+        stats = self.constraint_stats.setdefault(this_constraint.name, [0, 0.0, 0])
+        stats[0] += 1
+        stats[1] += seconds
+        if not still_valid:
+            stats[2] += 1
+            self.evaluations_since_reorder += 1
+
+    ## Adds constraint costs measured elsewhere to this scheduler's
+    #  @param self
+    #  @param stats Dictionary of constraint name to [calls, seconds, rejections]
+    #  @return none
+    def merge_constraint_stats(self, stats):
+        """Adds up costs measured by record_constraint in a worker process"""
+        for name, (calls, seconds, rejections) in stats.items():
+            own = self.constraint_stats.setdefault(name, [0, 0.0, 0])
+            own[0] += calls
+            own[1] += seconds
+            own[2] += rejections
+            self.evaluations_since_reorder += rejections
+
+    ## Expected time to score one week with the given constraint order
+    #  @param self
+    #  @param order List of indices into self.constraints
+    #  @return seconds
+    def expected_constraint_cost(self, order):
+        """Adds up each constraint's average time, weighted by the share of
+        weeks that get that far (from the measured rejection rates)"""
+        cost = 0.0
+        reach = 1.0
+        for i in order:
+            stats = self.constraint_stats.get(self.constraints[i].name)
+            if stats is None or stats[0] == 0:
+                continue
+            calls, seconds, rejections = stats
+            cost += reach * seconds / calls
+            reach *= 1 - float(rejections) / calls
+        return cost
+
+    ## Prints the measured constraint costs and the savings of the order
+    #  @param self
+    #  @return none
+    def print_constraint_report(self):
+        """Prints per constraint the calls, average time and rejection rate,
+        and the expected time per week in the original and current orders"""
+        print("Constraint costs (calls, ms per call, rejected):")
+        for i in self.constraint_order():
+            name = self.constraints[i].name
+            stats = self.constraint_stats.get(name)
+            if stats is None or stats[0] == 0:
+                continue
+            calls, seconds, rejections = stats
+            print("  %-45s %7d %8.3f %6.1f%%" % (name, calls, 1000.0 * seconds / calls,
+                                                100.0 * rejections / calls))
+        original = self.expected_constraint_cost(range(len(self.constraints)))
+        adaptive = self.expected_constraint_cost(self.constraint_order())
+        if original > 0:
+            print("Expected ms per week: %.3f in the original order, %.3f in the "
+                  "adaptive order (%.1f%% saved)" % (1000 * original, 1000 * adaptive,
+                                                     100 * (original - adaptive) / original))
+
+    ## Calculate the fitness scores of many schedules
+    #  @param self
+    #  @param weeks A list of week objects
+    #  @return none
+    def calc_fitness_batch(self, weeks):
+        """Same as update_sections and calc_fitness on each week, but with
+        the hard constraints computed for all weeks at once when numpy is
+        installed (see batch.BatchFitness), and with the results of weeks
+        scored before taken from the fitness cache"""
+        self.check_fitness_cache()
+        to_score = []
+        to_cache = []
+        for each_week in weeks:
+            if not each_week.valid:
+                to_score.append(each_week)
+            elif not self.lookup_fitness(each_week):
+                to_score.append(each_week)
+                # score into an empty breakdown so only this run's entries are cached
+                to_cache.append((each_week, each_week.constraints))
+                each_week.constraints = {}
+
+        pool = self.worker_pool()
+        if pool is not None and len(to_score) >= self.POOL_MIN_WEEKS:
+            pool.score(to_score)
+        else:
+            self.score_weeks(to_score)
+
+        for each_week, old_constraints in to_cache:
+            self.store_fitness(each_week)
+            old_constraints.update(each_week.constraints)
+            each_week.constraints = old_constraints
+
+    ## Scores weeks in this process
+    #  @param self
+    #  @param weeks A list of week objects
+    #  @return none
+    def score_weeks(self, weeks):
+        """update_sections and calc_fitness on each week, or the same with
+        batch.BatchFitness when numpy is installed"""
+        if batch.numpy is None:
+            for each_week in weeks:
+                each_week.update_sections(self.courses)
+                self.calc_fitness(each_week)
+        elif len(weeks) > 0:
+            # the encoding depends on the constraints, so rebuild if they changed
+            if self.batch_fitness is None or \
+               not self.scope_index().matches(self.batch_fitness.constraints) or \
+               self.batch_fitness_version != self.constraints_version:
+                self.batch_fitness = batch.BatchFitness(self)
+                self.batch_fitness_version = self.constraints_version
+            self.batch_fitness.calc_fitness(weeks)
+
+    ## Gives the pool of worker processes that score weeks
+    #  @param self
+    #  @return WorkerPool object, or None if num_workers is 1
+    def worker_pool(self):
+        """Starts the pool on first use, and again whenever num_workers,
+        the constraints or the room availability changed since, as the
+        workers keep their own copy of them"""
+        if self.num_workers <= 1:
+            self.close_worker_pool()
+            return None
+        self.room_avail_table()
+        key = (self.scope_index(), self.rooms_avail_version, self.num_workers,
+               self.constraints_version)
+        if self.worker_pool_key is None or self.worker_pool_key[0] is not key[0] or \
+           self.worker_pool_key[1:] != key[1:]:
+            self.close_worker_pool()
+            self.worker_pool_cache = WorkerPool(self, self.num_workers)
+            self.worker_pool_key = key
+        return self.worker_pool_cache
+
+    ## Stops the worker processes, if running
+    #  @param self
+    #  @return none
+    def close_worker_pool(self):
+        if self.worker_pool_cache is not None:
+            self.worker_pool_cache.close()
+        self.worker_pool_cache = None
+        self.worker_pool_key = None
+
+    ## Makes sure the fitness cache matches the constraints and rooms
+    #  @param self
+    #  @return none
+    def check_fitness_cache(self):
+        """Empties the cache if the constraints (see compile_constraints),
+        their order or the room availability changed since its results
+        were stored"""
+        order = self.constraint_order()
+        self.room_avail_table()
+        rooms_avail = self.rooms_avail_version
+        if self.fitness_cache_key is None or \
+           self.fitness_cache_key[0] is not self.scope_index() or \
+           self.fitness_cache_key[1] != order or \
+           self.fitness_cache_key[2] != rooms_avail or \
+           self.fitness_cache_key[3] != self.constraints_version:
+            self.fitness_cache.clear()
+            self.fitness_cache_key = (self.scope_index(), list(order), rooms_avail,
+                                      self.constraints_version)
+
+    ## Copies a cached result to a week, if there is one
+    #  @param self
+    #  @param this_week A week object that is valid so far
+    #  @return True if found
+    def lookup_fitness(self, this_week):
+        """Looks the week up by its genome hash; the stored assignment is
+        compared too, so a hash collision can not give a wrong result"""
+        entry = self.fitness_cache.get(this_week.genome_hash)
+        if entry is None or entry[0] != this_week.assignment:
+            return False
+        assignment, fitness, valid, num_valid, constraints = entry
+        # most recently used goes last
+        del self.fitness_cache[this_week.genome_hash]
+        self.fitness_cache[this_week.genome_hash] = entry
+        this_week.fitness = fitness
+        this_week.valid = valid
+        this_week.num_valid = num_valid
+        this_week.constraints.update(constraints)
+        return True
+
+    ## Stores the result of a week that was scored starting valid
+    #  @param self
+    #  @param this_week A week object
+    #  @return none
+    def store_fitness(self, this_week):
+        """Adds the week's result, dropping the least recently used one if
+        the cache is full"""
+        if this_week.genome_hash in self.fitness_cache:
+            del self.fitness_cache[this_week.genome_hash]
+        elif len(self.fitness_cache) >= self.FITNESS_CACHE_SIZE:
+            self.fitness_cache.popitem(last = False)
+        self.fitness_cache[this_week.genome_hash] = (array('h', this_week.assignment),
+                                                     this_week.fitness,
+                                                     this_week.valid,
+                                                     this_week.num_valid,
+                                                     dict(this_week.constraints))
+
+    ## Drops weeks that repeat an earlier week
+    #  @param self
+    #  @param weeks A list of week objects
+    #  @return list of week objects
+    def deduplicate_weeks(self, weeks):
+        """Keeps the first of every group of weeks with the same courses in
+        the same slots"""
+        kept = []
+        kept_by_hash = {}
+        for each_week in weeks:
+            same_hash = kept_by_hash.setdefault(each_week.genome_hash, [])
+            if any(each_week.same_assignment(other) for other in same_hash):
+                continue
+            same_hash.append(each_week)
+            kept.append(each_week)
+        return kept
+
     ## Safely adds room availability to scheduler
     # @param self
     # @param room A full name of a room (building + number, no spaces)
@@ -239,6 +698,7 @@ class Scheduler:
             
         is_avail_char = '+' if is_avail else '-'
         self.rooms_avail[room].append((is_avail_char, days.lower(), start, end))
+        self.room_avail_table()
         print("self.rooms_avail updated to: ")
         print(self.rooms_avail)
         
@@ -259,6 +719,98 @@ class Scheduler:
                     
         if not self.rooms_avail[room]:
             del self.rooms_avail[room]
+        self.room_avail_table()
+
+    ## Gives the room availability compiled for the slots
+    #  @param self
+    #  @return (holding counts, failing counts, forbidden slot indices)
+    def room_avail_table(self):
+        """Returns rooms_avail compiled per slot (see compile_rooms_avail).
+        It is compiled again only if rooms_avail changed since, by
+        add_room_avail, delete_room_avail or directly: rooms_avail is a
+        RoomsAvail, which counts its changes"""
+        if self.rooms_avail_key is None or self.rooms_avail_key[0] is not self.rooms_avail or \
+           self.rooms_avail_key[1] != self.rooms_avail.version:
+            self.rooms_avail_table = compile_rooms_avail(self.rooms_avail, self.topology)
+            self.rooms_avail_key = (self.rooms_avail, self.rooms_avail.version)
+            self.rooms_avail_version += 1
+        return self.rooms_avail_table
+
+    ## Works out the slots each course may use
+    #  @param self
+    #  @return list per course index of a set of slot indices, or None
+    def course_domains(self):
+        """The slots each course can be in without breaking a mandatory
+        unary constraint (see UnaryTable), the capacity and computer
+        requirements, or the room availability. None for a course that
+        may use any slot. Worked out again whenever the compiled tables or
+        the forbidden slots change
+        IN: nothing
+        OUT: list of sets of slot indices or None, per course index"""
+        tables = []
+        check_rooms = False
+        for each_constraint in self.constraints:
+            func = each_constraint.func
+            if func is ensure_course_room_capacity or func is ensure_computer_requirement:
+                check_rooms = True
+            elif func in UNARY_COMPILERS:
+                try:
+                    table = unary_table(func, each_constraint.args, self)
+                except (KeyError, IndexError, TypeError, AttributeError):
+                    # args not in the usual form; calc_fitness will say
+                    continue
+                if table.is_mandatory:
+                    tables.append(table)
+        forbidden = self.room_avail_table()[2]
+        key = (tables, check_rooms, forbidden)
+        if self.course_domains_key is not None and \
+           len(self.course_domains_key[0]) == len(tables) and \
+           all([a is b for a, b in zip(self.course_domains_key[0], tables)]) and \
+           self.course_domains_key[1] == check_rooms and \
+           self.course_domains_key[2] is forbidden:
+            return self.course_domains_table
+
+        num_slots = self.topology.num_slots
+        open_slots = set(range(num_slots)).difference(forbidden)
+        domains = [None] * len(self.courses)
+        def restrict(course_index, allowed):
+            if domains[course_index] is None:
+                domains[course_index] = set(open_slots)
+            domains[course_index].intersection_update(allowed)
+
+        for course_index in range(len(self.courses)):
+            each_course = self.courses[course_index]
+            if len(forbidden) > 0:
+                domains[course_index] = set(open_slots)
+            if check_rooms:
+                # the rooms passing both checks, as the constraints make them
+                rooms = [room_index for room_index in range(len(self.topology.rooms))
+                         if not each_course.capacity > self.topology.rooms[room_index][2] and
+                         not (each_course.needs_computers == True and
+                              self.topology.rooms[room_index][3] == False)]
+                if len(rooms) < len(self.topology.rooms):
+                    restrict(course_index, [each_slot.index for each_slot in self.topology.slots
+                                            if each_slot.room_index in rooms])
+        for each_table in tables:
+            for course, course_index, first_only, holds in each_table.entries:
+                restrict(course_index, [i for i in range(num_slots) if holds[i]])
+
+        self.course_domains_table = domains
+        self.course_domains_key = key
+        return domains
+
+    ## Gives the courses of a week rooms by bipartite matching
+    #  @param self
+    #  @param this_week A week to modify
+    #  @return list of the indices of the courses that changed room
+    def assign_rooms(self, this_week):
+        """Keeps each course's times and days and gives it a room that is
+        big enough, has computers if needed and is in its domain; see
+        RoomAssigner. The assigner is made again when the domains change"""
+        domains = self.course_domains()
+        if self.room_assigner_cache is None or self.room_assigner_cache.domains is not domains:
+            self.room_assigner_cache = RoomAssigner(self)
+        return self.room_assigner_cache.assign(this_week)
 
     ## Mutates a schedule by changing one course based off a random constraint
     #  @param self
@@ -267,13 +819,18 @@ class Scheduler:
         # deep copy the week so we can't drop the fitness score
         copy_of_this_week = this_week.deep_copy()
 
+        # keeps each constraint's result; rescheduling the course below only
+        # re-runs the constraints that can see it
+        evaluator = IncrementalFitness(self, copy_of_this_week)
+
         # get a list of all failed constraints
         failed_constraints = []
-        for each_constraint in self.constraints:
-            constraint_result = each_constraint.get_fitness(copy_of_this_week)
+        for i in range(len(self.constraints)):
+            each_constraint = self.constraints[i]
+            constraint_result = evaluator.result(i)
             if each_constraint.weight != 0 and \
                constraint_result["score"] != each_constraint.weight:
-                failed_constraints.append((each_constraint, constraint_result))
+                failed_constraints.append((each_constraint, constraint_result, i))
 
         # randomly select a failed constraint
         total_failed = len(failed_constraints)
@@ -305,10 +862,9 @@ class Scheduler:
                                         copy_of_this_week.find_empty_time_slots())
     
 
-            copy_of_this_week.valid = True # reset the valid so calc_fitness works correctly
-            copy_of_this_week.update_sections(self.courses)
-            self.calc_fitness(copy_of_this_week)
-            result = failed_constraints[choice][0].get_fitness(copy_of_this_week)
+            # same fitness and validity as a full calc_fitness
+            evaluator.course_moved(selected_course)
+            result = evaluator.result(failed_constraints[choice][2])
             if len(result["failed"]) < starting_len and copy_of_this_week.valid:
                 print("Rescheduled: ", selected_course)
                 if len(result["failed"]) == 0:
@@ -387,14 +943,15 @@ class Scheduler:
         """Change all courses for matching time slots ("swaps")
         IN: two lists of time slots (cuts) for 2 weeks
         OUT: two lists have been 'swapped'"""
+        # slots match when they sit at the same index of their weeks
+        slots_by_index = dict([(j.index, j) for j in slotsB])
         for i in slotsA:
-            for j in slotsB:
-                if i.start_time == j.start_time and i.room.number == j.room.number and \
-                   i.room.day.day_code == j.room.day.day_code:
-                    courseA = i.course
-                    courseB = j.course
-                    i.set_course(courseB)
-                    j.set_course(courseA)
+            if i.index in slots_by_index:
+                j = slots_by_index[i.index]
+                courseA = i.course
+                courseB = j.course
+                i.set_course(courseB)
+                j.set_course(courseA)
         return
 
     ## Returns a dictionary for of reminder and lacking courses
@@ -408,11 +965,9 @@ class Scheduler:
              courses with surplus; latter is list of courses not
              scheduled for the week"""
         inconsistencies = {'surplus': [], 'lacking': []}
-        full_list = this_week.list_time_slots()
-
-        for course in self.courses:
-            slots = this_week.find_course(course)
-            num_slots = len(slots)
+        for course_index in range(len(self.courses)):
+            course = self.courses[course_index]
+            num_slots = len(this_week.course_slots.get(course_index, []))
             if num_slots == 0:
                 inconsistencies['lacking'].append(course)
             elif num_slots > course.credit:
@@ -430,20 +985,13 @@ class Scheduler:
         IN: (crossed) week object, inconsistencies dict with surplus and lacking
              both are list of courses
         OUT: (crossed) week object that represents all courses once"""
-        full_list = this_week.list_time_slots()
-        open_list = []
-
         for each_course in inconsistencies['surplus']:
-            slots = this_week.find_course(each_course)
-            for each_slot in slots:
-                each_slot.remove_course()
+            this_week.unschedule_course(each_course)
 
         inconsistencies['lacking'].extend(inconsistencies['surplus'])
 
         # find all excess slots
-        for i in full_list:
-            if i.course is None:
-                open_list.append(i)
+        open_list = this_week.find_empty_time_slots()
 
         # fill in missing courses
         self.randomly_fill_schedule(
@@ -467,20 +1015,21 @@ class Scheduler:
             if index not in time_slot_indexes:
                 time_slots.append(self.time_slots[index])
 
-        C1 = P1.deep_copy()
-        C2 = P2.deep_copy()
-        # P1's slots to have its courses cloned on P2
-        cutA = self.find_time_slots_from_cuts(C1, time_slots)
-        # P2's slots to have its courses cloned on P1
-        cutB = self.find_time_slots_from_cuts(C2, time_slots)
+        C1 = P1.deep_copy(with_sections = False)
+        C2 = P2.deep_copy(with_sections = False)
+        # slots to have their courses swapped between C1 and C2;
+        # both weeks share the topology, so the same indices line up
+        cut = self.topology.find_slot_indices_from_cuts(time_slots)
         # do the replacement
-        self.replace_time_slots(cutA, cutB)
+        C1.swap_slots(C2, cut)
 
         for i in [C1, C2]:
             # figure out what have extra of/don't have
             inconsistencies = self.assess_inconsistencies(i)
             # clear the excess; try to schedule lacking
             self.resolve_inconsistencies(i, inconsistencies)
+            if self.room_matching:
+                self.assign_rooms(i)
             inconsistencies = self.assess_inconsistencies(i)
             #A week with extra courses is invalid, but not necessarily incomplete
             if len(inconsistencies["surplus"]) > 0:
@@ -551,6 +1100,134 @@ class Scheduler:
         return
 
 
+    ## Keeps the best weeks of the population
+    #  @param self
+    #  @param weeks_to_keep Number of weeks to keep
+    #  @return list of the valid weeks, best first
+    def keep_best_weeks(self, weeks_to_keep):
+        """Sets self.weeks to the weeks_to_keep best weeks, valid ones
+        first, and returns the list of valid weeks"""
+        valid_weeks = filter(lambda x: x.valid, self.weeks)
+        valid_weeks.sort(key=lambda x: x.fitness, reverse=True)
+        if len(valid_weeks) > 0:
+            temp = filter(lambda x: not x.valid, self.weeks)[:weeks_to_keep \
+                                                                - len(valid_weeks)]
+            temp.sort(key=lambda x: x.fitness, reverse=True)
+            self.weeks = (valid_weeks + temp)[:weeks_to_keep]
+        else:
+            self.weeks = self.weeks[:weeks_to_keep]
+        return valid_weeks
+
+    ## Picks the weeks kept for the next generation
+    #  @param self
+    #  @return list of the valid weeks, best first
+    def select_survivors(self):
+        """Sets self.weeks to population_size weeks, best first: the best
+        ones for "all_pairs", or the num_elites best and the others picked
+        by the selection scheme. Returns the list of valid weeks of the
+        whole population, as keep_best_weeks does"""
+        if self.selection not in SELECTIONS:
+            return self.keep_best_weeks(self.population_size)
+        ranked = rank_weeks(self.weeks)
+        valid_weeks = filter(lambda x: x.valid, ranked)
+        num_elites = min(self.num_elites, self.population_size)
+        self.weeks = ranked[:num_elites] + \
+            select_distinct(SELECTIONS[self.selection], ranked[num_elites:],
+                            self.population_size - num_elites)
+        self.weeks = rank_weeks(self.weeks)
+        return valid_weeks
+
+    ## Breeds the weeks kept
+    #  @param self
+    #  @return none
+    def breed_population(self):
+        """breed for "all_pairs", breed_selected otherwise"""
+        if self.selection not in SELECTIONS:
+            self.breed()
+        else:
+            self.breed_selected()
+
+    ## Breeds children from parents picked by the selection scheme
+    #  @param self
+    #  @return none
+    def breed_selected(self):
+        """Crosses over pairs of parents picked with the selection scheme
+        until there are num_offspring children, giving up after twice as
+        many tries, and adds the children to self.weeks"""
+        if len(self.weeks) < 2:
+            raise BreedError("Weeks is not the correct length")
+        print("Max: ", max(i.fitness for i in self.weeks))
+        select = SELECTIONS[self.selection]
+        ranked = rank_weeks(self.weeks)
+        children = []
+        tries = 0
+        while len(children) < self.num_offspring and tries < 2 * self.num_offspring:
+            tries += 1
+            first, second = select_distinct(select, ranked, 2)
+            children.extend(self.crossover(first, second))
+        self.weeks.extend(children[:self.num_offspring])
+
+    ## Records how the population is doing
+    #  @param self
+    #  @param seconds Seconds since the loop started
+    #  @param valid_weeks List of the valid weeks of the generation
+    #  @return none
+    def record_fitness(self, seconds, valid_weeks):
+        """Adds a generation to fitness_history"""
+        fitnesses = [w.fitness for w in self.weeks]
+        if len(fitnesses) == 0:
+            return
+        self.fitness_history.append((seconds, max(fitnesses),
+                                     sum(fitnesses) / float(len(fitnesses)),
+                                     len(valid_weeks)))
+
+    ## Makes a new population when none of the weeks are any good
+    #  @param self
+    #  @param time_limit Seconds the loop runs for, for the loading bar, or None
+    #  @param start_time When the loop started, for the loading bar, or None
+    #  @return none
+    def regenerate_population(self, time_limit = None, start_time = None):
+        """Adds weeks as self.seeding says: 1000 random ones, or
+        CONSTRUCTIVE_POPULATION from the constructive seeder"""
+        # for case two only...reset before generate another 1000
+        if len(self.weeks) >= 1000:
+            for i in range(len(self.weeks)):
+                del self.weeks[0]
+            gc.collect()
+
+        if self.seeding == "constructive":
+            self.generate_constructive_population(self.CONSTRUCTIVE_POPULATION)
+        else:
+            self.generate_starting_population(1000, False, time_limit,
+                                              start_time)
+
+    ## Mutates one of the top weeks if they have all converged
+    #  @param self
+    #  @return none
+    def mutate_if_converged(self):
+        """Invokes guided mutation on a random one of the top 5 weeks when
+        they all have the same fitness, short of the maximum"""
+        if len(self.weeks) >= 5:
+            top_5_min = min(i.fitness for i in self.weeks[0:5])
+            top_5_avg = reduce(lambda x, y: x+y, [w.fitness for w in self.weeks[0:5]]) / 5
+            print("Minimum fitness of the top schedules of the generation:", top_5_min)
+            print("Average fitness of the top schedules of the generation:", top_5_avg)
+            print("Max fitness for any schedule:", self.max_fitness)
+            if top_5_min == top_5_avg and top_5_min != self.max_fitness:
+                print("Invoking guided mutatation")
+
+                # decide a week and mutate it
+                choice = randint(0, 4)
+                self.guided_mutate(self.weeks[choice])
+                self.weeks[choice].update_sections(self.courses)
+                self.calc_fitness(self.weeks[choice])
+
+                # print out results
+                top_5_min = min(i.fitness for i in self.weeks[0:5])
+                top_5_avg = reduce(lambda x, y: x+y, [w.fitness for w in self.weeks[0:5]]) / 5
+                print("Minimum fitness of the top schedules after guided mutation:", top_5_min)
+                print("Average fitness of the top schedules after guided mutation:", top_5_avg)
+
     ## Main loop that evolves and produces more schedules when run 
     #  @param self
     #  @param main tkinter window object
@@ -558,6 +1235,10 @@ class Scheduler:
     #  @return side-effect: self.weeks are filled out
     def evolution_loop(self, main_window_object, minutes_to_run = 1):
         """Main loop of scheduler, run to evolve towards a high fitness score"""
+        if self.engine == "annealing":
+            return self.annealing_loop(main_window_object, minutes_to_run)
+        if self.num_islands > 1:
+            return self.island_loop(main_window_object, minutes_to_run)
         start_time = now() #stopwatch starts
 
         # gui misc page object; for updating the loading bar
@@ -566,8 +1247,6 @@ class Scheduler:
         main_window_object.setup_loading_screen()
         main_window_object.go_to_loading_screen()
 
-        weeks_to_keep = 5
-
         if Counter(map(lambda x: x.name, self.constraints)) !=\
            Counter(map(lambda x: x.name, self.saved_state_of_constraints)):
                self.paused = False
@@ -583,24 +1262,10 @@ class Scheduler:
             
         one_increment = time_limit/40.0
 
-        def week_slice_helper():
-            """Sets self.weeks to the 5 best week options and returns the list of valid weeks"""
-            valid_weeks = filter(lambda x: x.valid, self.weeks)
-            valid_weeks.sort(key=lambda x: x.fitness, reverse=True)
-            if len(valid_weeks) > 0:
-                temp = filter(lambda x: not x.valid, self.weeks)[:weeks_to_keep \
-                                                                    - len(valid_weeks)]
-                temp.sort(key=lambda x: x.fitness, reverse=True)
-                self.weeks = (valid_weeks + temp)[:weeks_to_keep]
-            else:
-                self.weeks = self.weeks[:weeks_to_keep]
-
-
-            return valid_weeks
-
         if not self.paused:
             # Resetting self.weeks will trigger generate_starting_population() below
             self.weeks = []
+            self.fitness_history = []
         else:
             self.paused = False
 
@@ -609,22 +1274,15 @@ class Scheduler:
             # self.gui_loading_info1 = 'Generation counter: ' + str(counter +1)
 
             self.weeks = filter(lambda x: x.complete, self.weeks)
+            # crossover often recreates a parent or another child
+            self.weeks = self.deduplicate_weeks(self.weeks)
 
-            for each_week in self.weeks:
-                each_week.update_sections(self.courses)
-                self.calc_fitness(each_week)
+            self.calc_fitness_batch(self.weeks)
 
             #Case that no schedules are complete or valid
             if len(self.weeks) == 0 or (len(filter(lambda x: x.valid, self.weeks)) == 0 and
                                         total_iterations < 9):
-                # for case two only...reset before generate another 1000
-                if len(self.weeks) >= 1000:
-                    for i in range(len(self.weeks)):
-                        del self.weeks[0]
-                    gc.collect()
-
-                self.generate_starting_population(1000, False, time_limit, 
-                                                  start_time)
+                self.regenerate_population(time_limit, start_time)
                 total_iterations += 1
                 counter += 1
                 time_elapsed = now() - start_time
@@ -632,16 +1290,15 @@ class Scheduler:
                 print("Time left for evolution loop: %d seconds" % (time_limit - time_elapsed))
                 if time_elapsed > time_limit:
                     # need to assess the new weeks
-                    for each_week in self.weeks:
-                        each_week.update_sections(self.courses)
-                        self.calc_fitness(each_week)
+                    self.calc_fitness_batch(self.weeks)
                     print('Time limit reached; final output found')
                     break
                 continue
 
-            valid_weeks = week_slice_helper()
+            valid_weeks = self.select_survivors()
             print("Calculated fitness")
             time_elapsed = now() - start_time
+            self.record_fitness(time_elapsed, valid_weeks)
             self.loading_bar_update(one_increment, time_elapsed, time_limit)
             print("Time left for evolution loop: %d seconds" % (time_limit - time_elapsed))
             if time_elapsed > time_limit:
@@ -651,26 +1308,7 @@ class Scheduler:
 
             print("Number of valid weeks for the generation:", str(len(valid_weeks)))
 
-            if len(self.weeks) >= 5:
-                top_5_min = min(i.fitness for i in self.weeks[0:5])
-                top_5_avg = reduce(lambda x, y: x+y, [w.fitness for w in self.weeks[0:5]]) / 5
-                print("Minimum fitness of the top schedules of the generation:", top_5_min)
-                print("Average fitness of the top schedules of the generation:", top_5_avg)
-                print("Max fitness for any schedule:", self.max_fitness)
-                if top_5_min == top_5_avg and top_5_min != self.max_fitness:
-                    print("Invoking guided mutatation")
-                    
-                    # decide a week and mutate it
-                    choice = randint(0, 4)
-                    self.guided_mutate(self.weeks[choice])
-                    self.weeks[choice].update_sections(self.courses)
-                    self.calc_fitness(self.weeks[choice])
-
-                    # print out results
-                    top_5_min = min(i.fitness for i in self.weeks[0:5])
-                    top_5_avg = reduce(lambda x, y: x+y, [w.fitness for w in self.weeks[0:5]]) / 5
-                    print("Minimum fitness of the top schedules after guided mutation:", top_5_min)
-                    print("Average fitness of the top schedules after guided mutation:", top_5_avg)
+            self.mutate_if_converged()
 
             # self.gui_loading_info2 = "Minimum fitness of the top schedules of the generation: " + \
             #                          str(min(i.fitness for i in self.weeks))
@@ -684,13 +1322,11 @@ class Scheduler:
                     break
 
             # prepare for breed
-            self.generate_starting_population(5)
-            for each_week in self.weeks:
-                each_week.update_sections(self.courses)
-                self.calc_fitness(each_week)
+            self.generate_starting_population(self.num_random)
+            self.calc_fitness_batch(self.weeks)
             # breed
             print("Breed started with ", len(self.weeks), " weeks.")
-            self.breed()
+            self.breed_population()
             print("Breed complete")
 
             total_iterations += 1
@@ -707,89 +1343,106 @@ class Scheduler:
                     main_window_object.go_to_constraints_screen()
                     break
 
+        if len(self.weeks) > 5 and self.population_size > 5:
+            # the GUI shows the first 5
+            self.keep_best_weeks(5)
+        self.print_constraint_report()
+        self.close_worker_pool()
         if not self.paused:
             print("Final number of generations: ", total_iterations + 1)
             main_window_object.finished_running()
 
-    ## Provides all time slots matching in a given week
+    ## Evolves several populations at once, with migration between them
     #  @param self
-    #  @param  A Function that finds all available time slots
-    #  @return none
-    def time_slot_available(self, day, first_time_slot):
-        for room in day.rooms:
-            if room.number != first_time_slot.room.number:
-                continue
-
-            for t_slot in room:
-                if t_slot == first_time_slot and t_slot.course == None:
-                    return (t_slot, True)
-
-        return (None, False)
-
-    ## Finds index of time slot object in list of time slots for week
+    #  @param main tkinter window object
+    #  @param number of minutes to run, int
+    #  @return side-effect: self.weeks are filled out
+    def island_loop(self, main_window_object, minutes_to_run = 1):
+        """evolution_loop with num_islands populations, each in its own
+        process (see islands.IslandModel). Keeps the 5 best weeks of all
+        the islands and prints how each island did. Pausing to ask to keep
+        running is not supported here"""
+        start_time = now()
+        self.loading_screen = main_window_object.misc_page
+        main_window_object.setup_loading_screen()
+        main_window_object.go_to_loading_screen()
+        time_limit = 60 * minutes_to_run
+        one_increment = time_limit/40.0
+        self.paused = False
+        self.close_worker_pool()
+
+        best = {}
+        def report(island, generation, seconds, fitness, num_valid, migrants_taken):
+            if fitness > best.get(island, None):
+                best[island] = fitness
+                print("Island %d: generation %d, best fitness %s, %d valid" %
+                      (island, generation, fitness, num_valid))
+            self.loading_bar_update(one_increment, now() - start_time, time_limit)
+
+        self.island_model = IslandModel(self, self.num_islands)
+        self.weeks = self.island_model.run(time_limit, report)
+        self.weeks = filter(lambda x: x.complete, self.weeks)
+        self.weeks = self.deduplicate_weeks(self.weeks)
+        self.calc_fitness_batch(self.weeks)
+        valid_weeks = self.keep_best_weeks(5)
+        print("Number of valid weeks from the islands:", str(len(valid_weeks)))
+        self.island_model.print_report()
+        self.print_constraint_report()
+        main_window_object.finished_running()
+
+    ## Runs simulated annealing in place of the genetic algorithm
     #  @param self
-    #  @param  A time object that finds the index of time slots in a week
+    #  @param main_window_object The GUI's main window
+    #  @param minutes_to_run Time budget
     #  @return none
-    def find_index(self, time_slot, time_slot_list):
-        """Finds index of time slot object in list of time slots for week"""
-        counter = 0
-        for each_slot in time_slot_list:
-            if each_slot.room.number == time_slot.room.number and \
-               each_slot.start_time == time_slot.start_time and \
-               each_slot.end_time == each_slot.end_time and \
-               each_slot.room.day.day_code == time_slot.room.day.day_code:
-                return counter
-            counter += 1
-        print("Index not found")
-        return
-
-
-    ## Generates a dictionary describing the trends of the list of the time slots
-    #  @param self
-    #  @param  a dictionary object that list the time slot objects
-    #  @return row_dict
-    def assess_time_slot_row_for_open_slots(self, time_slots):
-        """Generates a dictionary describing the trends of the list of time slots
-        IN: list of time slot objects
-        OUT: dictionary describing type of time slots, list of time slot objects,
-             and open days
-        Type: 0 for undefined, 1 for mwf, 2 for tr, 3 for both"""
-        row_dict = {'days': '', 'time_slots': [], 'type': 0}
-        for each_time_slot in time_slots:
-            if each_time_slot.course is None:
-                row_dict['time_slots'].append(each_time_slot)
-                row_dict['days'] += each_time_slot.day
-
-                if each_time_slot.isTR and row_dict['type'] == 0:
-                    row_dict['type'] = 2
-                elif not each_time_slot.isTR and row_dict['type'] == 0:
-                    row_dict['type'] = 1
-                elif (each_time_slot.isTR and row_dict['type'] == 1) or \
-                     (not each_time_slot.isTR and row_dict['type'] == 2):
-                    row_dict['type'] = 3
-                elif (not each_time_slot.isTR and row_dict['type'] == 1) or \
-                     (each_time_slot.isTR and row_dict['type'] == 2):
-                    pass
-                else:
-                    print(each_time_slot.isTR)
-                    print(row_dict['type'])
-                    raise MalformedTimeslotError("Timeslot does not have a isTR attribute")
-
-        return row_dict
-
+    def annealing_loop(self, main_window_object, minutes_to_run = 1):
+        """Anneals the best valid week of the population (see
+        annealing.SimulatedAnnealing) for what is left of the time, making
+        a population first as evolution_loop does if there is no valid
+        week. Keeps the 5 best weeks met. Pausing to ask to keep running is
+        not supported here"""
+        start_time = now()
+        self.loading_screen = main_window_object.misc_page
+        main_window_object.setup_loading_screen()
+        main_window_object.go_to_loading_screen()
+        time_limit = 60 * minutes_to_run
+        one_increment = time_limit/40.0
+        self.paused = False
+        self.fitness_history = []
 
-    ## Assigns courses to the time slot and removes time slot from list of time slots
-    #  @param self
-    #  @param  a function that deletes time slot from list of time slots
-    #  @return none
-    def assign_and_remove(self, course, time_slot, slots_list, week):
-        """Assigns course to time slot and removes time slot from list of time slots"""
-        #i = self.find_index(time_slot, slots_list)
-        schedule_slot = week.find_matching_time_slot(time_slot)
-        i = self.find_index(schedule_slot, slots_list)
-        schedule_slot.set_course(course)
-        del(slots_list[i])
+        valid_weeks = []
+        total_iterations = 0
+        while True:
+            self.weeks = filter(lambda x: x.complete, self.weeks)
+            self.calc_fitness_batch(self.weeks)
+            valid_weeks = self.keep_best_weeks(5)
+            if len(valid_weeks) > 0 or total_iterations >= 10 or \
+               now() - start_time > time_limit:
+                break
+            self.regenerate_population(time_limit, start_time)
+            total_iterations += 1
+        if len(valid_weeks) == 0:
+            print("No valid week to anneal")
+            self.print_constraint_report()
+            self.close_worker_pool()
+            main_window_object.finished_running()
+            return
 
+        print("Annealing a week of fitness", valid_weeks[0].fitness)
+        def report(seconds, temperature, fitness, best_fitness, steps, kept):
+            self.fitness_history.append((now() - start_time, best_fitness, fitness, 1))
+            self.loading_bar_update(one_increment, now() - start_time, time_limit)
+
+        annealer = SimulatedAnnealing(self, self.cooling, self.start_temperature,
+                                      self.end_temperature)
+        self.weeks = annealer.run(valid_weeks[0],
+                                  max(0, time_limit - (now() - start_time)), report)
+        self.calc_fitness_batch(self.weeks)
+        valid_weeks = self.keep_best_weeks(5)
+        print("Best fitness after annealing:", valid_weeks[0].fitness)
+        self.print_constraint_report()
+        self.close_worker_pool()
+        main_window_object.finished_running()
 
     ## Filters tr slots, mwf slots, prescheduled courses, and regular courses
     #  @param self
@@ -822,219 +1475,131 @@ class Scheduler:
                 each_time_slot.set_course(course)
 
 
-    '''def schedule_5_hour_course(self, course, list_of_slots, this_week):
-        """Randomly schedule a 5 hour course"""
-        if course.credit != 5:
-            raise FilterError("Schedule 5 hour course")
-
-        random_slot = choice(mwf_slots)
-        current_pool = deepcopy(mwf_slots)
-        done = False
-        while len(current_pool) > 0 and not done:
-            possibilities = this_week.find_matching_time_slot_row(random_slot)
-            possibilities = self.assess_time_slot_row_for_open_slots(possibilities)
-            # each day open for that time and room
-            if len(possibilities['time_slots']) == 5:
-                for each_assignee in possibilities['time_slots']:
-                    self.assign_and_remove(
-                        course, each_assignee, list_of_time_slots, this_week)
-                done = True
-            # case that cannot schedule for this time and room
-            else:
-                # remove this timeslot and the other unoccupied in its
-                # week from temp pool
-                for to_remove in possibilities['time_slots']:
-                    i = self.find_index(to_remove, current_pool)
-                    del(current_pool[i])
-                # get a new random time slot
-                random_slot = choice(current_pool)
-        #status
-        return not done'''
+    ## Places a course in a free placement drawn at random
+    #  @param self
+    #  @param course A course object
+    #  @param kinds The kinds of placement it may take (see Topology.placements)
+    #  @param this_week A week to schedule the course in
+    #  @param free_rows A FreeRows object of the week
+    #  @param accept Function of the slot indices saying if they will do, or None
+    #  @return True if it could not be scheduled
+    def schedule_in_free_row(self, course, kinds, this_week, free_rows, accept = None):
+        """Fills the slots of a free placement of the kinds with the course"""
+        slots = free_rows.sample(kinds, accept)
+        if slots is None:
+            return True
+        for each_index in slots:
+            this_week.assign_slot(each_index, course)
+        free_rows.take(slots)
+        return False
 
 
     ## Randomly schedules 4 hour courses
     #  @param self
     #  @param  A function that generates 4 hour classes with list of time slots  
     #  @return not done
-    def schedule_4_hour_course(self, course, list_of_time_slots, this_week):
-        """Randomly schedule a 4 hour course"""
+    def schedule_4_hour_course(self, course, list_of_time_slots, this_week,
+                               free_rows = None, accept = None):
+        """Randomly schedule a 4 hour course: mwf and one of t or r of a
+        row. Draws from free_rows, or the rows free in list_of_time_slots"""
         if course.credit != 4:
             raise FilterError("Schedule 4 hour course")
-
-        random_slot = choice(list_of_time_slots)
-        current_pool = copy(list_of_time_slots)
-        done = False
-        while len(current_pool) > 0 and not done:
-            possibilities = this_week.find_matching_time_slot_row(random_slot)
-            possibilities = self.assess_time_slot_row_for_open_slots(possibilities)
-            # each day open for that time and room
-            if len(possibilities['time_slots']) == 5:
-                #MWF
-                for each_slot in possibilities['time_slots']:
-                    if each_slot.day in 'mwf':
-                        self.assign_and_remove(
-                            course, each_slot, list_of_time_slots, this_week)
-                #T or R
-                j = randint(0, 1)
-                if j:
-                    for each_slot in possibilities['time_slots']:
-                        if each_slot.day == 't':
-                            self.assign_and_remove(
-                                course, each_slot, list_of_time_slots, this_week)  # T
-                else:
-                    for each_slot in possibilities['time_slots']:
-                        if each_slot.day == 'r':
-                            self.assign_and_remove(
-                                course, each_slot, list_of_time_slots, this_week)  # R
-                done = True
-            # case that mwf and either t or r are open
-            elif all([x in possibilities['days'] for x in 'mwf']) and \
-                    (all([x in possibilities['days'] for x in 't']) or \
-                     all([x in possibilities['days'] for x in 'r'])):
-                for each_slot in possibilities['time_slots']:
-                    if each_slot.day in 'mwf':
-                        self.assign_and_remove(
-                            course, each_slot, list_of_time_slots, this_week)
-                if all([x in possibilities['days'] for x in 't']):
-                    for each_slot in possibilities['time_slots']:
-                        if each_slot.day in 't':
-                            self.assign_and_remove(
-                                course, each_slot, list_of_time_slots, this_week)
-                else:
-                    for each_slot in possibilities['time_slots']:
-                        if each_slot.day in 'r':
-                            self.assign_and_remove(
-                                course, each_slot, list_of_time_slots, this_week)
-                done = True
-            # case that cannot schedule for this time and room
-            else:
-                # remove this timeslot and the other unoccupied in its
-                # week from temp pool
-                for to_remove in possibilities['time_slots']:
-                    i = self.find_index(to_remove, current_pool)
-                    del(current_pool[i])
-                # get a new random time slot
-                random_slot = choice(current_pool)
-        #status
-        return not done
+        if free_rows is None:
+            free_rows = FreeRows(self.topology, this_week,
+                                 [each_slot.index for each_slot in list_of_time_slots])
+        return self.schedule_in_free_row(course, ["mwf_tr"], this_week, free_rows, accept)
 
 
     ## Randomly schedules 3 hour courses
     #  @param self
     #  @param  A function that generates 3 hour classes with list of time slots  
     #  @return not done
-    def schedule_3_hour_course(self, course, list_of_time_slots, this_week):
-        """Randomly schedule a 3 hour course"""
+    def schedule_3_hour_course(self, course, list_of_time_slots, this_week,
+                               free_rows = None, accept = None):
+        """Randomly schedule a 3 hour course: mwf of a mwf row, or a tr row.
+        Draws from free_rows, or the rows free in list_of_time_slots"""
         if course.credit != 3:
             raise FilterError("Schedule 3 hour course")
-
-        random_slot = choice(list_of_time_slots)
-        current_pool = copy(list_of_time_slots)
-        done = False
-        while len(current_pool) > 0 and not done:
-            possibilities = this_week.find_matching_time_slot_row(random_slot)
-            possibilities = self.assess_time_slot_row_for_open_slots(possibilities)
-            # each day open for that time and room
-            if len(possibilities['time_slots']) == 5:
-                # MWF
-                if not random_slot.isTR:
-                    for each_slot in possibilities['time_slots']:
-                        if each_slot.day in 'mwf':
-                            self.assign_and_remove(
-                                course, each_slot, list_of_time_slots, this_week)
-                # TR
-                else:
-                    for each_slot in possibilities['time_slots']:
-                        if each_slot.day in 'tr':
-                            self.assign_and_remove(
-                                course, each_slot, list_of_time_slots, this_week)
-                done = True
-            # case that mwf is open, but not tr
-            elif all([x in possibilities['days'] for x in 'mwf']):
-                for each_slot in possibilities['time_slots']:
-                    if each_slot.day in 'mwf':
-                        self.assign_and_remove(
-                            course, each_slot, list_of_time_slots, this_week)
-                done = True
-            # case that tr is open, but not mwf
-            elif all([x in possibilities['days'] for x in 'tr']) and possibilities['type'] == 2:
-                for each_slot in possibilities['time_slots']:
-                    if each_slot.day in 'tr':
-                        self.assign_and_remove(
-                            course, each_slot, list_of_time_slots, this_week)
-                done = True
-            # case that cannot schedule for this time and room
-            else:
-                # remove this timeslot and the other unoccupied in its
-                # week from temp pool
-                for to_remove in possibilities['time_slots']:
-                    i = self.find_index(to_remove, current_pool)
-                    del(current_pool[i])
-                # get a new random time slot
-                random_slot = choice(current_pool)
-        #status
-        return not done
+        if free_rows is None:
+            free_rows = FreeRows(self.topology, this_week,
+                                 [each_slot.index for each_slot in list_of_time_slots])
+        return self.schedule_in_free_row(course, ["mwf", "tr"], this_week, free_rows, accept)
 
 
     ## Randomly schedules 1 hour courses
     #  @param self
     #  @param  A function that generates 1 hour classes with list of time slots  
     #  @return not done
-    def schedule_1_hour_course(self, course, list_of_slots, this_week):
-        """Randomly schedule a 1 hour course"""
+    def schedule_1_hour_course(self, course, list_of_slots, this_week,
+                               free_rows = None, accept = None):
+        """Randomly schedule a 1 hour course: one slot of a tr row for a lab,
+        of a mwf row otherwise. Draws from free_rows, or the rows free in
+        list_of_slots"""
         if course.credit != 1:
             raise FilterError("Schedule 1 hour course")
+        if free_rows is None:
+            free_rows = FreeRows(self.topology, this_week,
+                                 [each_slot.index for each_slot in list_of_slots])
+        return self.schedule_in_free_row(course, self.topology.placement_kinds(course),
+                                         this_week, free_rows, accept)
 
-        random_slot = choice(list_of_slots)
-        current_pool = copy(list_of_slots)
-        done = False
-        while len(current_pool) > 0 and not done:
-            possibilities = this_week.find_matching_time_slot_row(random_slot)
-            possibilities = self.assess_time_slot_row_for_open_slots(possibilities)
-            if course.is_lab: # tr
-                # each day open for that time and room
-                if possibilities['type'] == 2:
-                    chosen = random.choice(possibilities['time_slots'])
-                    self.assign_and_remove(
-                            course, chosen, list_of_slots, this_week)
-                    done = True
-
-                # case that cannot schedule for this time and room
-                else:
-                    # remove this timeslot and the other unoccupied in its
-                    # week from temp pool
-                    for to_remove in possibilities['time_slots']:
-                        i = self.find_index(to_remove, current_pool)
-                        del(current_pool[i])
-                    # get a new random time slot
-                    random_slot = choice(current_pool)
-            else: # mwf
-                # each day open for that time and room
-                if possibilities['type'] == 1:
-                    chosen = random.choice(possibilities['time_slots'])
-                    self.assign_and_remove(
-                            course, chosen, list_of_slots, this_week)
-                    done = True
-
-                # case that cannot schedule for this time and room
-                else:
-                    # remove this timeslot and the other unoccupied in its
-                    # week from temp pool
-                    for to_remove in possibilities['time_slots']:
-                        i = self.find_index(to_remove, current_pool)
-                        del(current_pool[i])
-                    # get a new random time slot
-                    random_slot = choice(current_pool)
-        #status
-        return not done
+
+    ## Randomly schedules a course by its credit hours
+    #  @param self
+    #  @param course A course object of 1, 3 or 4 credit hours
+    #  @param list_of_slots List of empty time slots it may use
+    #  @param this_week A week to schedule the course in
+    #  @param free_rows A FreeRows object of the week, or None to find it
+    #  @param accept Function of the slot indices saying if they will do, or None
+    #  @return True if it could not be scheduled
+    def schedule_by_credit(self, course, list_of_slots, this_week, free_rows = None, accept = None):
+        """Calls the generator for the course's credit hours"""
+        if course.credit == 4:
+            return self.schedule_4_hour_course(course, list_of_slots, this_week, free_rows, accept)
+        elif course.credit == 3:
+            return self.schedule_3_hour_course(course, list_of_slots, this_week, free_rows, accept)
+        elif course.credit == 1:
+            return self.schedule_1_hour_course(course, list_of_slots, this_week, free_rows, accept)
+        raise FilterError("Schedule by credit")
+
+
+    ## Gives the tests a placement of a course must pass
+    #  @param self
+    #  @param course A course object
+    #  @return (fits, allowed): functions of a list of slot indices
+    def placement_tests(self, course):
+        """fits says if the room of the slots is big enough and has
+        computers if the course needs them; allowed also says if the slots
+        are in the course's domain (see course_domains), and is None if
+        the course has no domain"""
+        rooms = self.topology.rooms
+        slot_infos = self.topology.slots
+        room_fits = [not (course.capacity > 70 and not capacity > 70) and
+                     not (course.needs_computers and not has_computers)
+                     for building, number, capacity, has_computers in rooms]
+        domain = None
+        course_index = self.course_ids.get(course.code)
+        if course_index is not None:
+            domain = self.course_domains()[course_index]
+
+        def fits(slots):
+            return room_fits[slot_infos[slots[0]].room_index]
+
+        def allowed(slots):
+            return fits(slots) and domain.issuperset(slots)
+
+        if domain is None:
+            return (fits, None)
+        return (fits, allowed)
 
 
     ## Randomly Fills in schedules 
     #  @param self
     #  @param  A function that generates random classes with list of slots time slots  
     #  @return none
-    def randomly_fill_schedule(self, week_to_fill, courses_list, list_of_slots_to_fill):
-        """Fills in random schedule for given week, courses, and time slots"""
+    def randomly_fill_schedule(self, week_to_fill, courses_list, list_of_slots_to_fill = None):
+        """Fills in random schedule for given week, courses, and time slots
+        (all the empty slots of the week if not given)"""
         filtered = self.filter_for_generator(courses_list, list_of_slots_to_fill)
         prescheduled = filtered['prescheduled']
         regular = filtered['regular'] #regular courses...not prescheduled
@@ -1046,29 +1611,24 @@ class Scheduler:
                 week_to_fill.valid = False
                 week_to_fill.complete = False
 
+        # the placements still free among the slots to fill, kept up to date
+        # as courses are placed, so each course draws one in constant time
+        slot_indices = None
+        if list_of_slots_to_fill is not None:
+            slot_indices = [each_slot.index for each_slot in list_of_slots_to_fill]
+        free_rows = FreeRows(self.topology, week_to_fill, slot_indices)
         for each_course in regular:
-            course_slots = filter(lambda x: x.course is None, list_of_slots_to_fill)
-
-            if each_course.capacity > 70:
-                course_slots = filter(lambda x: x.room.capacity > 70, course_slots)
-
-            if each_course.needs_computers:
-                course_slots = filter(lambda x: x.room.has_computers, course_slots)
-
-            if len(course_slots) == 0:
-                print('failure: incomplete schedule')
-                week_to_fill.valid = False
-                week_to_fill.complete = False
-                return
-
-            '''if each_course.credit == 5:
-                failure = self.schedule_5_hour_course(each_course, course_slots, week_to_fill)'''
-            if each_course.credit == 4:
-                failure = self.schedule_4_hour_course(each_course, course_slots, week_to_fill)
-            elif each_course.credit == 3:
-                failure = self.schedule_3_hour_course(each_course, course_slots, week_to_fill)
-            elif each_course.credit == 1:
-                failure = self.schedule_1_hour_course(each_course, course_slots, week_to_fill)
+            # keep to the slots the mandatory constraints allow, if possible
+            fits, allowed = self.placement_tests(each_course)
+            if each_course.credit in [1, 3, 4]:
+                failure = True
+                if allowed is not None:
+                    failure = self.schedule_by_credit(each_course, None, week_to_fill,
+                                                      free_rows, allowed)
+                if failure:
+                    # no room for it in the allowed slots; use the others too
+                    failure = self.schedule_by_credit(each_course, None, week_to_fill,
+                                                      free_rows, fits)
             else:
                 #error
                 print("!!!Tried to schedule for an invalid number of credit hours!!!")
@@ -1093,21 +1653,39 @@ class Scheduler:
         if just_one and len(self.weeks) == 0:
             self.weeks.append(Week(self.rooms, self))
             one_week = self.weeks[0]
-            list_slots = one_week.list_time_slots()
-            self.randomly_fill_schedule(one_week, self.courses, list_slots)
+            self.randomly_fill_schedule(one_week, self.courses)
             return None
         #Full generation
+        if time_limit is not None:
+            one_increment = time_limit/40.0
+        pool = self.worker_pool()
+        if pool is not None and num_to_generate >= self.POOL_MIN_WEEKS:
+            # the chunk seeds come from this process's random numbers, so
+            # seeding it makes the weeks the same for any number of workers
+            tasks = []
+            for first in range(0, num_to_generate, self.GENERATION_CHUNK):
+                tasks.append((random.getrandbits(32),
+                              min(self.GENERATION_CHUNK, num_to_generate - first)))
+            counter = 0
+            for weeks in pool.generate(tasks):
+                self.weeks.extend(weeks)
+                counter += len(weeks)
+                if counter % 50 == 0 and start_time is not None:
+                    current_elapsed_seconds = now() - start_time
+                    self.loading_bar_update(one_increment, current_elapsed_seconds, time_limit)
+            print("Generated %d schedules" % num_to_generate)
+            return None
+
         old_number_of_schedules = len(self.weeks)
         for x in range(num_to_generate):
             self.weeks.append(Week(self.rooms, self))
 
         counter = 0
-        if time_limit is not None:
-            one_increment = time_limit/40.0
         for each_week in self.weeks[old_number_of_schedules:]:
             counter += 1
-            list_slots = each_week.list_time_slots()
-            self.randomly_fill_schedule(each_week, self.courses, list_slots)
+            self.randomly_fill_schedule(each_week, self.courses)
+            if self.room_matching:
+                self.assign_rooms(each_week)
 
             if counter % 50 == 0 and start_time is not None:
                 current_elapsed_seconds = now() - start_time
@@ -1122,3 +1700,33 @@ class Scheduler:
             print("Could not schedule")
         print("Generated %d schedules" % num_to_generate)
         return None
+
+    ## Generates a starting population passing the hard constraints
+    #  @param self
+    #  @param num_to_generate Number of weeks to add
+    #  @return none
+    def generate_constructive_population(self, num_to_generate = 50):
+        """Adds weeks built by ConstructiveSeeder, with the seeds
+        constructive_seed, constructive_seed + 1, ... so the same scheduler
+        makes the same weeks. Prescheduled courses are then filled in as
+        randomly_fill_schedule does; a week the seeder gives up on is
+        filled in randomly instead
+        IN: number of weeks
+        OUT: weeks added to self.weeks"""
+        this_seeder = ConstructiveSeeder(self)
+        prescheduled = filter(lambda x: x.is_prescheduled, self.courses)
+        num_constructed = 0
+        for x in range(num_to_generate):
+            each_week = this_seeder.build_week(self.constructive_seed)
+            self.constructive_seed += 1
+            if each_week is None:
+                each_week = Week(self.rooms, self)
+                self.randomly_fill_schedule(each_week, self.courses)
+            else:
+                num_constructed += 1
+                if len(prescheduled) > 0:
+                    self.randomly_fill_schedule(each_week, prescheduled,
+                                                each_week.find_empty_time_slots())
+            self.weeks.append(each_week)
+        print("Generated %d schedules, %d by construction" % (num_to_generate, num_constructed))
+        return None
@@ -0,0 +1,276 @@
+from __future__ import print_function
+from structures import *
+from constraint import *
+from evaluator import instructor_name
+from random import Random
+
+
+class ConstructiveSeeder:
+
+    """Builds weeks that pass the hard constraints by construction, as a
+    graph colouring. Courses are the vertices; two courses are joined if
+    they share an instructor (no overlap, no back-to-back meetings in
+    different buildings) or are sections of the same course (no common
+    start on a common day). The colours are the placements the generator
+    could make: a time row and room, with its days taken as
+    schedule_N_hour_course takes them, kept to the course's domain (see
+    Scheduler.course_domains) and the capacity and computer filters of
+    randomly_fill_schedule.
+
+    Courses are placed most constrained first (fewest placements left,
+    then most neighbours) in a free placement, preferring ones that do not
+    overlap a not-prereq already placed. Placing a course rules out the
+    placements of the others that would clash with it in its room or
+    through an edge; when one is left with none, the placement is undone
+    and the next tried, backtracking to earlier courses if need be.
+    The random choices come from the seed, so the same seed gives the
+    same week. Prescheduled courses are left to randomly_fill_schedule"""
+
+    # placements tried per course before a week is given up
+    MAX_STEPS_PER_COURSE = 20
+
+    def __init__(self, this_scheduler):
+        self.scheduler = this_scheduler
+        topology = this_scheduler.topology
+        self.topology = topology
+        courses = this_scheduler.courses
+        self.courses = courses
+        domains = this_scheduler.course_domains()
+
+        # candidates: (course index, slot indices, time id, day mask,
+        # start minutes, end minutes, building)
+        self.candidates = []
+        self.course_candidates = [[] for c in courses]
+        self.slot_candidates = [[] for s in topology.slots]
+        for course_index in range(len(courses)):
+            each_course = courses[course_index]
+            if each_course.is_prescheduled:
+                continue
+            course_patterns = []
+            for kind in topology.placement_kinds(each_course):
+                course_patterns.extend(topology.placements[kind])
+            domain = domains[course_index]
+            for each_pattern in course_patterns:
+                first_slot = topology.slots[each_pattern[0]]
+                building, number, capacity, has_computers = topology.rooms[first_slot.room_index]
+                if each_course.capacity > 70 and not capacity > 70:
+                    continue
+                if each_course.needs_computers and not has_computers:
+                    continue
+                if domain is not None and not domain.issuperset(each_pattern):
+                    continue
+                day_mask = 0
+                for each_index in each_pattern:
+                    day_mask |= topology.slots[each_index].day_mask
+                candidate = len(self.candidates)
+                self.candidates.append((course_index, each_pattern, first_slot.time_id, day_mask,
+                                        first_slot.start_minutes, first_slot.end_minutes,
+                                        building))
+                self.course_candidates[course_index].append(candidate)
+                for each_index in each_pattern:
+                    self.slot_candidates[each_index].append(candidate)
+
+        # edges: course index -> {neighbour: 1 for instructor, 2 for
+        # section, 3 for both}, and the not-prereqs to keep apart if possible
+        self.instructors = [instructor_name(c) for c in courses]
+        self.neighbours = [{} for c in courses]
+        by_instructor = {}
+        for course_index in range(len(courses)):
+            by_instructor.setdefault(self.instructors[course_index], []).append(course_index)
+        for kind, groups in [(1, by_instructor.values()), (2, this_scheduler.section_groups)]:
+            for each_group in groups:
+                for a in each_group:
+                    for b in each_group:
+                        if a != b:
+                            self.neighbours[a][b] = self.neighbours[a].get(b, 0) | kind
+        self.not_prereqs = [set() for c in courses]
+        for each_constraint in this_scheduler.constraints:
+            if each_constraint.func is avoid_overlap_within_csc:
+                for each_pair in compiled_prereq_pairs(each_constraint.args[0], this_scheduler):
+                    self.not_prereqs[each_pair[1]].add(each_pair[2])
+                    self.not_prereqs[each_pair[2]].add(each_pair[1])
+
+    ## Builds one week
+    #  @param self
+    #  @param seed The seed of the random choices
+    #  @return week object, or None if it could not place every course
+    def build_week(self, seed):
+        """Places every course that is not prescheduled, backtracking at
+        most MAX_STEPS_PER_COURSE placements per course, and returns the
+        week, or None if it gave up
+        IN: seed (any hashable)
+        OUT: week object or None"""
+        self.rng = Random(seed)
+        # per candidate, how many placements rule it out
+        self.blocked = [0] * len(self.candidates)
+        self.num_free = [len(each) for each in self.course_candidates]
+        self.placed = {}
+        # instructor name -> per day index the time ids of its meetings
+        self.meetings = {}
+        unplaced = set([c for c in range(len(self.courses))
+                        if not self.courses[c].is_prescheduled])
+        # a course without placements cannot be seeded at all
+        for each_course in unplaced:
+            if self.num_free[each_course] == 0:
+                return None
+
+        budget = self.MAX_STEPS_PER_COURSE * max(1, len(unplaced))
+        steps = 0
+        stack = []
+        course_index = self.select(unplaced)
+        options = self.order_options(course_index)
+        position = 0
+        while course_index is not None:
+            placed = False
+            while position < len(options) and steps < budget:
+                candidate = options[position]
+                position += 1
+                if self.blocked[candidate] > 0 or not self.fits_timeline(candidate):
+                    continue
+                steps += 1
+                trail, dead_end = self.place(candidate)
+                if dead_end:
+                    self.unplace(candidate, trail)
+                    continue
+                unplaced.discard(course_index)
+                stack.append((course_index, options, position, candidate, trail))
+                placed = True
+                break
+            if placed:
+                course_index = self.select(unplaced)
+                if course_index is not None:
+                    options = self.order_options(course_index)
+                    position = 0
+            elif len(stack) == 0 or steps >= budget:
+                return None
+            else:
+                # go back to the last course placed and try its next one
+                course_index, options, position, candidate, trail = stack.pop()
+                self.unplace(candidate, trail)
+                unplaced.add(course_index)
+
+        this_week = Week(self.scheduler.rooms, self.scheduler)
+        for each_course, candidate in self.placed.items():
+            for each_index in self.candidates[candidate][1]:
+                this_week.set_slot(each_index, each_course)
+        return this_week
+
+    def select(self, unplaced):
+        """The unplaced course with the fewest free placements, then the
+        most neighbours; None once all are placed"""
+        best = None
+        best_key = None
+        for each_course in unplaced:
+            key = (self.num_free[each_course], -len(self.neighbours[each_course]),
+                   self.rng.random())
+            if best_key is None or key < best_key:
+                best = each_course
+                best_key = key
+        return best
+
+    def order_options(self, course_index):
+        """The free placements of a course in random order, those clashing
+        with fewer placed not-prereqs first"""
+        options = [q for q in self.course_candidates[course_index] if self.blocked[q] == 0]
+        self.rng.shuffle(options)
+        placed_others = [self.placed[o] for o in self.not_prereqs[course_index]
+                         if o in self.placed]
+        if len(placed_others) > 0:
+            options.sort(key = lambda q: len([o for o in placed_others
+                                              if self.prereq_clash(q, o)]))
+        return options
+
+    def prereq_clash(self, a, b):
+        """Two placements overlap as avoid_overlap_within_csc sees it"""
+        a = self.candidates[a]
+        b = self.candidates[b]
+        return (a[3] & b[3]) != 0 and not (a[5] < b[4] or a[4] > b[5])
+
+    def clash(self, a, b, kind):
+        """Two placements of neighbours break the edge between them"""
+        a = self.candidates[a]
+        b = self.candidates[b]
+        # instructor_conflict compares first slots whatever their days
+        if kind & 1 and self.topology.overlap[a[2]][b[2]]:
+            return True
+        if a[3] & b[3] == 0:
+            return False
+        if kind & 1:
+            if self.topology.sequential[a[2]][b[2]] and a[6] != b[6]:
+                return True
+        if kind & 2:
+            if a[4] == b[4]:
+                return True
+        return False
+
+    def fits_timeline(self, candidate):
+        """False if the placement would make a meeting of the instructor
+        back-to-back with two others (see instructor_timeline_flags)"""
+        course_index, slots, time_id, day_mask = self.candidates[candidate][:4]
+        days = self.meetings.get(self.instructors[course_index])
+        if days is None:
+            return True
+        sequential = self.topology.sequential
+        for day_index in range(5):
+            if not day_mask & (1 << day_index):
+                continue
+            meetings = days[day_index]
+            num_sequential = 0
+            for i in range(len(meetings)):
+                if sequential[time_id][meetings[i]]:
+                    num_sequential += 1
+                    if num_sequential >= 2:
+                        return False
+                    for j in range(len(meetings)):
+                        if j != i and sequential[meetings[i]][meetings[j]]:
+                            return False
+        return True
+
+    def place(self, candidate):
+        """Places a candidate, ruling out the placements that clash with
+        it. Returns the ones ruled out, and whether an unplaced course was
+        left without any"""
+        course_index, slots, time_id, day_mask = self.candidates[candidate][:4]
+        hits = set()
+        for each_index in slots:
+            for each_block in self.topology.room_overlaps[each_index]:
+                hits.update(self.slot_candidates[each_block])
+        for each_other, kind in self.neighbours[course_index].iteritems():
+            if each_other in self.placed:
+                continue
+            for q in self.course_candidates[each_other]:
+                if self.clash(candidate, q, kind):
+                    hits.add(q)
+
+        trail = []
+        dead_end = False
+        for q in hits:
+            other = self.candidates[q][0]
+            if other == course_index or other in self.placed:
+                continue
+            self.blocked[q] += 1
+            trail.append(q)
+            if self.blocked[q] == 1:
+                self.num_free[other] -= 1
+                if self.num_free[other] == 0:
+                    dead_end = True
+
+        self.placed[course_index] = candidate
+        days = self.meetings.setdefault(self.instructors[course_index], [[], [], [], [], []])
+        for day_index in range(5):
+            if day_mask & (1 << day_index):
+                days[day_index].append(time_id)
+        return trail, dead_end
+
+    def unplace(self, candidate, trail):
+        """Undoes place"""
+        course_index, slots, time_id, day_mask = self.candidates[candidate][:4]
+        for q in trail:
+            self.blocked[q] -= 1
+            if self.blocked[q] == 0:
+                self.num_free[self.candidates[q][0]] += 1
+        del self.placed[course_index]
+        days = self.meetings[self.instructors[course_index]]
+        for day_index in range(5):
+            if day_mask & (1 << day_index):
+                days[day_index].remove(time_id)
@@ -0,0 +1,100 @@
+from __future__ import print_function
+from random import randint, random, choice
+
+# weeks that meet in each tournament of tournament_select
+TOURNAMENT_SIZE = 3
+
+
+## Orders weeks from best to worst
+#  @param weeks A list of week objects
+#  @return list of week objects
+def rank_weeks(weeks):
+    """Valid weeks first, then by fitness, best first"""
+    return sorted(weeks, key = lambda x: (x.valid, x.fitness), reverse = True)
+
+
+## Picks weeks by tournament
+#  @param weeks A list of week objects, best first (see rank_weeks)
+#  @param count Number of weeks to pick
+#  @return list of week objects
+def tournament_select(weeks, count):
+    """Each pick is the best of TOURNAMENT_SIZE weeks drawn at random"""
+    picks = []
+    for x in range(count):
+        picks.append(weeks[min([randint(0, len(weeks) - 1) for y in range(TOURNAMENT_SIZE)])])
+    return picks
+
+
+## Picks weeks by rank
+#  @param weeks A list of week objects, best first (see rank_weeks)
+#  @param count Number of weeks to pick
+#  @return list of week objects
+def rank_select(weeks, count):
+    """Linear ranking: the i-th best of n weeks is picked with weight n - i"""
+    n = len(weeks)
+    total = n * (n + 1) / 2.0
+    picks = []
+    for x in range(count):
+        pick = random() * total
+        i = 0
+        while i < n - 1 and pick >= n - i:
+            pick -= n - i
+            i += 1
+        picks.append(weeks[i])
+    return picks
+
+
+## Picks weeks in proportion to their fitness
+#  @param weeks A list of week objects, best first (see rank_weeks)
+#  @param count Number of weeks to pick
+#  @return list of week objects
+def roulette_select(weeks, count):
+    """Fitness proportionate; each week gets its fitness plus one, so
+    weeks of fitness 0 can still be picked, and invalid weeks only get
+    one, so they are picked only if there are hardly any valid ones"""
+    weights = [(x.fitness + 1.0) if x.valid else 1.0 for x in weeks]
+    total = sum(weights)
+    picks = []
+    for x in range(count):
+        pick = random() * total
+        i = 0
+        while i < len(weeks) - 1 and pick >= weights[i]:
+            pick -= weights[i]
+            i += 1
+        picks.append(weeks[i])
+    return picks
+
+
+## Picks the best weeks
+#  @param weeks A list of week objects, best first (see rank_weeks)
+#  @param count Number of weeks to pick
+#  @return list of week objects
+def elitist_select(weeks, count):
+    """Truncation: the count best weeks, as many times over as it takes;
+    as survivor selection this is the (mu + lambda) strategy"""
+    return [weeks[x % len(weeks)] for x in range(count)]
+
+
+# selection schemes by name; see Scheduler.selection
+SELECTIONS = {
+    "tournament": tournament_select,
+    "rank": rank_select,
+    "roulette": roulette_select,
+    "elitist": elitist_select,
+}
+
+
+## Picks different weeks
+#  @param select A selection function of SELECTIONS
+#  @param weeks A list of week objects, best first (see rank_weeks)
+#  @param count Number of weeks to pick
+#  @return list of week objects, best first
+def select_distinct(select, weeks, count):
+    """Picks one week at a time with select from the ones not picked yet"""
+    left = list(weeks)
+    picks = []
+    while len(picks) < count and len(left) > 0:
+        pick = select(left, 1)[0]
+        left.remove(pick)
+        picks.append(pick)
+    return rank_weeks(picks)
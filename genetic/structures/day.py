@@ -18,15 +18,18 @@ class Day:
             print("Day code was not recognized")
             return
 
+        topology = self.info("Week").topology
+        room_slots = topology.day_room_slots['mtwrf'.index(self.day_code.lower())]
         room_list = []
-        # 'rooms' is now a list of tuples. [0]: building, [1]: number.
-                                         # [2]: capacity. [3]: has_computers
-        for room in rooms:
-            new_room = structures.Room(building         = room[0],
-                                       number           = room[1],
-                                       capacity         = int(room[2]),
-                                       has_computers    = bool(int(room[3])),
+        # fixed room details come from the topology, which is shared by all weeks
+        for room_index in range(len(topology.rooms)):
+            building, number, capacity, has_computers = topology.rooms[room_index]
+            new_room = structures.Room(building         = building,
+                                       number           = number,
+                                       capacity         = capacity,
+                                       has_computers    = has_computers,
                                        this_day         = self,
+                                       slot_infos       = room_slots[room_index],
                                        test             = test)
             room_list.append(new_room)
 
@@ -0,0 +1,172 @@
+from __future__ import print_function
+import random
+from week import EMPTY
+
+
+class IndexedSet:
+
+    """A set that also gives a random member in constant time. The members
+    are kept in a list, with the position of each in a dict; removing one
+    moves the last member into its place"""
+
+    def __init__(self, items = ()):
+        """IN: distinct items"""
+        self.items = list(items)
+        self.positions = dict(zip(self.items, range(len(self.items))))
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, item):
+        return item in self.positions
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def add(self, item):
+        if item not in self.positions:
+            self.positions[item] = len(self.items)
+            self.items.append(item)
+
+    def discard(self, item):
+        position = self.positions.pop(item, None)
+        if position is None:
+            return
+        last = self.items.pop()
+        if position < len(self.items):
+            self.items[position] = last
+            self.positions[last] = position
+
+    def sample(self):
+        """A random member; the set must not be empty"""
+        return self.items[random.randrange(len(self.items))]
+
+
+class FreeRows:
+
+    """The placements of the generator (see Topology.placements) still
+    free in a week: each of their slots empty and among the slots it may
+    fill. They are kept per kind in an IndexedSet, so a free placement is
+    drawn in constant time, and filling a placement drops every placement
+    sharing one of its slots, without going through the rows again.
+
+    A placement in a row is drawn with weight the number of free slots of
+    its row, as when the generator drew a free slot and tried its row;
+    single slots are drawn uniformly. The weights are kept by drawing each
+    placement with probability its weight over the longest row of its kind"""
+
+    # kinds drawn by the free slots of their row
+    ROW_WEIGHTED = ("mwf", "tr", "mwf_tr")
+    # draws that the weights or the accept test may turn down before
+    # sample goes through every free placement of the kinds instead
+    MAX_TRIES = 30
+
+    ## Finds the free placements of a week
+    #  @param self
+    #  @param topology The topology of the week
+    #  @param this_week A week object
+    #  @param slot_indices Indices of the slots that may be filled, or None for all
+    def __init__(self, topology, this_week, slot_indices = None):
+        """IN: topology, week object, optional list of slot indices
+        OUT: none"""
+        self.topology = topology
+        assignment = this_week.assignment
+        if slot_indices is None:
+            slot_indices = range(len(topology.slots))
+        self.free_slots = set([i for i in slot_indices if assignment[i] == EMPTY])
+        # per row index, its free slots
+        self.row_free = [0] * len(topology.rows)
+        for each_index in self.free_slots:
+            self.row_free[topology.slots[each_index].row] += 1
+        self.free = {}
+        # per kind, the most any of its placements weighs
+        self.bounds = {}
+        for kind, placements in topology.placements.items():
+            self.free[kind] = IndexedSet(
+                [q for q in range(len(placements))
+                 if self.free_slots.issuperset(placements[q])])
+            self.bounds[kind] = 1
+            if kind in self.ROW_WEIGHTED:
+                self.bounds[kind] = max([1] + [len(topology.rows[topology.slots[each[0]].row])
+                                               for each in placements])
+
+    def __len__(self):
+        return sum([len(each) for each in self.free.values()])
+
+    def weight(self, kind, slots):
+        """The weight a free placement is drawn with"""
+        if kind in self.ROW_WEIGHTED:
+            row_free = self.row_free[self.topology.slots[slots[0]].row]
+            if kind == "mwf_tr":
+                # shared with the row's other free mwf_tr placement, if any
+                return row_free / (row_free - len(slots) + 1.0)
+            return row_free
+        return 1
+
+    ## Draws a free placement
+    #  @param self
+    #  @param kinds The kinds of placement to draw from
+    #  @param accept Function of the slot indices saying if one will do, or None
+    #  @return list of slot indices, or None if no free placement will do
+    def sample(self, kinds, accept = None):
+        """Draws a free placement of the kinds that accept takes: first by
+        drawing at random up to MAX_TRIES times, then by going through them
+        all
+        IN: list of kinds, optional function of a list of slot indices
+        OUT: list of slot indices or None"""
+        placements = self.topology.placements
+        sizes = [len(self.free[kind]) * self.bounds[kind] for kind in kinds]
+        total = sum(sizes)
+        if total == 0:
+            return None
+        for attempt in range(self.MAX_TRIES):
+            pick = random.randrange(total)
+            for kind, size in zip(kinds, sizes):
+                if pick < size:
+                    break
+                pick -= size
+            slots = placements[kind][self.free[kind].sample()]
+            if random.random() * self.bounds[kind] >= self.weight(kind, slots):
+                continue
+            if accept is None or accept(slots):
+                return slots
+        options = [(kind, placements[kind][q]) for kind in kinds for q in self.free[kind]
+                   if accept is None or accept(placements[kind][q])]
+        if len(options) == 0:
+            return None
+        pick = random.random() * sum([self.weight(kind, slots) for kind, slots in options])
+        for kind, slots in options:
+            pick -= self.weight(kind, slots)
+            if pick < 0:
+                break
+        return slots
+
+    ## Marks the slots of a placement filled
+    #  @param self
+    #  @param slot_indices The slot indices now filled
+    #  @return none
+    def take(self, slot_indices):
+        """Drops every free placement using one of the slots"""
+        for each_index in slot_indices:
+            if each_index in self.free_slots:
+                self.free_slots.discard(each_index)
+                self.row_free[self.topology.slots[each_index].row] -= 1
+            for kind, position in self.topology.slot_placements[each_index]:
+                self.free[kind].discard(position)
+
+    ## Marks slots empty again
+    #  @param self
+    #  @param slot_indices The slot indices emptied
+    #  @return none
+    def release(self, slot_indices):
+        """Undoes take: adds back the slots, and every placement using one
+        of them whose slots are then all free"""
+        topology = self.topology
+        for each_index in slot_indices:
+            if each_index not in self.free_slots:
+                self.free_slots.add(each_index)
+                self.row_free[topology.slots[each_index].row] += 1
+        for each_index in slot_indices:
+            for kind, position in topology.slot_placements[each_index]:
+                if self.free_slots.issuperset(topology.placements[kind][position]):
+                    self.free[kind].add(position)
@@ -6,7 +6,7 @@ from weakref import ref
 class Room:
 
     """A particular room, consisting of a room number and a list of time slot objects"""
-    def __init__(self, building, number, capacity, has_computers, this_day, test = False):
+    def __init__(self, building, number, capacity, has_computers, this_day, slot_infos, test = False):
         if test:
             self.day = this_day
         else:
@@ -15,19 +15,11 @@ class Room:
         self.building = building
         self.number = number
         self.full_name = building + number
-        # not sure if capacity is int or str when passed. Ensure it stores as int
-        self.capacity = int(capacity)
-        self.has_computers = bool(int(has_computers))
-
-        time_slots_mwf = self.info("Schedule").time_slots_mwf
-
-        if self.day.day_code in 'tr':
-            time_slots_tr = self.info("Schedule").time_slots_tr
-        else:
-            time_slots_tr = []
+        self.capacity = capacity
+        self.has_computers = has_computers
 
         # list of time slot objects
-        self.schedule = self.generate_time_slots(time_slots_mwf, time_slots_tr)  
+        self.schedule = self.generate_time_slots(slot_infos)
 
     def info(self, query):
         """Goes up the object hierarchy to find object for given room
@@ -48,19 +40,9 @@ class Room:
         elif query == "Computers":
             return self.has_computers
 
-    def generate_time_slots(self, time_slots_mwf, time_slots_tr):
-        this_schedule = []
-        for each_slot in time_slots_mwf:
-            start, end = each_slot.split('-')
-            this_schedule.append(
-                structures.TimeSlot(start.split(':'), end.split(':'), self, isTR=False))
-
-        for each_slot in time_slots_tr:
-            start, end = each_slot.split('-')
-            this_schedule.append(
-                structures.TimeSlot(start.split(':'), end.split(':'), self, isTR=True))
-
-        return this_schedule
+    def generate_time_slots(self, slot_infos):
+        """Builds this room's time slot objects from the topology's slot infos"""
+        return [structures.TimeSlot(each_slot_info, self) for each_slot_info in slot_infos]
 
     def __str__(self):
         #return "\n".join([str(i) for i in self.schedule])
@@ -0,0 +1,77 @@
+from __future__ import print_function
+
+
+## Makes a list method that counts the change it makes
+#  @param name Name of the list method
+#  @return method
+def counts_change(name):
+    method = getattr(list, name)
+
+    def changed(self, *args):
+        self.owner.version += 1
+        return method(self, *args)
+    return changed
+
+
+class AvailStatements(list):
+
+    """The statements of one room in a RoomsAvail; every change to the list
+    counts in the version of the RoomsAvail"""
+
+    def __init__(self, owner, statements = ()):
+        list.__init__(self, statements)
+        self.owner = owner
+
+    def __reduce__(self):
+        return (list, (list(self),))
+
+for name in ["append", "extend", "insert", "pop", "remove", "sort", "reverse",
+             "__setitem__", "__delitem__", "__setslice__", "__delslice__", "__iadd__"]:
+    setattr(AvailStatements, name, counts_change(name))
+
+
+class RoomsAvail(dict):
+
+    """Scheduler.rooms_avail: room full name -> list of statements
+    ('-'|'+', days, 'hh:mm', 'hh:mm'). version goes up on every change, to
+    the dict or to a room's list, so the compiled table only has to be
+    made again when it did (see Scheduler.room_avail_table)"""
+
+    def __init__(self, rooms_avail = {}):
+        dict.__init__(self)
+        self.version = 0
+        for room in rooms_avail:
+            self[room] = rooms_avail[room]
+
+    def __setitem__(self, room, statements):
+        self.version += 1
+        dict.__setitem__(self, room, AvailStatements(self, statements))
+
+    def __delitem__(self, room):
+        self.version += 1
+        dict.__delitem__(self, room)
+
+    def __reduce__(self):
+        # goes to worker processes as a plain dict of lists
+        return (dict, (dict([(room, list(self[room])) for room in self]),))
+
+    def setdefault(self, room, statements = ()):
+        if room not in self:
+            self[room] = statements
+        return dict.__getitem__(self, room)
+
+    def update(self, other = (), **others):
+        for room, statements in dict(other, **others).items():
+            self[room] = statements
+
+    def pop(self, *args):
+        self.version += 1
+        return dict.pop(self, *args)
+
+    def popitem(self):
+        self.version += 1
+        return dict.popitem(self)
+
+    def clear(self):
+        self.version += 1
+        dict.clear(self)
@@ -16,6 +16,8 @@ class Section:
         self.week = time_slots[0].room.day.week
         #Multiple
         self.days = []
+        #Bit mask of the days, see SlotInfo.day_mask
+        self.day_mask = 0
 
         self.update_from_slots()
  
@@ -23,6 +25,7 @@ class Section:
         """Updates attributes based on time slots"""
         for each_slot in self.time_slots:
             self.days.append(each_slot.room.day)
+            self.day_mask |= each_slot.slot_info.day_mask
 
     def __str__(self):
         return self.course.code
@@ -5,4 +5,7 @@ from week import *
 from course import *
 from instructor import *
 from section import *
-from prereq import *
\ No newline at end of file
+from prereq import *
+from topology import *
+from free_rows import *
+from rooms_avail import *
\ No newline at end of file
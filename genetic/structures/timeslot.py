@@ -4,28 +4,30 @@ from copy import copy
 from datetime import time, timedelta
 from weakref import ref
 
-class TimeSlot:
+class TimeSlot(object):
 
-    """A particular time slot, consisting of a time range and a course object"""
-
-    def __init__(self, start_time, end_time, this_room, isTR, course=None, static=False):
-        try:
-            # make sure we are given 4 integers for times
-            start_time = list(map(int, start_time))
-            end_time = list(map(int, end_time))
-        except ValueError:
-            print("Time slot unavailable with times given")
-            return
+    """A particular time slot, consisting of a time range and a course object
+    The course itself lives in the week's assignment array; a time slot is a
+    view onto one index of that array"""
 
+    def __init__(self, slot_info, this_room):
+        """slot_info is the topology's shared description of this slot"""
         self.room = this_room
-        self.day = self.room.day.day_code 
-        self.start_time = time(start_time[0], start_time[1])
-        self.end_time = time(end_time[0], end_time[1])
-        self.isTR = isTR
-        self.static = static
-        self.course = course
-        self.duration = self.find_duration(start_time, end_time)
-        self.instructor = None
+        self.slot_info = slot_info
+        self.index = slot_info.index
+        # set by bind once the week owning the assignment array is known
+        self.assignment = None
+        self.courses = None
+
+    # fixed attributes, shared through the topology
+    day = property(lambda self: self.slot_info.day)
+    start_time = property(lambda self: self.slot_info.start_time)
+    end_time = property(lambda self: self.slot_info.end_time)
+    isTR = property(lambda self: self.slot_info.isTR)
+    duration = property(lambda self: self.slot_info.duration)
+    day_index = property(lambda self: self.slot_info.day_index)
+    room_index = property(lambda self: self.slot_info.room_index)
+    slot_index = property(lambda self: self.slot_info.position)
 
     def info(self, query):
         """Goes up the object hierarchy to find object for given time slot
@@ -44,27 +46,33 @@ class TimeSlot:
         elif query == "Schedule":
             return self.room.day.week().schedule()
 
-    def set_indices(self, day, room, slot):
-        """Sets indices to refer to this object by cascading down"""
-        self.day_index = day
-        self.room_index = room
-        self.slot_index = slot
+    def bind(self, this_week):
+        """Attaches this time slot to the week's assignment array"""
+        self.assignment = this_week.assignment
+        self.courses = this_week.courses
+
+    def get_course(self):
+        course_index = self.assignment[self.index]
+        if course_index < 0:
+            return None
+        return self.courses[course_index]
+
+    def get_instructor(self):
+        course = self.get_course()
+        if course is None:
+            return None
+        return course.instructor
 
-    def find_duration(self, start_time, end_time):
-        duration_hours = (end_time[0] - start_time[0]) * 60
-        duration_min = end_time[1] - start_time[1]
-        return duration_hours + duration_min
+    course = property(get_course, lambda self, course: self.set_course(course))
+    instructor = property(get_instructor)
 
     def set_course(self, course):
         """Assigns a course to a time slot."""
-        self.course = course
-        if course is not None:
-            self.instructor = course.instructor
+        self.info("Week").assign_slot(self.index, course)
 
     def remove_course(self):
         """Removes course and instructor associations from time slot"""
-        self.course = None
-        self.instructor = None
+        self.info("Week").clear_slot(self.index)
 
     def __str__(self):
         return "Course: %s\nInstructor: %s\nRoom: %s\nStart time: %s\nEnd time: %s\nDuration: %s" % \
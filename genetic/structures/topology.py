@@ -0,0 +1,221 @@
+from __future__ import print_function
+import structures
+from datetime import time
+from random import Random
+
+
+class SlotInfo:
+
+    """The fixed part of one time slot: when and where it is.
+    Shared by the matching time slot of every week; never modified"""
+
+    def __init__(self, index, day, day_index, room_index, position, slot_string, isTR):
+        self.index = index
+        self.day = day
+        self.day_index = day_index
+        self.room_index = room_index
+        self.position = position
+        self.slot_string = slot_string
+        self.isTR = isTR
+        start, end = parse_slot_string(slot_string)
+        self.start_time = time(start[0], start[1])
+        self.end_time = time(end[0], end[1])
+        self.duration = (end[0] - start[0]) * 60 + end[1] - start[1]
+        self.start_minutes = start[0] * 60 + start[1]
+        self.end_minutes = end[0] * 60 + end[1]
+        # one bit per day, m = 1 through f = 16
+        self.day_mask = 1 << day_index
+        # index of the distinct (start, end) pair, set by Topology
+        self.time_id = None
+        # index of the row (same room and times on every day) set by Topology
+        self.row = None
+
+
+class Topology:
+
+    # max gap in minutes for two slots to count as back-to-back
+    SEQUENTIAL_THRESHOLD = 15
+
+    """The fixed layout of time slots shared by every week of a scheduler.
+    Slots are numbered in the order Week.list_time_slots walks them:
+    day, then room, then the room's mwf slots followed by its tr slots.
+    Weeks only store which course sits in each slot; everything else about
+    a slot (room, day, times) is read from here"""
+
+    # seed of the zobrist keys; fixed so hashes are the same on every run
+    ZOBRIST_SEED = 450
+
+    def __init__(self, rooms, time_slots_mwf, time_slots_tr, num_courses = 0):
+        self.time_slots_mwf = time_slots_mwf
+        self.time_slots_tr = time_slots_tr
+        # per room index: (building, number, capacity, has_computers)
+        self.rooms = [(room[0], room[1], int(room[2]), bool(int(room[3])))
+                      for room in rooms]
+        # per room index: full name, as in Room.full_name
+        self.room_names = [room[0] + room[1] for room in self.rooms]
+        # per slot index
+        self.slots = []
+        # per day index, per room index: list of slot infos in room order
+        self.day_room_slots = []
+        for day_index in range(5):
+            day = 'mtwrf'[day_index]
+            room_slots = []
+            for room_index in range(len(self.rooms)):
+                this_room_slots = []
+                slot_strings = [(s, False) for s in time_slots_mwf]
+                if day in 'tr':
+                    slot_strings += [(s, True) for s in time_slots_tr]
+                for position in range(len(slot_strings)):
+                    slot_string, isTR = slot_strings[position]
+                    slot_info = SlotInfo(len(self.slots), day, day_index, room_index,
+                                         position, slot_string, isTR)
+                    self.slots.append(slot_info)
+                    this_room_slots.append(slot_info)
+                room_slots.append(this_room_slots)
+            self.day_room_slots.append(room_slots)
+        self.num_slots = len(self.slots)
+
+        # lookup tables: (day, room index, start, end) -> slot index, and
+        # (room index, start, end) -> row index; a row is the list of slot
+        # indices with the same room and times, one per day it exists on
+        self.slot_lookup = {}
+        self.row_lookup = {}
+        self.rows = []
+        for each_slot in self.slots:
+            self.slot_lookup[(each_slot.day, each_slot.room_index,
+                              each_slot.start_time, each_slot.end_time)] = each_slot.index
+            row_key = (each_slot.room_index, each_slot.start_time, each_slot.end_time)
+            if row_key not in self.row_lookup:
+                self.row_lookup[row_key] = len(self.rows)
+                self.rows.append([])
+            each_slot.row = self.row_lookup[row_key]
+            self.rows[each_slot.row].append(each_slot.index)
+
+        # distinct (start, end) minute pairs, and per pair of them whether
+        # they overlap and whether they are back-to-back; constraints look
+        # these up by time_id instead of comparing times
+        self.times = []
+        time_ids = {}
+        for each_slot in self.slots:
+            key = (each_slot.start_minutes, each_slot.end_minutes)
+            if key not in time_ids:
+                time_ids[key] = len(self.times)
+                self.times.append(key)
+            each_slot.time_id = time_ids[key]
+        self.overlap = [[minutes_overlap(a, b) for b in self.times]
+                        for a in self.times]
+        self.sequential = [[minutes_sequential(a, b, self.SEQUENTIAL_THRESHOLD)
+                            for b in self.times] for a in self.times]
+        # per slot index: the slots of the same room and day at overlapping
+        # times, itself included; a course in one of them keeps it out
+        self.room_overlaps = []
+        for each_slot in self.slots:
+            self.room_overlaps.append(
+                [s.index for s in self.day_room_slots[each_slot.day_index][each_slot.room_index]
+                 if self.overlap[each_slot.time_id][s.time_id]])
+
+        # the placements the generator makes, as sorted slot indices, by
+        # kind: "mwf" (m, w and f of a mwf row) and "tr" (a tr row) for 3
+        # credit hours, "mwf_tr" (mwf and one of t or r of a mwf row) for 4,
+        # "single" (a slot of a mwf row) and "single_tr" (a slot of a tr
+        # row, for labs) for 1; and per slot index, the (kind, position)
+        # of the placements using it
+        self.placements = {"mwf": [], "tr": [], "mwf_tr": [], "single": [], "single_tr": []}
+        for each_row in self.rows:
+            row_slots = [self.slots[i] for i in each_row]
+            if row_slots[0].isTR:
+                self.placements["tr"].append(list(each_row))
+                self.placements["single_tr"].extend([[i] for i in each_row])
+            else:
+                mwf = [s.index for s in row_slots if s.day in 'mwf']
+                self.placements["mwf"].append(mwf)
+                for each_slot in row_slots:
+                    if each_slot.day in 'tr':
+                        self.placements["mwf_tr"].append(sorted(mwf + [each_slot.index]))
+                self.placements["single"].extend([[i] for i in each_row])
+        self.slot_placements = [[] for each_slot in self.slots]
+        for kind in sorted(self.placements):
+            for position in range(len(self.placements[kind])):
+                for each_index in self.placements[kind][position]:
+                    self.slot_placements[each_index].append((kind, position))
+
+        # zobrist keys: a random 64 bit number per slot and course index; a
+        # week's hash is the xor of the keys of its filled slots, so it can
+        # be updated with one xor per change (see Week.set_slot)
+        key_source = Random(self.ZOBRIST_SEED)
+        self.zobrist = [[key_source.getrandbits(64) for c in range(num_courses)]
+                        for i in range(self.num_slots)]
+
+        # unary constraints compiled for this layout, by id of their args:
+        # (args, func, args key, UnaryTable); see Scheduler.compile_constraints
+        self.unary_tables = {}
+        # prereq lists of avoid_overlap_within_csc compiled for this layout,
+        # by id: (the list, prereq signature, pairs); see prereq_pairs
+        self.prereq_pairs = {}
+
+    def placement_kinds(self, course):
+        """The kinds of placement (see placements) for a course, by its
+        credit hours; empty for credit hours the generator cannot place"""
+        if course.credit == 3:
+            return ["mwf", "tr"]
+        elif course.credit == 4:
+            return ["mwf_tr"]
+        elif course.credit == 1 and course.is_lab:
+            return ["single_tr"]
+        elif course.credit == 1:
+            return ["single"]
+        return []
+
+    def find_slot(self, day, room_index, start_time, end_time):
+        """Returns the index of the slot at the given day, room and times,
+        or None if there is no such slot"""
+        return self.slot_lookup.get((day, room_index, start_time, end_time))
+
+    def find_row(self, room_index, start_time, end_time):
+        """Returns the slot indices of the row with the given room and times
+        (one slot per day), or an empty list if there is no such row"""
+        row = self.row_lookup.get((room_index, start_time, end_time))
+        if row is None:
+            return []
+        return self.rows[row]
+
+    def find_slot_indices_from_cuts(self, slots_list):
+        """Returns the indices of all slots whose start and end match the slots list
+        IN: list of time slot strings, e.g. ['08:00-08:50']
+        OUT: list of slot indices"""
+        start_times = []
+        end_times = []
+        for each_slot in slots_list:
+            start, end = parse_slot_string(each_slot)
+            start_times.append(time(start[0], start[1]))
+            end_times.append(time(end[0], end[1]))
+
+        return [s.index for s in self.slots
+                if s.start_time in start_times and s.end_time in end_times]
+
+
+def parse_slot_string(slot_string):
+    """Splits a time slot string such as '08:00-08:50' into
+    ((8, 0), (8, 50))"""
+    start, end = slot_string.split('-')
+    start = tuple(map(int, start.split(':')))
+    end = tuple(map(int, end.split(':')))
+    return start, end
+
+
+def minutes_overlap(times1, times2):
+    """Same test as constraint.is_overlap on (start, end) minute pairs:
+    true if the later one starts before the earlier one ends, or both
+    start together"""
+    if times1[0] < times2[0]:
+        start_1st, start_2nd = times1, times2
+    else:
+        start_1st, start_2nd = times2, times1
+    return start_2nd[0] < start_1st[1] or start_1st[0] == start_2nd[0]
+
+
+def minutes_sequential(times1, times2, time_threshold):
+    """Same test as constraint.times_are_sequential on (start, end) minute pairs"""
+    later_start = max(times1[0], times2[0])
+    earlier_end = min(times1[1], times2[1])
+    return later_start - earlier_end - time_threshold <= 0
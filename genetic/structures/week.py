@@ -4,6 +4,11 @@ from copy import copy
 from copy import deepcopy
 from datetime import time
 from weakref import ref
+from array import array
+from bisect import insort
+
+# value of an unassigned slot in a week's assignment array
+EMPTY = -1
 
 class MalformedWeekError(Exception):
     def __init__(self, value):
@@ -16,31 +21,242 @@ class MalformedWeekError(Exception):
 ## Documentation for a class.
 #  
 #
-#  A particular week of courses, consisting of 5 day objects
-class Week:
+#  A particular week of courses, stored as a flat array of course indices
+#  with the 5 day objects built on demand
+class Week(object):
 
-    """A particular week of courses, consisting of 5 day objects"""
+    """A particular week of courses, consisting of 5 day objects
+    The schedule itself is self.assignment, an array holding the index (into
+    the scheduler's courses) of the course in each slot, or EMPTY. Days,
+    rooms and time slots are views onto that array and are only built when
+    something asks for them"""
 
     ## Initialize week objects with room objects
     #  @param self
     #  @param info A week object with list of room objects
     #
-    def __init__(self, rooms, this_scheduler, test = False):
+    def __init__(self, rooms, this_scheduler, test = False, assignment = None):
         """Initialize week object with list of room objects"""
         if test:
             self.schedule = this_scheduler
         else:
             self.schedule = ref(this_scheduler)
-        self.days = [structures.Day(rooms, day_code, self, test)
-                     for day_code in 'mtwrf']
+        self.rooms = rooms
+        self.test = test
+        self.topology = this_scheduler.topology
+        self.courses = this_scheduler.courses
+        self.course_ids = this_scheduler.course_ids
+        self.section_groups = this_scheduler.section_groups
+        if assignment is None:
+            self.assignment = array('h', [EMPTY]) * self.topology.num_slots
+        else:
+            self.assignment = array('h', assignment)
+        # course index -> sorted slot indices holding it; kept current by
+        # assign_slot, clear_slot and swap_slots
+        self.course_slots = {}
+        # zobrist hash of the assignment; kept current by set_slot
+        self.genome_hash = 0
+        zobrist = self.topology.zobrist
+        for i in range(len(self.assignment)):
+            if self.assignment[i] != EMPTY:
+                self.course_slots.setdefault(self.assignment[i], []).append(i)
+                self.genome_hash ^= zobrist[i][self.assignment[i]]
+        # instructor name -> meetings per day; see instructor_timeline
+        self.timeline = None
+        # instructor name -> results of the constraints reading the timeline
+        self.timeline_flags = {}
+        # object graph; see materialize
+        self.day_objects = None
+        self.slot_objects = None
         self.fitness = 0
         self.valid = True
         self.num_invalid = 0
         self.complete = True
         #Week's copy of courses
         self.sections = []
+        self.sections_by_code = {}
         self.constraints = {}
 
+    ## Builds the day/room/time slot objects for this week
+    #  @param self
+    #  @return none
+    def materialize(self):
+        """Builds the day, room and time slot objects viewing this week's
+        assignment array, if they have not been built yet"""
+        if self.day_objects is not None:
+            return
+        self.day_objects = [structures.Day(self.rooms, day_code, self, self.test)
+                            for day_code in 'mtwrf']
+        self.slot_objects = []
+        for each_day in self.day_objects:
+            for each_room in each_day.rooms:
+                for each_slot in each_room.schedule:
+                    each_slot.bind(self)
+                    self.slot_objects.append(each_slot)
+
+    ## Drops the day/room/time slot objects, keeping only the assignment
+    #  @param self
+    #  @return none
+    def compact(self):
+        """Releases the object graph; it is rebuilt on the next access"""
+        self.day_objects = None
+        self.slot_objects = None
+        self.sections = []
+        self.sections_by_code = {}
+
+    def get_days(self):
+        self.materialize()
+        return self.day_objects
+
+    days = property(get_days)
+
+    ## Returns the time slot object for a slot index
+    #  @param self
+    #  @param index A slot index into the assignment array
+    #  @return time slot object
+    def slot(self, index):
+        """Returns the time slot object viewing the given slot index"""
+        self.materialize()
+        return self.slot_objects[index]
+
+    ## Finds the index of a course in the scheduler's course list
+    #  @param self
+    #  @param course A course object
+    #  @return index or None
+    def course_id(self, course):
+        """Returns the index used in the assignment array for a course
+        (None if the course is not one of the scheduler's)"""
+        return self.course_ids.get(course.code)
+
+    ## Returns the course assigned to a slot index
+    #  @param self
+    #  @param index A slot index into the assignment array
+    #  @return course object or None
+    def course_at(self, index):
+        course_index = self.assignment[index]
+        if course_index == EMPTY:
+            return None
+        return self.courses[course_index]
+
+    ## Assigns a course to a slot index
+    #  @param self
+    #  @param index A slot index into the assignment array
+    #  @param course A course object, or None to clear the slot
+    #  @return none
+    def assign_slot(self, index, course):
+        """Assigns a course to the slot at index"""
+        if course is None:
+            self.clear_slot(index)
+            return
+        course_index = self.course_id(course)
+        if course_index is None:
+            raise MalformedWeekError("Assign Slot: unknown course " + course.code)
+        self.set_slot(index, course_index)
+
+    ## Clears a slot index
+    #  @param self
+    #  @param index A slot index into the assignment array
+    #  @return none
+    def clear_slot(self, index):
+        """Removes whatever course is assigned to the slot at index"""
+        self.set_slot(index, EMPTY)
+
+    ## Writes a course index into the assignment array
+    #  @param self
+    #  @param index A slot index into the assignment array
+    #  @param course_index Index of a course in the scheduler's courses, or EMPTY
+    #  @return none
+    def set_slot(self, index, course_index):
+        """Single point through which the assignment array changes, keeping
+        the course index up to date"""
+        old_course_index = self.assignment[index]
+        if old_course_index == course_index:
+            return
+        if old_course_index != EMPTY:
+            old_slots = self.course_slots[old_course_index]
+            old_slots.remove(index)
+            if len(old_slots) == 0:
+                del self.course_slots[old_course_index]
+            self.genome_hash ^= self.topology.zobrist[index][old_course_index]
+        if course_index != EMPTY:
+            insort(self.course_slots.setdefault(course_index, []), index)
+            self.genome_hash ^= self.topology.zobrist[index][course_index]
+        self.assignment[index] = course_index
+        if self.timeline is not None:
+            self.timeline = None
+            self.timeline_flags = {}
+
+    ## Finds the slot indices of a course
+    #  @param self
+    #  @param course A course object
+    #  @return list of slot indices
+    def find_course_indices(self, course):
+        """Returns the slot indices holding the given course, in slot order"""
+        course_index = self.course_id(course)
+        if course_index not in self.course_slots:
+            return []
+        return list(self.course_slots[course_index])
+
+    ## Gives the meetings of every instructor, per day, sorted by time
+    #  @param self
+    #  @return dictionary of instructor name -> list of 5 lists of meetings
+    def instructor_timeline(self):
+        """Returns instructor name -> one list per day (m through f) of the
+        instructor's meetings that day, sorted by start and end time.
+        A meeting is (start minutes, end minutes, time id, building,
+        course index). As with sections, a course meets at the times and in
+        the building of its first slot, on every day it has a slot.
+        Built on first use and kept until the assignment changes
+        IN: none
+        OUT: dictionary of instructor name -> list of 5 lists of tuples"""
+        if self.timeline is not None:
+            return self.timeline
+        topology = self.topology
+        timeline = {}
+        for course_index, slot_indices in self.course_slots.iteritems():
+            first_slot = topology.slots[slot_indices[0]]
+            meeting = (first_slot.start_minutes, first_slot.end_minutes,
+                       first_slot.time_id, topology.rooms[first_slot.room_index][0],
+                       course_index)
+            instructor = self.courses[course_index].instructor
+            days = timeline.setdefault(getattr(instructor, "name", instructor),
+                                       [[], [], [], [], []])
+            day_mask = 0
+            for each_index in slot_indices:
+                day_mask |= topology.slots[each_index].day_mask
+            for day_index in range(5):
+                if day_mask & (1 << day_index):
+                    days[day_index].append(meeting)
+        for days in timeline.itervalues():
+            for each_day in days:
+                each_day.sort()
+        self.timeline = timeline
+        return timeline
+
+    ## Swaps the courses of two weeks at the given slot indices
+    #  @param self
+    #  @param other A week object
+    #  @param indices List of slot indices
+    #  @return none
+    def swap_slots(self, other, indices):
+        """Exchanges the courses at indices between this week and other
+        (the crossover operation, done directly on the arrays)"""
+        for i in indices:
+            mine = self.assignment[i]
+            theirs = other.assignment[i]
+            if mine != theirs:
+                self.set_slot(i, theirs)
+                other.set_slot(i, mine)
+
+    ## Tells if two weeks have the same courses in the same slots
+    #  @param self
+    #  @param other A week object
+    #  @return True or False
+    def same_assignment(self, other):
+        """Compares the hashes first, then the arrays"""
+        return self.genome_hash == other.genome_hash and \
+               self.assignment == other.assignment
+
     ## Finds objects for a given week
     #  @param self
     #  @param info A find object which locates possible schedule queries
@@ -67,14 +283,38 @@ class Week:
         try:
             if len(self.sections) > 0:
                 self.sections = []
+                self.sections_by_code = {}
             for each_course in courses:
                 each_slots = self.find_course(each_course)
                 each_section = structures.Section(each_course, each_slots)
                 self.sections.append(each_section)
+                self.sections_by_code.setdefault(each_course.code, each_section)
         except:
             print("ERROR: Update Sections")
             print(each_course)
 
+    ## Updates the section of one course
+    #  @param self
+    #  @param course A course object
+    #  @return none
+    def update_section(self, course):
+        """Rebuilds only the section of course after it moved, keeping its
+        place in the sections list; falls back to update_sections if the
+        sections are not one per course or the course is unscheduled
+        IN: course object
+        OUT: updated section attribute"""
+        course_index = self.course_id(course)
+        if len(self.sections) != len(self.courses) or course_index is None or \
+           self.sections[course_index].course is not course or \
+           course_index not in self.course_slots:
+            self.update_sections(self.courses)
+            return
+        old_section = self.sections[course_index]
+        new_section = structures.Section(course, self.find_course(course))
+        self.sections[course_index] = new_section
+        if self.sections_by_code.get(course.code) is old_section:
+            self.sections_by_code[course.code] = new_section
+
     ## Finds sections for a given course
     #  @param self
     #  @param section A section object
@@ -83,20 +323,29 @@ class Week:
         """IN: course_code as string
         OUT: section object; note that its attr's are shallow copies of structure objects
         Returns None if not found"""
-        for each_section in self.sections:
-            if each_section.course.code == course_code:
-                #found
-                return each_section
-        #not found
-        return None
+        return self.sections_by_code.get(course_code)
 
     ## Finds copies of weeks
     #  @param self
     #  @param deep_copy A copy object
     #  @return deepcopy(self)
-    def deep_copy(self):
-        """Returns a deep copy of week"""
-        return deepcopy(self)
+    def deep_copy(self, with_sections = True):
+        """Returns a deep copy of week
+        Only the assignment array is copied; the copy builds its own day,
+        room and time slot objects if it needs them"""
+        if self.test:
+            this_scheduler = self.schedule
+        else:
+            this_scheduler = self.schedule()
+        copy_of_week = Week(self.rooms, this_scheduler, self.test, self.assignment)
+        copy_of_week.fitness = self.fitness
+        copy_of_week.valid = self.valid
+        copy_of_week.num_invalid = self.num_invalid
+        copy_of_week.complete = self.complete
+        copy_of_week.constraints = dict(self.constraints)
+        if with_sections and len(self.sections) > 0:
+            copy_of_week.update_sections(self.courses)
+        return copy_of_week
 
 
     ## Find given courses timeslots in week
@@ -107,25 +356,14 @@ class Week:
         """Returns list of time slot objects for given course object in week
         IN: course object
         OUT: list of time slot objects"""
-
-        time_slots = []
-        for each_day in self.days:
-            for each_room in each_day.rooms:
-                for each_slot in each_room.schedule:
-                    # If there is a course
-                    if each_slot.course:
-                        # If they are the same course
-                        if each_slot.course.code == course.code:
-                            time_slots.append(each_slot)
-        return time_slots
+        return [self.slot(i) for i in self.find_course_indices(course)]
 
     ## Unschedules a course from a week
     #  @param this_week A week to unschedule the course from
     #  @param course A course object to unschedule from this_week
     def unschedule_course(self, course):
-        courses_to_unschedule = self.find_course(course)
-        for each_time_slot in courses_to_unschedule:
-            each_time_slot.course = None
+        for each_index in self.find_course_indices(course):
+            self.clear_slot(each_index)
 
     ## Finds objects for a given week
     #  @param self
@@ -144,24 +382,9 @@ class Week:
     #  @param time_slot A time_slot object
     #  @return List_of_slots A list of time slot objects in a week
     def list_time_slots(self):
-        """Gives list of all time slot objects in week while indexing them"""
-        list_of_slots = []
-        # index counters
-        day = 0
-        room = 0
-        slot = 0
-
-        for each_day in self.days:
-            for each_room in each_day.rooms:
-                for each_slot in each_room.schedule:
-                    list_of_slots.append(each_slot)
-                    each_slot.set_indices(day, room, slot)
-                    slot += 1
-                room += 1
-                slot = 0
-            day += 1
-            room = 0
-        return list_of_slots
+        """Gives list of all time slot objects in week, in slot index order"""
+        self.materialize()
+        return list(self.slot_objects)
 
     ## Provides lists of empty timeslot objects
     #  @param self
@@ -169,13 +392,7 @@ class Week:
     #  @return empty_List_of_slots A list of empty time slot objects in a week
     def find_empty_time_slots(self):
         """Returns a list of empty (no course) time slot objects"""
-        empty_slots = []
-        for each_day in self.days:
-            for each_room in each_day.rooms:
-                for each_slot in each_room.schedule:
-                    if each_slot.course is None:
-                        empty_slots.append(each_slot)
-        return empty_slots
+        return [self.slot(i) for i, c in enumerate(self.assignment) if c == EMPTY]
 
     ## Confirms with a true if a list of courses is empty or false otherwise
     #  @param self
@@ -183,11 +400,9 @@ class Week:
     #  @return true or false It returns a bool if empty or not
     def is_empty(self):
         """Returns true is empty; else, false"""
-        for each_day in self.days:
-            for each_room in each_day.rooms:
-                for each_slot in each_room.schedule:
-                    if each_slot is not None:
-                        return False
+        for each_course_index in self.assignment:
+            if each_course_index != EMPTY:
+                return False
         return True
 
     ## Updates and fills the week based on the criteria listed in courses
@@ -201,19 +416,14 @@ class Week:
         These time slots form a "row"
         IN: time slot object
         OUT: matching time slot objects from this week"""
-        matching_time_slots = []
-        for each_day in self.days:
-            for each_room in each_day.rooms:
-                if each_room.number == time_slot.room.number:
-                    for each_time_slot in each_room.schedule:
-                        if each_time_slot.start_time == time_slot.start_time and \
-                           each_time_slot.end_time == time_slot.end_time:
-                            matching_time_slots.append(each_time_slot)
+        matching_indices = self.topology.find_row(time_slot.room_index,
+                                                  time_slot.start_time,
+                                                  time_slot.end_time)
         #todo: log error; this should only ever happen
         #if weeks are malformed
-        if len(matching_time_slots) == 0:
+        if len(matching_indices) == 0:
             raise MalformedWeekError("Find Matching Time Slot Row")
-        return matching_time_slots
+        return [self.slot(i) for i in matching_indices]
 
 
     def find_matching_time_slot(self, time_slot):
@@ -221,16 +431,11 @@ class Week:
         This means same start time, end time, room, and day
         IN: time slot object
         OUT: matching time slot object from this week"""
-        for each_day in self.days:
-            if each_day.day_code == time_slot.room.day.day_code:
-                for each_room in each_day.rooms:
-                    if each_room.number == time_slot.room.number:
-                        for each_time_slot in each_room.schedule:
-                            if each_time_slot.start_time == time_slot.start_time and \
-                               each_time_slot.end_time == time_slot.end_time:
-                                return each_time_slot
-
-        raise MalformedWeekError("Find Matching Time Slot")
+        index = self.topology.find_slot(time_slot.day, time_slot.room_index,
+                                        time_slot.start_time, time_slot.end_time)
+        if index is None:
+            raise MalformedWeekError("Find Matching Time Slot")
+        return self.slot(index)
 
 
     def fill_week(self, courses):
@@ -254,10 +459,9 @@ class Week:
                         for each_slot in each_day.get_room(each_course["room"].split()[1]):
                             if each_slot.start_time == startTime and \
                                each_slot.end_time == endTime:
-                                for each_s_course in self.schedule().courses:
+                                for each_s_course in self.courses:
                                     if each_s_course.code == each_course["code"]:
-                                        each_slot.course = each_s_course
-                                        each_slot.instructor = each_s_course.instructor
+                                        each_slot.set_course(each_s_course)
 
         except KeyError, AttributeError:
             # error stuff
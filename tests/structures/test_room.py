@@ -18,6 +18,14 @@ class TestRoom(unittest.TestCase):
         self.assertEqual(len(self.roomMWF.schedule), 3)
         self.assertEqual(len(self.roomTR.schedule), 5)
 
+    def test_shared_topology(self):
+        other_room = Week(sample_scheduler.rooms, sample_scheduler).days[0].rooms[0]
+        for mine, other in zip(self.roomMWF.schedule, other_room.schedule):
+            self.assertTrue(mine.slot_info is other.slot_info)
+            self.assertEqual(mine.start_time, other.start_time)
+        self.assertFalse(self.roomTR.schedule[0].isTR)
+        self.assertTrue(self.roomTR.schedule[-1].isTR)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -27,6 +27,94 @@ class TestWeek(unittest.TestCase):
                                                           capacity=60,
                                                           needs_computers=True))), 0)
 
+    def test_deep_copy(self):
+        copy_of_week = self.week.deep_copy()
+        self.assertEqual(list(copy_of_week.assignment), list(self.week.assignment))
+        course = sample_scheduler.courses[0]
+        copy_of_week.unschedule_course(course)
+        self.assertEqual(len(copy_of_week.find_course(course)), 0)
+        self.assertEqual(len(self.week.find_course(course)), 3)
+
+    def test_swap_slots(self):
+        course = sample_scheduler.courses[0]
+        empty_week = Week(sample_scheduler.rooms, sample_scheduler)
+        full_week = self.week.deep_copy()
+        indices = full_week.find_course_indices(course)
+        empty_week.swap_slots(full_week, indices)
+        self.assertEqual(empty_week.find_course_indices(course), indices)
+        self.assertEqual(len(full_week.find_course(course)), 0)
+
+    def test_course_index(self):
+        week = self.week.deep_copy()
+        course = sample_scheduler.courses[0]
+        slots = week.find_course(course)
+        slots[0].remove_course()
+        self.assertEqual(len(week.find_course(course)), 2)
+        empty_slot = week.find_empty_time_slots()[0]
+        empty_slot.set_course(course)
+        self.assertTrue(empty_slot.index in week.find_course_indices(course))
+        self.assertEqual(week.find_course_indices(course),
+                         sorted(week.find_course_indices(course)))
+        self.assertEqual(week.find_section(course.code).course, course)
+        self.assertEqual(week.find_section("CSC 666"), None)
+
+    def test_genome_hash(self):
+        copy_of_week = self.week.deep_copy()
+        self.assertEqual(copy_of_week.genome_hash, self.week.genome_hash)
+        self.assertTrue(copy_of_week.same_assignment(self.week))
+        course = sample_scheduler.courses[0]
+        old_indices = copy_of_week.find_course_indices(course)
+        copy_of_week.unschedule_course(course)
+        self.assertNotEqual(copy_of_week.genome_hash, self.week.genome_hash)
+        for each_index in old_indices:
+            copy_of_week.set_slot(each_index, copy_of_week.course_id(course))
+        self.assertEqual(copy_of_week.genome_hash, self.week.genome_hash)
+
+    def test_instructor_timeline(self):
+        week = self.week.deep_copy()
+        timeline = week.instructor_timeline()
+        course = sample_scheduler.courses[0]
+        days = timeline[course.instructor.name]
+        first_slot = week.find_course(course)[0]
+        for each_slot in week.find_course(course):
+            meetings = days[each_slot.day_index]
+            self.assertEqual(meetings, sorted(meetings))
+            self.assertTrue((first_slot.slot_info.start_minutes, first_slot.slot_info.end_minutes,
+                             first_slot.slot_info.time_id, first_slot.room.building,
+                             week.course_id(course)) in meetings)
+        self.assertTrue(week.instructor_timeline() is timeline)
+        week.unschedule_course(course)
+        self.assertFalse(week.instructor_timeline() is timeline)
+
+    def test_find_matching_time_slot(self):
+        other_week = Week(sample_scheduler.rooms, sample_scheduler)
+        for each_slot in self.week.list_time_slots():
+            match = other_week.find_matching_time_slot(each_slot)
+            self.assertEqual(match.index, each_slot.index)
+            row = other_week.find_matching_time_slot_row(each_slot)
+            self.assertTrue(each_slot.index in [s.index for s in row])
+            for each_match in row:
+                self.assertEqual(each_match.room_index, each_slot.room_index)
+                self.assertEqual(each_match.start_time, each_slot.start_time)
+
+    def test_free_rows(self):
+        topology = sample_scheduler.topology
+        week = Week(sample_scheduler.rooms, sample_scheduler)
+        free_rows = FreeRows(topology, week)
+        self.assertEqual(len(free_rows), sum([len(p) for p in topology.placements.values()]))
+        slots = free_rows.sample(["mwf", "tr"])
+        self.assertTrue(slots in topology.placements["mwf"] + topology.placements["tr"])
+        for each_index in slots:
+            week.assign_slot(each_index, sample_scheduler.courses[0])
+        free_rows.take(slots)
+        # what is left is what a new one finds in the week
+        again = FreeRows(topology, week)
+        for kind in topology.placements:
+            self.assertEqual(sorted(free_rows.free[kind]), sorted(again.free[kind]))
+            for q in free_rows.free[kind]:
+                self.assertFalse(set(topology.placements[kind][q]) & set(slots))
+        self.assertEqual(free_rows.sample(["mwf", "tr"], lambda s: False), None)
+
     def test_list_time_slots(self):
         pass
         """self.assertEqual(len(self.week.list_time_slots()), 13)"""
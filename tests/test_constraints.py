@@ -223,7 +223,149 @@ class TestConstraints(unittest.TestCase):
         good_scheduler.calc_fitness(good_scheduler.weeks[0])
         self.assertEquals(good_scheduler.weeks[0].fitness, 100)
 
+        # first slots at overlapping times conflict even on different days
+        week = bad_scheduler.weeks[0].deep_copy()
+        first, second = smith_instr.courses
+        topology = week.topology
+        mwf_slot = [s for s in topology.slots if s.day == "m"][0]
+        tr_slot = [s for s in topology.slots if s.day == "t" and
+                   topology.overlap[mwf_slot.time_id][s.time_id]][0]
+        week.unschedule_course(first)
+        week.unschedule_course(second)
+        week.set_slot(mwf_slot.index, week.course_id(first))
+        week.set_slot(tr_slot.index, week.course_id(second))
+        week.valid = True
+        self.assertEquals(constraint.instructor_conflict(week, [instructors])["score"], 0)
+        self.assertFalse(week.valid)
+
 		
+    def test_constraint_scope(self):
+        course = sample_scheduler.courses[0]
+        smith_instr = Instructor("Smith")
+        smith_instr.courses = [sample_scheduler.courses[1]]
+        sample_scheduler.add_constraint("course before 10", 30,
+                                        constraint.course_before_time,
+                                        [course, time(10, 0), False])
+        sample_scheduler.add_constraint("smith conflict", 0,
+                                        constraint.instructor_conflict,
+                                        [[smith_instr]])
+        sample_scheduler.add_constraint("capacity checking", 0,
+                                        constraint.ensure_course_room_capacity, [])
+        sample_scheduler.add_constraint("room only", 10, lambda week, args: {"score": 1},
+                                        [], scope = constraint.ConstraintScope(rooms = ["CHEK209"]))
+        names = lambda found: [c.name for c in found]
+        self.assertEqual(names(sample_scheduler.constraints_depending_on(courses = [course])),
+                         ["course before 10", "capacity checking"])
+        self.assertEqual(names(sample_scheduler.constraints_depending_on(instructors = [smith_instr])),
+                         ["smith conflict", "capacity checking"])
+        self.assertEqual(names(sample_scheduler.constraints_depending_on(rooms = ["CHEK209"])),
+                         ["capacity checking", "room only"])
+
+    def test_overlap_tables(self):
+        topology = sample_scheduler.topology
+        for each_slot in topology.slots:
+            for each_other_slot in topology.slots:
+                self.assertEqual(topology.overlap[each_slot.time_id][each_other_slot.time_id],
+                                 constraint.is_overlap(each_slot, each_other_slot))
+                self.assertEqual(topology.sequential[each_slot.time_id][each_other_slot.time_id],
+                                 constraint.times_are_sequential(each_slot, each_other_slot))
+
+    def test_no_overlapping_courses(self):
+        week = sample_scheduler.weeks[0].deep_copy()
+        week.valid = True
+        self.assertEqual(constraint.no_overlapping_courses(week, [])["score"], 1)
+        self.assertTrue(week.valid)
+        # put a second course into a slot overlapping a filled one
+        topology = sample_scheduler.topology
+        pairs = [(s, o) for s in topology.slots
+                 for o in topology.day_room_slots[s.day_index][s.room_index]
+                 if s.index != o.index and topology.overlap[s.time_id][o.time_id]]
+        filled, other = pairs[0]
+        week.set_slot(filled.index, 0)
+        week.set_slot(other.index, 1)
+        self.assertEqual(constraint.no_overlapping_courses(week, [])["score"], 0)
+        self.assertFalse(week.valid)
+
+    def test_prereq_pairs(self):
+        courses = sample_scheduler.courses
+        prereq = structures.Prereq("CSC130", courses)
+        prereq.determine_not_prereq(courses)
+        # the same prereq listed twice counts each pair twice
+        pairs = constraint.prereq_pairs([prereq, prereq], sample_scheduler.course_ids)
+        self.assertEqual(len(pairs), len(prereq.courses) * len(prereq.not_prereqs))
+        self.assertEqual([p[3] for p in pairs], [2] * len(pairs))
+        prereqs = [prereq]
+        pairs = constraint.compiled_prereq_pairs(prereqs, sample_scheduler)
+        self.assertTrue(constraint.compiled_prereq_pairs(prereqs, sample_scheduler) is pairs)
+        # compile_constraints drops the pairs of lists no constraint has
+        sample_scheduler.compile_constraints()
+        self.assertFalse(id(prereqs) in sample_scheduler.topology.prereq_pairs)
+        week = sample_scheduler.weeks[0]
+        week.valid = True
+        reval = constraint.avoid_overlap_within_csc(week, [prereqs, True])
+        self.assertEqual(reval["score"] == 0, len(reval["failed"]) > 0)
+        self.assertEqual(week.valid, len(reval["failed"]) == 0)
+
+    def test_unary_table(self):
+        week = sample_scheduler.weeks[0].deep_copy()
+        course = sample_scheduler.courses[0]
+        args = [course, "tr", False]
+        table = constraint.unary_table(constraint.partial_schedule_day, args, week)
+        self.assertTrue(constraint.unary_table(constraint.partial_schedule_day, args, week) is table)
+        self.assertFalse(table.is_mandatory)
+        holds = table.entries[0][3]
+        for each_slot in week.topology.slots:
+            self.assertEqual(holds[each_slot.index], each_slot.day in "tr")
+        slots = week.find_course(course)
+        num_holding = len([s for s in slots if s.day in "tr"])
+        self.assertEqual(table.count(week),
+                         (num_holding, len(slots), [course] * (len(slots) - num_holding)))
+        reval = constraint.partial_schedule_day(week, [course, "tr", False])
+        self.assertEqual(reval["score"], constraint.partial_credit(num_holding, len(slots)))
+        # an unscheduled course has nothing to check
+        week.unschedule_course(course)
+        self.assertEqual(table.count(week), (0, 0, []))
+
+    def test_compile_constraints(self):
+        this_scheduler = interface.create_scheduler_from_file_test("tests/schedules/morning_class_test.xml")
+        topology = this_scheduler.topology
+        args = [this_scheduler.courses[0], "tr", False]
+        this_scheduler.add_constraint("tr only", 10, constraint.partial_schedule_day, args)
+        table = topology.unary_tables[id(args)][3]
+        self.assertTrue(constraint.unary_table(constraint.partial_schedule_day, args,
+                                               this_scheduler) is table)
+        # args edited in place are compiled again by compile_constraints,
+        # and only there
+        args[1] = "mwf"
+        self.assertTrue(constraint.unary_table(constraint.partial_schedule_day, args,
+                                               this_scheduler) is table)
+        this_scheduler.compile_constraints()
+        self.assertFalse(topology.unary_tables[id(args)][3] is table)
+        # tables of args no constraint has are dropped
+        constraint.unary_table(constraint.partial_schedule_day, [args[0], "tr", False],
+                               this_scheduler)
+        this_scheduler.delete_list_constraints(["tr only"])
+        self.assertEqual(topology.unary_tables, {})
+
+    def test_course_sections_at_different_times(self):
+        this_scheduler = interface.create_scheduler_from_file_test("tests/schedules/instructor_conflict_fail.xml")
+        courses = this_scheduler.courses
+        self.assertEqual([[courses[i].code for i in g] for g in this_scheduler.section_groups],
+                         [["CSC 131 001", "CSC 131 A"], ["CSC 232 A", "CSC 232 001"]])
+        week = this_scheduler.weeks[0]
+        self.assertEqual(constraint.course_sections_at_different_times(week, [courses])["score"], 1)
+        # another section at the same time and day, in a different room
+        first, second = [courses[i] for i in this_scheduler.section_groups[1]]
+        slot = week.find_course(first)[0]
+        week.unschedule_course(second)
+        for each_slot in week.find_empty_time_slots():
+            if each_slot.day == slot.day and each_slot.start_time == slot.start_time and \
+               each_slot.room_index != slot.room_index:
+                each_slot.set_course(second)
+                break
+        self.assertEqual(constraint.course_sections_at_different_times(week, [courses])["score"], 0)
+        self.assertFalse(week.valid)
+
     def test_rooms_avail_for_all_courses(self):
         this_scheduler = interface.create_scheduler_from_file_test("tests/schedules/rooms_avail_for_all_courses.xml")
 
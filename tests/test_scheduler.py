@@ -3,6 +3,7 @@ import unittest
 import random
 from genetic import *
 import genetic.interface
+import genetic.evaluator as evaluator_module
 from datetime import time
 
 filename = "tests/schedules/morning_class_test.xml"
@@ -85,7 +86,327 @@ class TestScheduler(unittest.TestCase):
     def test_inconsistences_integration(self):
         #test that both work together
         pass
-    
+
+    def test_incremental_fitness(self):
+        course = sample_scheduler.courses[0]
+        sample_scheduler.add_constraint("course before 10", 30,
+                constraint.course_before_time, [course, time(10, 0), False])
+        sample_scheduler.add_constraint("no overlapping courses", 0,
+                constraint.no_overlapping_courses, [])
+        week = sample_scheduler.weeks[0].deep_copy()
+        week.update_sections(sample_scheduler.courses)
+        evaluator = evaluator_module.IncrementalFitness(sample_scheduler, week)
+        old_indices = week.find_course_indices(course)
+        empty = [s.index for s in week.find_empty_time_slots()]
+        for each_move in [empty[:len(old_indices)], empty[-len(old_indices):]]:
+            old_indices = week.find_course_indices(course)
+            fitness = evaluator.move_course(course, each_move)
+            full_week = week.deep_copy()
+            full_week.valid = True
+            sample_scheduler.calc_fitness(full_week)
+            self.assertEquals(fitness, full_week.fitness)
+            self.assertEquals(week.valid, full_week.valid)
+            self.assertEquals(week.find_section(course.code).time_slots[0].index,
+                              each_move[0])
+        evaluator.undo()
+        self.assertEquals(week.find_course_indices(course), old_indices)
+
+    def test_constraint_order(self):
+        def always_rejects(this_week, args):
+            this_week.valid = False
+            return {"score": 0, "failed": []}
+        sample_scheduler.add_constraint("course before 20", 30,
+                constraint.course_before_time, [sample_scheduler.courses[0], time(20, 0), False])
+        sample_scheduler.add_constraint("no overlapping courses", 0,
+                constraint.no_overlapping_courses, [])
+        sample_scheduler.add_constraint("always rejects", 0, always_rejects, [])
+        names = [c.name for c in sample_scheduler.constraints]
+        week = sample_scheduler.weeks[0].deep_copy()
+        for i in range(3):
+            week.valid = True
+            sample_scheduler.calc_fitness(week)
+        self.assertEquals(week.fitness, 30)
+        sample_scheduler.update_constraint_order()
+        # the weighted constraint keeps its place; the rejecting one goes first
+        self.assertEquals(sample_scheduler.constraint_order(), [0, 2, 1])
+        self.assertEquals([c.name for c in sample_scheduler.constraints], names)
+        week.valid = True
+        sample_scheduler.calc_fitness(week)
+        self.assertEquals(week.fitness, 30)
+        self.assertFalse(week.valid)
+
+    def test_fitness_cache(self):
+        sample_scheduler.add_constraint("course before 10", 30,
+                constraint.course_before_time, [sample_scheduler.courses[0], time(10, 0), False])
+        week = sample_scheduler.weeks[0]
+        weeks = [week.deep_copy(with_sections = False) for i in range(3)]
+        weeks = sample_scheduler.deduplicate_weeks(weeks)
+        self.assertEquals(len(weeks), 1)
+        sample_scheduler.calc_fitness_batch(weeks)
+        self.assertTrue(week.genome_hash in sample_scheduler.fitness_cache)
+        cached_week = week.deep_copy(with_sections = False)
+        sample_scheduler.calc_fitness_batch([cached_week])
+        self.assertEquals(cached_week.fitness, weeks[0].fitness)
+        # a new constraint empties the cache
+        sample_scheduler.add_constraint("course before 20", 30,
+                constraint.course_before_time, [sample_scheduler.courses[0], time(20, 0), False])
+        sample_scheduler.calc_fitness_batch([cached_week])
+        self.assertEquals(cached_week.fitness, weeks[0].fitness + 30)
+        # and so does one edited in place, once compiled again
+        edited = [c for c in sample_scheduler.constraints if c.name == "course before 20"][0]
+        edited.weight = 40
+        sample_scheduler.compile_constraints()
+        sample_scheduler.calc_fitness_batch([cached_week])
+        self.assertEquals(cached_week.fitness, weeks[0].fitness + 40)
+        edited.args[1] = time(0, 0)
+        sample_scheduler.compile_constraints()
+        sample_scheduler.calc_fitness_batch([cached_week])
+        self.assertEquals(cached_week.fitness, weeks[0].fitness)
+
+    def test_calc_fitness_batch(self):
+        labs = [c for c in sample_scheduler.courses if c.is_lab]
+        sample_scheduler.add_constraint("labs on tr", 0, constraint.lab_on_tr, [labs])
+        sample_scheduler.add_constraint("capacity checking", 0,
+                constraint.ensure_course_room_capacity, [])
+        sample_scheduler.add_constraint("course before 10", 30,
+                constraint.course_before_time, [sample_scheduler.courses[0], time(10, 0), False])
+        week = sample_scheduler.weeks[0]
+        weeks = [week.deep_copy(with_sections = False) for i in range(3)]
+        full_weeks = [week.deep_copy(with_sections = False) for i in range(3)]
+        # one week with a lab moved off tr
+        lab_index = weeks[1].find_course_indices(labs[0])
+        empty = [s.index for s in weeks[1].find_empty_time_slots() if not s.isTR]
+        for each_week in [weeks[1], full_weeks[1]]:
+            each_week.unschedule_course(labs[0])
+            for i in range(len(lab_index)):
+                each_week.set_slot(empty[i], each_week.course_id(labs[0]))
+        sample_scheduler.calc_fitness_batch(weeks)
+        for each_week in full_weeks:
+            each_week.update_sections(sample_scheduler.courses)
+            sample_scheduler.calc_fitness(each_week)
+        self.assertEquals([(w.fitness, w.valid, w.num_valid) for w in weeks],
+                          [(w.fitness, w.valid, w.num_valid) for w in full_weeks])
+        self.assertFalse(weeks[1].valid)
+
+    def test_worker_pool(self):
+        this_scheduler = interface.create_scheduler_from_file_test("tests/schedules/instructor_conflict_fail.xml")
+        instructors = dict([(c.instructor.name, c.instructor) for c in this_scheduler.courses])
+        this_scheduler.add_constraint("instructor conflict", 0,
+                constraint.instructor_conflict, [instructors.values()])
+        this_scheduler.add_constraint("course before 10", 30,
+                constraint.course_before_time, [this_scheduler.courses[0], time(10, 0), False])
+        random.seed(1)
+        this_scheduler.weeks = []
+        this_scheduler.generate_starting_population(20)
+        weeks = [w.deep_copy(with_sections = False) for w in this_scheduler.weeks]
+        this_scheduler.calc_fitness_batch(this_scheduler.weeks)
+        # so the copies are scored again, in the workers
+        this_scheduler.fitness_cache.clear()
+        this_scheduler.num_workers = 2
+        this_scheduler.POOL_MIN_WEEKS = 1
+        try:
+            this_scheduler.calc_fitness_batch(weeks)
+            self.assertTrue(this_scheduler.worker_pool_cache is not None)
+            self.assertEquals([(w.fitness, w.valid, w.num_valid, w.constraints) for w in weeks],
+                              [(w.fitness, w.valid, w.num_valid, w.constraints)
+                               for w in this_scheduler.weeks])
+        finally:
+            this_scheduler.close_worker_pool()
+
+    def test_parallel_generation(self):
+        this_scheduler = interface.create_scheduler_from_file_test("tests/schedules/instructor_conflict_fail.xml")
+        this_scheduler.POOL_MIN_WEEKS = 1
+        this_scheduler.GENERATION_CHUNK = 3
+        assignments = []
+        try:
+            # the same seed gives the same weeks, whatever the number of workers
+            for num_workers in [2, 3]:
+                this_scheduler.num_workers = num_workers
+                this_scheduler.weeks = []
+                random.seed(2)
+                this_scheduler.generate_starting_population(10)
+                self.assertEquals(len(this_scheduler.weeks), 10)
+                assignments.append([list(w.assignment) for w in this_scheduler.weeks])
+        finally:
+            this_scheduler.close_worker_pool()
+        self.assertEquals(assignments[0], assignments[1])
+        for each_week in this_scheduler.weeks:
+            self.assertEquals(sorted(each_week.course_slots),
+                              range(len(this_scheduler.courses)))
+
+    def test_island_model(self):
+        this_scheduler = interface.create_scheduler_from_file_test("tests/schedules/instructor_conflict_fail.xml")
+        instructors = dict([(c.instructor.name, c.instructor) for c in this_scheduler.courses])
+        this_scheduler.add_constraint("instructor conflict", 0,
+                constraint.instructor_conflict, [instructors.values()])
+        this_scheduler.add_constraint("course before 10", 30,
+                constraint.course_before_time, [this_scheduler.courses[0], time(10, 0), False])
+        model = islands.IslandModel(this_scheduler, 2)
+        model.MIGRATION_INTERVAL = 1
+        reports = []
+        weeks = model.run(0.5, lambda *progress: reports.append(progress))
+        self.assertTrue(len(weeks) > 0)
+        self.assertEquals(sorted(set([r[0] for r in reports])), [0, 1])
+        for island in range(2):
+            self.assertTrue(len(model.progress[island]) > 0)
+        this_scheduler.calc_fitness_batch(weeks)
+        self.assertTrue(any([w.valid for w in weeks]))
+
+    def test_selection(self):
+        this_scheduler = interface.create_scheduler_from_file_test("tests/schedules/instructor_conflict_fail.xml")
+        this_scheduler.add_constraint("course before 10", 30,
+                constraint.course_before_time, [this_scheduler.courses[0], time(10, 0), False])
+        random.seed(3)
+        this_scheduler.weeks = []
+        this_scheduler.generate_starting_population(20)
+        this_scheduler.calc_fitness_batch(this_scheduler.weeks)
+        best = selection.rank_weeks(this_scheduler.weeks)[0]
+        self.assertEquals(selection.elitist_select([best], 2), [best, best])
+        for each_scheme in sorted(selection.SELECTIONS):
+            this_scheduler.selection = each_scheme
+            this_scheduler.population_size = 6
+            this_scheduler.num_elites = 1
+            this_scheduler.num_offspring = 4
+            this_scheduler.select_survivors()
+            self.assertEquals(len(this_scheduler.weeks), 6)
+            self.assertTrue(this_scheduler.weeks[0] is best)
+            self.assertEquals(len(set([id(w) for w in this_scheduler.weeks])), 6)
+            this_scheduler.breed_population()
+            self.assertTrue(6 < len(this_scheduler.weeks) <= 10)
+            this_scheduler.calc_fitness_batch(this_scheduler.weeks)
+            best = selection.rank_weeks(this_scheduler.weeks)[0]
+
+    def test_annealing(self):
+        this_scheduler = interface.create_scheduler_from_file_test("tests/schedules/instructor_conflict_fail.xml")
+        instructors = dict([(c.instructor.name, c.instructor) for c in this_scheduler.courses])
+        this_scheduler.add_constraint("instructor conflict", 0,
+                constraint.instructor_conflict, [instructors.values()])
+        this_scheduler.add_constraint("course before 10", 30,
+                constraint.course_before_time, [this_scheduler.courses[0], time(10, 0), False])
+        random.seed(5)
+        this_scheduler.weeks = []
+        this_scheduler.generate_starting_population(50)
+        this_scheduler.calc_fitness_batch(this_scheduler.weeks)
+        start = selection.rank_weeks(this_scheduler.weeks)[0]
+        self.assertTrue(start.valid)
+        genome = start.genome_hash
+        annealer = annealing.SimulatedAnnealing(this_scheduler, "linear")
+        reports = []
+        weeks = annealer.run(start, 0.3, lambda *progress: reports.append(progress))
+        self.assertTrue(0 < len(weeks) <= annealer.NUM_BEST)
+        self.assertTrue(len(reports) > 0)
+        self.assertEquals(start.genome_hash, genome)
+        fitnesses = [w.fitness for w in weeks]
+        self.assertEquals(fitnesses, sorted(fitnesses, reverse = True))
+        self.assertTrue(fitnesses[0] >= start.fitness)
+        # the fitness annealing gives each week is the one calc_fitness gives
+        this_scheduler.calc_fitness_batch(weeks)
+        self.assertEquals([w.fitness for w in weeks], fitnesses)
+        for each_week in weeks:
+            self.assertTrue(each_week.valid)
+            self.assertTrue(each_week.complete)
+
+    def test_room_avail_table(self):
+        this_scheduler = interface.create_scheduler_from_file_test("tests/schedules/instructor_conflict_fail.xml")
+        self.assertEqual(this_scheduler.room_avail_table()[2], [])
+        this_scheduler.add_room_avail("CHEK210", False, "MWF", "10:00", "12:00")
+        table = this_scheduler.room_avail_table()
+        # compiled again only when rooms_avail changes, even in place
+        self.assertTrue(this_scheduler.room_avail_table() is table)
+        this_scheduler.rooms_avail["CHEK210"].append(('-', "tr", "08:00", "09:00"))
+        self.assertFalse(this_scheduler.room_avail_table() is table)
+        this_scheduler.rooms_avail["CHEK210"].pop()
+        holding, failing, forbidden = this_scheduler.room_avail_table()
+        topology = this_scheduler.topology
+        self.assertTrue(len(forbidden) > 0)
+        for each_slot in topology.slots:
+            self.assertEqual(each_slot.index in forbidden,
+                             topology.room_names[each_slot.room_index] == "CHEK210" and
+                             each_slot.day in "mwf" and each_slot.start_minutes >= 600 and
+                             each_slot.end_minutes <= 720)
+        # the generator keeps out of forbidden slots when it can
+        this_scheduler.weeks = []
+        this_scheduler.generate_starting_population(10)
+        for each_week in this_scheduler.weeks:
+            self.assertTrue(each_week.complete)
+            self.assertEqual([i for i in forbidden if each_week.assignment[i] != -1], [])
+        # changed directly, compiled again
+        this_scheduler.rooms_avail = {}
+        self.assertEqual(this_scheduler.room_avail_table()[2], [])
+
+    def test_course_domains(self):
+        this_scheduler = interface.create_scheduler_from_file_test("tests/schedules/instructor_conflict_fail.xml")
+        self.assertEqual(this_scheduler.course_domains(), [None] * len(this_scheduler.courses))
+        course = [c for c in this_scheduler.courses if c.credit == 3][0]
+        this_scheduler.add_constraint("only tr", 0, constraint.partial_schedule_day,
+                                      [course, "tr", True])
+        domains = this_scheduler.course_domains()
+        self.assertTrue(this_scheduler.course_domains() is domains)
+        domain = domains[this_scheduler.course_ids[course.code]]
+        self.assertEqual(sorted(domain), [s.index for s in this_scheduler.topology.slots
+                                          if s.day in "tr"])
+        # the generator keeps the course to its domain
+        this_scheduler.weeks = []
+        this_scheduler.generate_starting_population(10)
+        for each_week in this_scheduler.weeks:
+            for each_slot in each_week.find_course(course):
+                self.assertTrue(each_slot.index in domain)
+        # a soft constraint does not restrict it
+        this_scheduler.clear_constraints()
+        this_scheduler.add_constraint("only tr", 10, constraint.partial_schedule_day,
+                                      [course, "tr", False])
+        self.assertEqual(this_scheduler.course_domains(), [None] * len(this_scheduler.courses))
+
+    def test_constructive_population(self):
+        filename = "tests/schedules/instructor_conflict_fail.xml"
+        assignments = []
+        for i in range(2):
+            this_scheduler = interface.create_scheduler_from_file_test(filename)
+            instructors = dict([(c.instructor.name, c.instructor) for c in this_scheduler.courses])
+            this_scheduler.add_constraint("instructor conflict", 0,
+                    constraint.instructor_conflict, [instructors.values()])
+            this_scheduler.add_constraint("no overlapping courses", 0,
+                    constraint.no_overlapping_courses, [])
+            this_scheduler.add_constraint("course sections at different times", 0,
+                    constraint.course_sections_at_different_times, [this_scheduler.courses])
+            this_scheduler.weeks = []
+            this_scheduler.generate_constructive_population(5)
+            self.assertEqual(this_scheduler.constructive_seed, 5)
+            for each_week in this_scheduler.weeks:
+                self.assertTrue(each_week.complete)
+                each_week.update_sections(this_scheduler.courses)
+                this_scheduler.calc_fitness(each_week)
+                self.assertTrue(each_week.valid)
+            assignments.append([list(w.assignment) for w in this_scheduler.weeks])
+        # the same seeds give the same weeks
+        self.assertEqual(assignments[0], assignments[1])
+
+    def test_assign_rooms(self):
+        # greedy takes room 0 for the first course; the matching moves it
+        self.assertEqual(matching.hopcroft_karp([[0, 1], [0]], 2), [1, 0])
+        self.assertEqual(matching.hopcroft_karp([[0], [0]], 1), [0, None])
+        this_scheduler = interface.create_scheduler_from_file_test("tests/schedules/instructor_conflict_fail.xml")
+        this_scheduler.add_constraint("capacity checking", 0,
+                constraint.ensure_course_room_capacity, [])
+        this_scheduler.add_constraint("no overlapping courses", 0,
+                constraint.no_overlapping_courses, [])
+        topology = this_scheduler.topology
+        week = this_scheduler.weeks[0].deep_copy()
+        def times(this_week):
+            return dict([(c, [(topology.slots[i].day, topology.slots[i].time_id) for i in slots])
+                         for c, slots in this_week.course_slots.items()])
+        old_times = times(week)
+        this_scheduler.assign_rooms(week)
+        self.assertEqual(times(week), old_times)
+        self.assertTrue(week.complete)
+        week.update_sections(this_scheduler.courses)
+        this_scheduler.calc_fitness(week)
+        self.assertTrue(week.valid)
+        # the rooms only depend on the times
+        other_week = week.deep_copy()
+        self.assertEqual(this_scheduler.assign_rooms(other_week), [])
+        self.assertTrue(other_week.same_assignment(week))
+
 """
     def test_generator(self):
         generated = sample_scheduler.generator(sample_scheduler.weeks[0], sample_courses, sample_scheduler.weeks[0].find_empty_time_slots()) 